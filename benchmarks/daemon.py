@@ -0,0 +1,86 @@
+"""
+daemon 模式的延遲 benchmark
+比較每次啟動新的 `python main.py` process 與送請求給常駐 daemon（Unix domain socket）的每次組譯延遲，
+以及多個 client 同時送出請求時的 throughput
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.daemon
+    python -m benchmarks.daemon --requests 500 --clients 4 --jobs 4
+"""
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from config import input_folder
+from src.server import AssemblerDaemon, connect, request_assembly
+
+
+def samples() -> List[str]:
+    paths = sorted(glob.glob(os.path.join(input_folder, "*")))
+    return [open(path).read() for path in paths]
+
+
+def fresh_processes(count: int, directory: str) -> float:
+    names = sorted(os.listdir(input_folder))
+    start = time.perf_counter()
+    for index in range(count):
+        subprocess.run([sys.executable, "main.py", "-i", names[index % len(names)], "-b", "-q",
+                        "-o", os.path.join(directory, "out.txt")], check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def daemon_requests(endpoint: str, sources: List[str], count: int, clients: int) -> float:
+    def client(offset: int) -> None:
+        connection = connect(endpoint)
+        for index in range(offset, count, clients):
+            result = request_assembly(connection, sources[index % len(sources)], bonus=True)
+            assert result["ok"], result
+        connection.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(client, range(clients)))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark fresh processes vs the assembler daemon")
+    parser.add_argument("--requests", type=int, default=200, help="Daemon requests per measurement (default: 200)")
+    parser.add_argument("--processes", type=int, default=20, help="Fresh `python main.py` runs (default: 20)")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent clients for the throughput run (default: 4)")
+    parser.add_argument("--jobs", type=int, default=2, help="Daemon worker processes (default: 2)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="sicxe-daemon-")
+    endpoint = f"unix:{os.path.join(directory, 'daemon.sock')}"
+    sources = samples()
+    try:
+        elapsed = fresh_processes(args.processes, directory)
+        print(f"{'fresh process':<24}{elapsed / args.processes * 1000:9.2f} ms/request")
+
+        with AssemblerDaemon(endpoint, jobs=args.jobs) as daemon:
+            thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+            thread.start()
+            daemon_requests(endpoint, sources, args.jobs * 2, args.jobs) #! 讓每個 worker 先啟動
+            elapsed = daemon_requests(endpoint, sources, args.requests, 1)
+            print(f"{'daemon, 1 client':<24}{elapsed / args.requests * 1000:9.2f} ms/request")
+            elapsed = daemon_requests(endpoint, sources, args.requests, args.clients)
+            print(f"{f'daemon, {args.clients} clients':<24}{elapsed / args.requests * 1000:9.2f} ms/request"
+                  f"  ({args.requests / elapsed:.0f} requests/s, {args.jobs} workers)")
+            daemon.shutdown()
+            thread.join()
+    finally:
+        for entry in os.listdir(directory):
+            os.remove(os.path.join(directory, entry))
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
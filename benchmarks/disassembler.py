@@ -0,0 +1,63 @@
+"""
+反組譯器的 benchmark
+以 benchmarks.synthetic 產生程式並組譯，量測反組譯（object program -> 原始碼）的速度，
+以及 round trip（組譯 -> 反組譯 -> 再組譯 -> 比較）的總時間，並確認結果完全相同
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.disassembler
+    python -m benchmarks.disassembler --lines 200000 --csects 8 --repeat 5
+"""
+import argparse
+import gc
+import io
+import logging
+import time
+from typing import Callable, Tuple, TypeVar
+
+from benchmarks.synthetic import ProgramSpec, generate
+from src.disassembler import Disassembler, assemble_modules, compare_modules
+from src.log import configure_logging
+from src.models.dataTypes import AssemblerOptions
+
+T = TypeVar("T")
+
+
+def best_of(repeat: int, function: Callable[[], T]) -> Tuple[float, T]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the disassembler and the round-trip verification")
+    parser.add_argument("--lines", type=int, default=100000, help="Synthetic program size in lines (default: 100000)")
+    parser.add_argument("--csects", type=int, default=4, help="Control sections (default: 4)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions, the best time is kept (default: 3)")
+    args = parser.parse_args()
+
+    configure_logging(logging.ERROR) #! 合成程式的 CSECT 沒有 END，不輸出對應的 warning
+    options = AssemblerOptions(bonus=True)
+    source = generate(ProgramSpec(lines=args.lines, csects=args.csects, use_blocks=2, literal_density=0.2,
+                                  extref_density=0.3 if args.csects > 1 else 0.0))
+    seconds, modules = best_of(1, lambda: assemble_modules(io.StringIO(source), options))
+    size = sum(len(code) for module in modules for _, code in module.text)
+    print(f"assembled {args.lines:,} lines ({size:,} bytes of object code) in {seconds:.2f} s")
+
+    disassembler = Disassembler()
+    seconds, text = best_of(args.repeat, lambda: disassembler.disassemble(modules))
+    print(f"{'disassemble':<16}{seconds * 1000:9.1f} ms  ({size / seconds / 1e6:.2f} MB/s, {len(text.splitlines()):,} lines)")
+    seconds, again = best_of(1, lambda: assemble_modules(io.StringIO(text), options))
+    print(f"{'re-assemble':<16}{seconds * 1000:9.1f} ms")
+    seconds, differences = best_of(args.repeat, lambda: compare_modules(modules, again))
+    print(f"{'compare':<16}{seconds * 1000:9.1f} ms")
+    if differences:
+        raise SystemExit("round trip differs:\n" + "\n".join(differences))
+    print("round trip: identical object program")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Format 3/4 目標碼編碼的 microbenchmark
+比較舊的字串做法（二進位字串串接 + int(code, 2)）與整數位移/OR 的做法
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.encoder
+    python -m benchmarks.encoder --count 1000000
+"""
+import argparse
+import random
+import time
+from typing import Callable, List, Tuple
+
+from config import opcode_table
+from src.corefunc.objectCode import decode_opcodes, encode_format3, encode_format4, to_hex
+
+Case = Tuple[str, Tuple[int, int, int, int, int, int], int]
+
+
+def string_format3(mnemonic: str, flags: Tuple[int, int, int, int, int, int], disp: int) -> str:
+    """舊的 Format 3 編碼：組成二進位字串再以 int(code, 2) 解析"""
+    opcode = opcode_table[mnemonic].opcode >> 2
+    code = f"{opcode:06b}{flags[0]}{flags[1]}{flags[2]}{flags[3]}{flags[4]}{flags[5]}{disp:012b}"
+    return f"{int(code, 2):06X}"
+
+
+def string_format4(mnemonic: str, flags: Tuple[int, int, int, int, int, int], address: int) -> str:
+    """舊的 Format 4 編碼"""
+    opcode = opcode_table[mnemonic].opcode >> 2
+    n, i, x, b, p, e = flags
+    code = f"{opcode:06b}{n}{i}{x}{b}{p}{e}{address:020b}"
+    return f"{int(code, 2):08X}"
+
+
+def build_cases(count: int, seed: int = 0) -> Tuple[List[Case], List[Case]]:
+    """隨機產生 Format 3 與 Format 4 的 (mnemonic, nixbpe, disp/address)"""
+    rng = random.Random(seed)
+    mnemonics = [name for name, entry in opcode_table.items() if entry.format == 3]
+    modes = [(1, 1), (0, 1), (1, 0)]
+    format3: List[Case] = []
+    format4: List[Case] = []
+    for _ in range(count // 2):
+        n, i = rng.choice(modes)
+        b, p = rng.choice([(0, 1), (1, 0)])
+        format3.append((rng.choice(mnemonics), (n, i, rng.randint(0, 1), b, p, 0), rng.randrange(0x1000)))
+        n, i = rng.choice(modes)
+        format4.append((rng.choice(mnemonics), (n, i, rng.randint(0, 1), 0, 0, 1), rng.randrange(0x100000)))
+    return format3, format4
+
+
+def run_string(format3: List[Case], format4: List[Case]) -> List[str]:
+    codes = [string_format3(mnemonic, flags, disp) for mnemonic, flags, disp in format3]
+    codes.extend(string_format4(mnemonic, flags, address) for mnemonic, flags, address in format4)
+    return codes
+
+
+def run_integer(format3: List[Case], format4: List[Case]) -> List[int]:
+    opcodes = decode_opcodes(opcode_table) #! 只解碼一次
+    codes = [encode_format3(opcodes[mnemonic], *flags, disp) for mnemonic, flags, disp in format3]
+    codes.extend(encode_format4(opcodes[mnemonic], *flags, address) for mnemonic, flags, address in format4)
+    return codes
+
+
+def measure(label: str, func: Callable[[], list], count: int) -> Tuple[float, list]:
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:9.2f} ms  ({elapsed / count * 1e9:7.1f} ns/encoding)")
+    return elapsed, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark format 3/4 object code encoding")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Number of encodings (default: 1000000)")
+    args = parser.parse_args()
+
+    format3, format4 = build_cases(args.count)
+    count = len(format3) + len(format4)
+    print(f"{count} encodings ({len(format3)} format 3, {len(format4)} format 4)")
+
+    string_time, string_codes = measure("string (binary str + int)", lambda: run_string(format3, format4), count)
+    integer_time, integer_codes = measure("integer (shift + or)", lambda: run_integer(format3, format4), count)
+    widths = [6] * len(format3) + [8] * len(format4)
+    hex_time, hex_codes = measure("integer + to_hex", lambda: [to_hex(value, width) for value, width in zip(integer_codes, widths)], count)
+
+    #! 兩種做法的結果必須一致
+    assert hex_codes == string_codes
+    print(f"speedup: {string_time / integer_time:.1f}x (encode only), "
+          f"{string_time / (integer_time + hex_time):.1f}x (including hex formatting)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+增量組譯的 benchmark
+以 benchmarks.synthetic 產生程式，量測單行編輯（取代同樣大小的指令、插入一行、刪除一行）的延遲，
+與整份重新組譯比較，並確認編輯後的 object program 與完整組譯完全相同
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.incremental
+    python -m benchmarks.incremental --lines 200000 --edits 50
+"""
+import argparse
+import io
+import logging
+import random
+import time
+from typing import List
+
+from benchmarks.synthetic import ProgramSpec, generate
+from src.assembler import MyAssembler
+from src.incremental import IncrementalAssembler
+from src.log import configure_logging
+from src.models.dataTypes import AssemblerOptions
+
+
+def full_assembly(source: str, options: AssemblerOptions) -> str:
+    assembler = MyAssembler(io.StringIO(source), "", options)
+    assembler.preprocess_and_assemble()
+    return assembler.object_program()
+
+
+def report(name: str, seconds: List[float]) -> None:
+    seconds = sorted(seconds)
+    print(f"{name:<12}median {seconds[len(seconds) // 2] * 1000:8.3f} ms   max {seconds[-1] * 1000:8.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark incremental re-assembly of one-line edits")
+    parser.add_argument("--lines", type=int, default=50000, help="Synthetic program size in lines (default: 50000)")
+    parser.add_argument("--edits", type=int, default=20, help="Edits of each kind at random lines (default: 20)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the edited lines (default: 0)")
+    args = parser.parse_args()
+
+    configure_logging(logging.ERROR)
+    options = AssemblerOptions(bonus=True)
+    source = generate(ProgramSpec(lines=args.lines))
+    start = time.perf_counter()
+    assembler = IncrementalAssembler(source, options)
+    print(f"initial assembly of {args.lines:,} lines: {time.perf_counter() - start:.2f} s")
+
+    rng = random.Random(args.seed)
+    editable = [number for number, line in enumerate(assembler.lines, 1)
+                if line.startswith("\t") and line.split()[0] in ("LDA", "STA", "ADD", "SUB", "COMP")]
+    replace, insert, delete, fallbacks = [], [], [], 0
+    for _ in range(args.edits):
+        number = rng.choice(editable)
+        mnemonic = rng.choice(("LDA", "STA", "ADD", "SUB", "COMP"))
+        operand = assembler.lines[number - 1].split()[1]
+        for seconds, (first, last, text) in ((replace, (number, number, f"\t{mnemonic}\t{operand}")),
+                                             (insert, (number, number - 1, "\tLDA\t#1")),
+                                             (delete, (number, number, ""))):
+            result = assembler.edit(first, last, text)
+            seconds.append(result.seconds)
+            fallbacks += not result.incremental
+    report("replace", replace)
+    report("insert", insert)
+    report("delete", delete)
+    if fallbacks:
+        print(f"{fallbacks} edit(s) fell back to full re-assembly")
+
+    start = time.perf_counter()
+    expected = full_assembly(assembler.source, options)
+    print(f"{'full':<12}{(time.perf_counter() - start) * 1000:15.1f} ms")
+    if assembler.object_program() != expected:
+        raise SystemExit("incremental result differs from full re-assembly")
+    print("incremental result: identical object program")
+
+
+if __name__ == "__main__":
+    main()
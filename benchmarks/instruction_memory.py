@@ -0,0 +1,101 @@
+"""
+指令儲存方式的記憶體 benchmark
+
+比較：
+- dict：一般 @dataclass（每個物件有 __dict__，等同於 slots 化之前的 Instruction/Location）
+- slots：目前的 @dataclass(slots=True) Instruction + Location
+- table：欄位式 InstructionTable
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.instruction_memory --lines 1000000
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from src.models.dataTypes import Instruction, Location
+from src.models.instructionTable import InstructionTable
+
+
+@dataclass
+class _DictLocation:
+    address: int
+    is_relative: bool = True
+
+
+@dataclass
+class _DictInstruction:
+    index: int
+    formatType: int
+    symbol: str
+    mnemonic: str
+    operand: str
+    objectCode: str = ""
+    location: Optional[_DictLocation] = None
+    line: Optional[int] = None
+
+
+_MNEMONICS = ("LDA", "STA", "JEQ", "COMP", "TIXR", "CLEAR", "STCH", "J")
+
+
+def _fields(row: int):
+    """產生接近真實程式的欄位：少量重複的 mnemonic、部分指令有 label、object code 各不相同"""
+    mnemonic = _MNEMONICS[row % len(_MNEMONICS)]
+    symbol = f"L{row}" if row % 4 == 0 else ""
+    operand = f"BUF{row % 512},X" if row % 3 == 0 else f"SYM{row % 4096}"
+    return row, 3, sys.intern(symbol), sys.intern(mnemonic), operand, f"{row & 0xFFFFFF:06X}", row * 3, row + 1
+
+
+def build_dict(lines: int) -> List[_DictInstruction]:
+    result = []
+    for row in range(lines):
+        index, fmt, symbol, mnemonic, operand, code, address, line = _fields(row)
+        result.append(_DictInstruction(index, fmt, symbol, mnemonic, operand, code, _DictLocation(address, False), line))
+    return result
+
+
+def build_slots(lines: int) -> List[Instruction]:
+    result = []
+    for row in range(lines):
+        index, fmt, symbol, mnemonic, operand, code, address, line = _fields(row)
+        result.append(Instruction(index, fmt, symbol, mnemonic, operand, code, Location(address, False), line))
+    return result
+
+
+def build_table(lines: int) -> InstructionTable:
+    table = InstructionTable()
+    for instruction in build_slots(lines): #! 與實際流程相同：組譯完成後由 Instruction 轉換
+        table.append(instruction)
+    return table
+
+
+def measure(builder: Callable[[int], object], lines: int) -> int:
+    """回傳 builder 產生的結構在建立完成後仍佔用的記憶體（bytes）"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = builder(lines)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare memory usage of instruction storage layouts")
+    parser.add_argument("--lines", type=int, default=1000000, help="Number of instructions (default: 1000000)")
+    args = parser.parse_args()
+
+    baseline = None
+    for name, builder in (("dict", build_dict), ("slots", build_slots), ("table", build_table)):
+        used = measure(builder, args.lines)
+        baseline = baseline or used
+        print(f"{name:>6}: {used / 1024 / 1024:9.1f} MiB  {used / args.lines:7.1f} B/instruction  ({used / baseline:.0%} of dict)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Literal pool 展開的 benchmark
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.literal_pool
+    python -m benchmarks.literal_pool --literals 10000 --pools 1000
+"""
+import argparse
+import time
+from typing import List
+
+from config import opcode_table
+from src.corefunc.section import Section
+from src.models.dataTypes import Instruction
+
+
+def build_section(literal_count: int, pool_count: int) -> Section:
+    """建立含 literal_count 個相異 literal、平均分散在 pool_count 個 LTORG 的 section"""
+    section = Section("BENCH", opcode_table)
+    instructions: List[Instruction] = [Instruction(0, 0, "BENCH", "START", "0")]
+    per_pool = max(1, literal_count // pool_count)
+    for literal_index in range(literal_count):
+        instructions.append(Instruction(len(instructions), 3, "", "LDA", f"=X'{literal_index:06X}'"))
+        if (literal_index + 1) % per_pool == 0:
+            instructions.append(Instruction(len(instructions), 0, "", "LTORG", ""))
+    instructions.append(Instruction(len(instructions), 0, "", "END", "BENCH"))
+    for instruction in instructions:
+        section.add_instruction(instruction)
+    return section
+
+
+def run(literal_count: int, pool_count: int) -> float:
+    section = build_section(literal_count, pool_count)
+    start = time.perf_counter()
+    section._process_literal_pool() #! add_literal 的訊息為 DEBUG 層級，預設不會格式化也不會輸出
+    elapsed = time.perf_counter() - start
+
+    #! 確認 index 連續且 literal 數量正確
+    assert [inst.index for inst in section.instructions] == list(range(len(section.instructions)))
+    assert sum(inst.mnemonic == "BYTE" for inst in section.instructions) == literal_count
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Section._process_literal_pool")
+    parser.add_argument("--literals", type=int, default=10000, help="Number of distinct literals (default: 10000)")
+    parser.add_argument("--pools", type=int, default=1000, help="Number of LTORG pools (default: 1000)")
+    args = parser.parse_args()
+
+    #! 以 1/4、1/2、1 倍規模執行，線性演算法的每個 literal 成本應維持固定
+    for scale in (4, 2, 1):
+        literals, pools = args.literals // scale, max(1, args.pools // scale)
+        elapsed = run(literals, pools)
+        print(f"{literals:>8} literals / {pools:>6} pools: {elapsed * 1000:9.2f} ms "
+              f"({elapsed / literals * 1e6:.2f} us/literal)")
+
+
+if __name__ == "__main__":
+    main()
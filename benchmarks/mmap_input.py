@@ -0,0 +1,124 @@
+"""
+輸入讀取的 throughput benchmark（text mode vs mmap）
+以 input/ 的範例程式產生大型原始檔（含註解行與空行），量測 cold/warm 的讀取、掃描（分割欄位）與解析（建立 Instruction）MB/s
+cold 以 posix_fadvise(DONTNEED) 將檔案移出 page cache（不支援的平台只量測 warm）
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.mmap_input
+    python -m benchmarks.mmap_input --size 1024 --keep /tmp/big.asm
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+from typing import Callable, List
+
+from config import input_folder
+from src.io.preprocessor import Preprocessor
+from src.models.dataTypes import AssemblerOptions
+
+_SKIP = {"START", "END", "CSECT"}
+
+
+def sample_lines() -> List[str]:
+    """input/ 範例程式中 START/END/CSECT 以外的指令行"""
+    preprocessor = Preprocessor()
+    lines: List[str] = []
+    for path in sorted(glob.glob(os.path.join(input_folder, "*"))):
+        with open(path) as f:
+            for line in f:
+                symbol, mnemonic, operand, _ = preprocessor._parse_line(line)
+                if mnemonic and not {symbol, mnemonic} & _SKIP:
+                    lines.append(line.rstrip("\n"))
+    return lines
+
+
+def generate(path: str, size_mb: int) -> int:
+    """產生約 size_mb MB 的原始檔（每 8 行穿插一行註解與一行空行），回傳實際大小"""
+    body = []
+    for index, line in enumerate(sample_lines()):
+        body.append(line)
+        if index % 8 == 7:
+            body.append(f". generated comment {index}")
+            body.append("")
+    chunk = ("\n".join(body) + "\n").encode()
+    target = size_mb * 1024 * 1024
+    with open(path, "wb") as f:
+        f.write(b"BENCH\tSTART\t0\n")
+        written = 0
+        while written < target:
+            f.write(chunk)
+            written += len(chunk)
+        f.write(b"\tEND\tBENCH\n")
+    return os.path.getsize(path)
+
+
+def drop_cache(path: str) -> bool:
+    """把檔案移出 page cache，成功時回傳 True"""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return True
+
+
+def raw_read(path: str) -> int:
+    with open(path, "rb") as f:
+        while f.read(1 << 20):
+            pass
+    return 0
+
+
+def scan(path: str, use_mmap: bool) -> int:
+    count = 0
+    for _ in Preprocessor(AssemblerOptions(use_mmap=use_mmap)).iter_fields(path):
+        count += 1
+    return count
+
+
+def parse(path: str, use_mmap: bool) -> int:
+    count = 0
+    for _ in Preprocessor(AssemblerOptions(use_mmap=use_mmap)).iter_instructions(path):
+        count += 1
+    return count
+
+
+def measure(label: str, path: str, size: int, func: Callable[[], int], cold: bool) -> int:
+    if cold and not drop_cache(path):
+        return -1
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {'cold' if cold else 'warm'}  {elapsed:8.2f} s  {size / elapsed / 1e6:8.1f} MB/s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark text mode vs mmap input reading")
+    parser.add_argument("--size", type=int, default=128, help="Size of the generated source in MB (default: 128)")
+    parser.add_argument("--keep", type=str, metavar="PATH", help="Write the generated source to PATH and keep it")
+    args = parser.parse_args()
+
+    path = args.keep or os.path.join(tempfile.mkdtemp(prefix="sicxe-bench-"), "big.asm")
+    try:
+        size = generate(path, args.size)
+        print(f"{path}: {size / 1e6:.1f} MB")
+        for cold in (True, False):
+            measure("raw read", path, size, lambda: raw_read(path), cold)
+            for label, func in (("scan", scan), ("parse", parse)):
+                text_count = measure(f"{label} (text mode)", path, size, lambda: func(path, False), cold)
+                mmap_count = measure(f"{label} (mmap)", path, size, lambda: func(path, True), cold)
+                assert text_count == mmap_count #! 兩種模式產生的行數/指令數必須一致
+    finally:
+        if not args.keep:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+
+
+if __name__ == "__main__":
+    main()
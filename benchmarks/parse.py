@@ -0,0 +1,112 @@
+"""
+Preprocessor 解析 throughput 的 benchmark
+將 input/ 的範例程式重複 --scale 次（預設 10,000 倍），比較改寫前的 strip/split 解析與預先編譯的 tokenizer
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.parse
+    python -m benchmarks.parse --scale 1000
+"""
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+from typing import Callable, Iterator, Optional, Tuple
+
+from config import input_folder
+from src.io.preprocessor import Preprocessor
+from src.models.dataTypes import Instruction
+
+
+class LegacyPreprocessor(Preprocessor):
+    """改寫前的解析方式：每行多次 strip/split/replace，BYTE 以空白重新串接"""
+    def _parse_line(self, line: str) -> Tuple[str, str, str]:
+        if line.strip().startswith('.'):
+            return "", "", ""
+        if '.' in line:
+            line = line.split('.')[0]
+        line = line.strip().replace('\t', ' ')
+        parts = line.split()
+        parts.extend([""] * (3 - len(parts)))
+        symbol, mnemonic, operand = parts[:3]
+        if mnemonic == "BYTE":
+            operand = " ".join([operand] + parts[3:])
+        return symbol, mnemonic, operand
+
+    def _create_instruction(self, line_parts: Tuple[str, str, str], index: int, line: Optional[int] = None) -> Instruction:
+        symbol, mnemonic, operand = line_parts
+        formatType = 0
+        if '+' in symbol:
+            formatType = 4
+            symbol = symbol.replace('+', '')
+        elif '+' in mnemonic:
+            formatType = 4
+            mnemonic = mnemonic.replace('+', '')
+        if symbol in self.opcode_table or symbol in self.directive_table or symbol == '*':
+            operand = mnemonic
+            mnemonic = symbol
+            symbol = ""
+        if symbol in self.opcode_table or symbol in self.directive_table:
+            symbol = "WRONG_SYMBOL_NAME_" + symbol
+        if mnemonic not in self.opcode_table and mnemonic not in self.directive_table:
+            raise ValueError(f"Invalid mnemonic '{mnemonic}' at index {index}: not found in opcode or directive tables.")
+        if formatType != 4 and mnemonic in self.opcode_table:
+            formatType = self.opcode_table[mnemonic].format
+        return Instruction(index, formatType, sys.intern(symbol), sys.intern(mnemonic), operand, "", None, line)
+
+    def iter_fields(self, source) -> Iterator[Tuple[int, Tuple[str, str, str]]]:
+        for line_number, line in enumerate(source, 1):
+            if line.strip() == "":
+                continue
+            linesContent = self._parse_line(line)
+            if not any(linesContent):
+                continue
+            yield line_number, linesContent
+
+
+def sample_text(scale: int) -> str:
+    """input/ 範例程式串接後重複 scale 次"""
+    text = ""
+    for path in sorted(glob.glob(os.path.join(input_folder, "*"))):
+        with open(path) as f:
+            text += f.read().rstrip("\n") + "\n"
+    return text * scale
+
+
+def measure(label: str, func: Callable[[], int], size: int) -> Tuple[float, int]:
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:7.2f} s  {size / elapsed / 1e6:7.1f} MB/s  {count / elapsed / 1e6:6.2f} M lines/s")
+    return elapsed, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Preprocessor line parsing throughput")
+    parser.add_argument("--scale", type=int, default=10000, help="How many times input/ is repeated (default: 10000)")
+    args = parser.parse_args()
+
+    text = sample_text(args.scale)
+    size = len(text.encode())
+    print(f"input/ x {args.scale}: {text.count(chr(10))} lines, {size / 1e6:.1f} MB")
+
+    #! 兩種做法在範例程式上必須產生相同的指令
+    sample = sample_text(1)
+    assert list(LegacyPreprocessor().iter_instructions(io.StringIO(sample))) == list(Preprocessor().iter_instructions(io.StringIO(sample)))
+
+    def tokens(preprocessor: Preprocessor) -> Callable[[], int]:
+        return lambda: sum(1 for _ in preprocessor.iter_fields(io.StringIO(text)))
+
+    def instructions(preprocessor: Preprocessor) -> Callable[[], int]:
+        return lambda: sum(1 for _ in preprocessor.iter_instructions(io.StringIO(text)))
+
+    legacy_tokens, _ = measure("tokenize (legacy)", tokens(LegacyPreprocessor()), size)
+    new_tokens, _ = measure("tokenize (tokenizer)", tokens(Preprocessor()), size)
+    legacy_full, _ = measure("instructions (legacy)", instructions(LegacyPreprocessor()), size)
+    new_full, _ = measure("instructions (tokenizer)", instructions(Preprocessor()), size)
+    print(f"speedup: {legacy_tokens / new_tokens:.2f}x (tokenize), {legacy_full / new_full:.2f}x (instructions)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Analyzer 輸出的 benchmark
+比較 tabulate grid（Analyzer.print_instructions）與串流的 listing/JSON Lines/CSV 報表，
+在不同指令數下的時間與 tracemalloc peak：串流輸出的時間應與指令數成線性，peak 維持固定
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.report
+    python -m benchmarks.report --lines 50000 100000 200000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+from benchmarks.writer import build_section
+from src.corefunc.analyzer import Analyzer
+from src.io.report import open_report
+
+
+def measure(func: Callable[[], None]) -> Tuple[float, int]:
+    """回傳 (秒數, tracemalloc peak bytes)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark tabulate grids vs streamed analyzer reports")
+    parser.add_argument("--lines", type=int, nargs="+", default=[25000, 50000, 100000],
+                        help="Instruction counts to measure (default: 25000 50000 100000)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="sicxe-report-")
+    print(f"{'lines':>8}  {'output':<10}{'time (ms)':>12}{'us/line':>10}{'peak (KB)':>12}")
+    try:
+        for lines in args.lines:
+            section = build_section(lines)
+
+            def grid() -> None:
+                with open(os.devnull, "w") as f:
+                    Analyzer(section).print_instructions(file=f)
+
+            def report(name: str) -> Callable[[], None]:
+                def run() -> None:
+                    with open_report(os.path.join(directory, name)) as writer:
+                        writer.write_section(section)
+                return run
+
+            for label, func in (("grid", grid), ("listing", report("out.lst")),
+                                ("jsonl", report("out.jsonl")), ("csv", report("out.csv"))):
+                elapsed, peak = measure(func)
+                print(f"{lines:>8}  {label:<10}{elapsed * 1000:>12.1f}{elapsed / lines * 1e6:>10.2f}{peak / 1024:>12.1f}")
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+SIC/XE 模擬器的 benchmark
+組譯一個以 LDCH/STCH 逐 byte 複製 buffer、累加計數器的迴圈程式，量測每秒執行的指令數，
+並與每個指令都重新解碼（不使用預先解碼的快取）的執行方式比較
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.simulator
+    python -m benchmarks.simulator --loops 200 --size 2000 --repeat 5
+"""
+import argparse
+import gc
+import io
+import time
+from typing import Callable, Tuple
+
+from src.assembler import MyAssembler
+from src.models.dataTypes import AssemblerOptions
+from src.simulator import HALT_ADDRESS, Device, Simulator
+
+SOURCE = """\
+BENCH\tSTART\t0
+FIRST\tSTL\tRETADR
+\tLDB\t#SRC
+\tBASE\tSRC
+\tCLEAR\tS
+OUTER\tCLEAR\tX
+\tLDT\t#{size}
+INNER\tLDCH\tSRC,X
+\tSTCH\tDST,X
+\tLDA\tSUM
+\tADD\t#1
+\tSTA\tSUM
+\tTIXR\tT
+\tJLT\tINNER
+\tLDA\t#1
+\tADDR\tA,S
+\tLDA\tLOOPS
+\tCOMPR\tS,A
+\tJLT\tOUTER
+\tLDA\tSUM
+\tWD\tOUTDEV
+\tJ\t@RETADR
+SUM\tWORD\t0
+LOOPS\tWORD\t{loops}
+OUTDEV\tBYTE\tX'05'
+RETADR\tRESW\t1
+SRC\tRESB\t{size}
+DST\tRESB\t{size}
+\tEND\tFIRST
+"""
+
+
+def run_predecoded(simulator: Simulator) -> int:
+    return simulator.run().steps
+
+
+def run_decoding(simulator: Simulator) -> int:
+    """每個指令都重新解碼的執行迴圈（比較用）"""
+    decode = simulator._decode
+    steps = 0
+    while simulator.pc != HALT_ADDRESS:
+        entry = decode(simulator.pc)
+        simulator.pc = entry[1]
+        entry[0](entry)
+        steps += 1
+    return steps
+
+
+def best_of(repeat: int, make: Callable[[], Simulator], run: Callable[[Simulator], int]) -> Tuple[float, int]:
+    best, steps = float("inf"), 0
+    for _ in range(repeat):
+        simulator = make()
+        gc.collect()
+        start = time.perf_counter()
+        steps = run(simulator)
+        best = min(best, time.perf_counter() - start)
+    return best, steps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the SIC/XE simulator")
+    parser.add_argument("--loops", type=int, default=100, help="Outer loop iterations (default: 100)")
+    parser.add_argument("--size", type=int, default=1000, help="Bytes copied per iteration, at most 2047 (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions, the best time is kept (default: 3)")
+    args = parser.parse_args()
+    if not 1 <= args.size <= 2047:
+        parser.error("--size must be between 1 and 2047 (LDT #size and base-relative DST)")
+
+    assembler = MyAssembler(io.StringIO(SOURCE.format(loops=args.loops, size=args.size)), "", AssemblerOptions(bonus=True))
+    assembler.preprocess_and_assemble()
+    image = assembler.link()
+
+    def make() -> Simulator:
+        return Simulator(image, {5: Device()})
+
+    results = {}
+    for name, run in (("predecoded", run_predecoded), ("decode every step", run_decoding)):
+        seconds, steps = best_of(args.repeat, make, run)
+        results[name] = seconds
+        print(f"{name:<20}{steps:>12,} instructions {seconds:8.3f} s  {steps / seconds / 1e6:6.2f} M instructions/s")
+    print(f"speedup: {results['decode every step'] / results['predecoded']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+啟動時間 benchmark
+短小的原始檔從啟動到寫出 object program 的時間主要是直譯器啟動與 import，
+這裡量測空的直譯器、`import main`、完整組譯一個範例檔的時間，並以 `-X importtime` 列出 import 最久的模組
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.startup
+    python -m benchmarks.startup --repeat 20 --top 25 --input code1.asm
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+
+def best_of(command: List[str], repeat: int) -> float:
+    """執行 command repeat 次，回傳最短的時間（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def import_times(module: str, repeat: int) -> Tuple[int, Dict[str, Tuple[int, int]]]:
+    """
+    以 `-X importtime` import module，回傳 module 的累計時間（µs）與每個模組的 (self, cumulative)（取 repeat 次中最短的）
+    """
+    best: Dict[str, Tuple[int, int]] = {}
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                check=True, capture_output=True, text=True)
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            own, cumulative, name = line[len("import time:"):].split("|")
+            name = name.strip()
+            entry = (int(own), int(cumulative))
+            if name not in best or entry[1] < best[name][1]:
+                best[name] = entry
+    return best[module][1], best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark interpreter start-up and import cost")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per measurement, the best time is kept (default: 10)")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list (default: 15)")
+    parser.add_argument("--input", type=str, default="code1.asm", help="Source in the input folder to assemble (default: code1.asm)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="sicxe-startup-") as directory:
+        output = os.path.join(directory, "out.txt")
+        interpreter = best_of([sys.executable, "-c", "pass"], args.repeat)
+        imports = best_of([sys.executable, "-c", "import main"], args.repeat)
+        assemble = best_of([sys.executable, "main.py", "-i", args.input, "-o", output, "-b"], args.repeat)
+        analyze = best_of([sys.executable, "main.py", "-i", args.input, "-o", output, "-b", "--analyze"], args.repeat)
+
+    print(f"{'python -c pass':<32}{interpreter * 1000:9.1f} ms")
+    print(f"{'import main':<32}{imports * 1000:9.1f} ms  (+{(imports - interpreter) * 1000:.1f} ms)")
+    print(f"{f'main.py -i {args.input} -b':<32}{assemble * 1000:9.1f} ms  (+{(assemble - interpreter) * 1000:.1f} ms)")
+    print(f"{'  ... --analyze':<32}{analyze * 1000:9.1f} ms  (+{(analyze - interpreter) * 1000:.1f} ms)")
+
+    total, modules = import_times("main", args.repeat)
+    print(f"\n-X importtime: import main {total / 1000:.1f} ms cumulative")
+    print(f"{'module':<40}{'self':>10}{'cumulative':>12}")
+    slowest = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (own, cumulative) in slowest[1:args.top + 1]:
+        print(f"{name:<40}{own / 1000:8.1f}ms{cumulative / 1000:10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
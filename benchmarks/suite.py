@@ -0,0 +1,175 @@
+"""
+合成程式的 benchmark suite
+以 benchmarks.synthetic 產生不同特性的程式，每個情境在兩種（或更多）大小下執行完整的 MyAssembler 流程，
+並以 Profiler 取得每個階段的時間；成長指數（時間隨行數的 log-log 斜率）明顯大於 1 的階段會被標示，
+用來在進入 production 前找出 Section 中的平方時間路徑
+
+結果可存成 JSON（--save），之後以 --compare 與先前的結果比較，超過門檻的階段視為 regression（exit code 1）
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.suite
+    python -m benchmarks.suite --lines 50000 --scenario literals --scenario csects
+    python -m benchmarks.suite --save /tmp/baseline.json
+    python -m benchmarks.suite --compare /tmp/baseline.json --threshold 1.25
+"""
+import argparse
+import gc
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import tempfile
+from dataclasses import asdict, replace
+from typing import Any, Dict, List
+
+from benchmarks.synthetic import ProgramSpec, iter_lines
+from src.assembler import MyAssembler
+from src.log import configure_logging
+from src.models.dataTypes import AssemblerOptions
+from src.profiling import Profiler
+
+RESULTS_SCHEMA_VERSION = 1
+
+#! 情境：只改變一個參數（mixed 為全部一起），行數由 --lines 決定
+SCENARIOS: Dict[str, ProgramSpec] = {
+    "plain": ProgramSpec(),
+    "csects": ProgramSpec(csects=16, extref_density=0.1),
+    "use_blocks": ProgramSpec(use_blocks=8),
+    "literals": ProgramSpec(literal_density=0.3),
+    "equ_depth": ProgramSpec(equ_depth=16),
+    "extrefs": ProgramSpec(csects=4, extref_density=0.5),
+    "mixed": ProgramSpec(csects=8, use_blocks=4, literal_density=0.2, equ_depth=8, extref_density=0.1),
+}
+
+#! 成長指數超過此值的階段標示為 superlinear（線性為 1，平方為 2），太短的階段（< --min-seconds）不標示
+SUPERLINEAR_EXPONENT = 1.4
+
+
+#! 合成程式使用 CSECT/USE/literal，需要 bonus 模式
+OPTIONS = AssemblerOptions(bonus=True)
+
+
+def run_once(source: str, output: str) -> Profiler:
+    gc.collect() #! 前一次執行留下的物件不計入這次的 GC 時間
+    profiler = Profiler(trace_memory=False) #! tracemalloc 會讓時間失真，這裡只量測時間
+    assembler = MyAssembler(source, output, OPTIONS, profiler=profiler)
+    with profiler:
+        assembler.assemble_file()
+    return profiler
+
+
+def measure(spec: ProgramSpec, repeat: int, directory: str) -> Dict[str, Any]:
+    """產生程式並組譯 repeat 次，回傳總時間最短的一次的結果"""
+    source = os.path.join(directory, "synthetic.asm")
+    with open(source, "w") as f:
+        f.writelines(iter_lines(spec))
+    best = None
+    for _ in range(repeat):
+        profiler = run_once(source, os.path.join(directory, "synthetic.obj"))
+        if best is None or profiler.total_seconds < best.total_seconds:
+            best = profiler
+    with open(source) as f:
+        lines = sum(1 for _ in f)
+    return {
+        "lines": lines,
+        "total_seconds": best.total_seconds,
+        "phases": {name: record.seconds for name, record in best.phase_totals().items()},
+    }
+
+
+def growth(runs: List[Dict[str, Any]], phase: str) -> float:
+    """最小與最大輸入之間的 log-log 斜率（phase 為 None 時使用總時間）"""
+    first, last = runs[0], runs[-1]
+    def seconds(run: Dict[str, Any]) -> float:
+        return run["total_seconds"] if phase is None else run["phases"].get(phase, 0.0)
+    if seconds(first) <= 0 or seconds(last) <= 0 or last["lines"] == first["lines"]:
+        return float("nan")
+    return math.log(seconds(last) / seconds(first)) / math.log(last["lines"] / first["lines"])
+
+
+def report(name: str, result: Dict[str, Any], min_seconds: float) -> None:
+    runs = result["runs"]
+    print(f"\n== {name} {result['spec']}")
+    header = "".join(f"{run['lines']:>12,}" for run in runs)
+    print(f"{'phase':<22}{header}{'growth':>9}")
+    phases = list(runs[-1]["phases"]) + [None]
+    for phase in phases:
+        times = "".join(f"{(run['total_seconds'] if phase is None else run['phases'].get(phase, 0.0)) * 1000:>10.1f}ms" for run in runs)
+        exponent = growth(runs, phase)
+        largest = runs[-1]["total_seconds"] if phase is None else runs[-1]["phases"].get(phase, 0.0)
+        flag = "  <- superlinear" if exponent > SUPERLINEAR_EXPONENT and largest >= min_seconds else ""
+        print(f"{phase or 'total':<22}{times}{exponent:>9.2f}{flag}")
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_seconds: float) -> int:
+    """與先前的結果比較（相同情境與行數），回傳 regression 的數量"""
+    if baseline.get("schema_version") != RESULTS_SCHEMA_VERSION:
+        raise ValueError(f"Baseline schema version {baseline.get('schema_version')} is not {RESULTS_SCHEMA_VERSION}")
+    regressions = 0
+    print(f"\n== compare with baseline (threshold {threshold:.2f}x)")
+    for name, result in results["scenarios"].items():
+        previous = {run["lines"]: run for run in baseline["scenarios"].get(name, {}).get("runs", [])}
+        for run in result["runs"]:
+            old = previous.get(run["lines"])
+            if old is None:
+                continue
+            pairs = [("total", old["total_seconds"], run["total_seconds"])]
+            pairs += [(phase, old["phases"][phase], seconds) for phase, seconds in run["phases"].items() if phase in old["phases"]]
+            for phase, before, after in pairs:
+                if before < min_seconds: #! 太短的階段只有雜訊
+                    continue
+                ratio = after / before
+                if ratio > threshold:
+                    regressions += 1
+                    print(f"REGRESSION {name:<12}{run['lines']:>10,} lines  {phase:<22}"
+                          f"{before * 1000:9.1f}ms -> {after * 1000:9.1f}ms ({ratio:.2f}x)")
+    print(f"{regressions} regression(s)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the assembler on synthetic programs")
+    parser.add_argument("--lines", type=int, default=20000, help="Smallest program size in lines (default: 20000)")
+    parser.add_argument("--factors", type=int, nargs="+", default=[1, 2], help="Sizes as multiples of --lines (default: 1 2)")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per size, the best time is kept (default: 3)")
+    parser.add_argument("--save", type=str, metavar="FILE", help="Write the results as JSON to FILE")
+    parser.add_argument("--compare", type=str, metavar="FILE", help="Compare with results saved by --save, exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio counted as a regression (default: 1.25)")
+    parser.add_argument("--min-seconds", type=float, default=0.005, help="Ignore phases shorter than this in growth flags and comparisons (default: 0.005)")
+    args = parser.parse_args()
+
+    configure_logging(logging.ERROR) #! 合成程式的 CSECT 沒有 END，不輸出對應的 warning
+
+    results: Dict[str, Any] = {
+        "schema_version": RESULTS_SCHEMA_VERSION,
+        "python": platform.python_version(),
+        "scenarios": {},
+    }
+    directory = tempfile.mkdtemp(prefix="sicxe-suite-")
+    try:
+        for name in args.scenario or SCENARIOS:
+            spec = SCENARIOS[name]
+            runs = [measure(replace(spec, lines=args.lines * factor), args.repeat, directory) for factor in args.factors]
+            results["scenarios"][name] = {"spec": {key: value for key, value in asdict(spec).items() if key != "lines"}, "runs": runs}
+            report(name, results["scenarios"][name], args.min_seconds)
+    finally:
+        for entry in os.listdir(directory):
+            os.remove(os.path.join(directory, entry))
+        os.rmdir(directory)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold, args.min_seconds):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+合成 SIC/XE 程式產生器（bonus 模式的語法）
+可調整的參數：行數、CSECT 數量、USE program block 數量、literal 密度、EQU forward reference 深度、EXTREF 密度
+
+程式由許多小區塊組成，每個區塊的程式碼只參照同一區塊內的資料與 literal（每個區塊結束時 LTORG），
+所以任何大小的程式都能以 PC-relative 組譯；USE block 內的資料與外部符號以 Format 4 參照
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.synthetic --lines 100000 --csects 8 --use-blocks 4 --literals 0.2 > /tmp/big.asm
+"""
+import argparse
+import random
+import sys
+from dataclasses import asdict, dataclass
+from typing import Iterator, List
+
+#! 每個區塊的程式碼行數（區塊內的位址差距遠小於 PC-relative 的範圍）
+CHUNK_LINES = 24
+#! 每個區塊的資料 word 數
+CHUNK_WORDS = 6
+#! 每個 section EXTDEF 的符號數量上限
+ENTRY_POINTS = 4
+
+_LOCAL_OPS = ("LDA", "STA", "ADD", "SUB", "COMP", "LDX", "STX", "LDCH", "STCH")
+
+
+@dataclass
+class ProgramSpec:
+    """
+    合成程式的參數
+    lines: 大約的總行數（不含 START/CSECT/END）
+    csects: control section 數量
+    use_blocks: 每個 section 的 USE program block 數量（0 表示資料放在預設 block）
+    literal_density: 使用 literal（=X'...'）的指令比例
+    equ_depth: 每個區塊的 EQU forward reference 鏈長度（0 表示沒有 EQU）
+    extref_density: 參照其他 section（EXTREF）的指令比例，csects > 1 時才有作用
+    seed: 亂數種子（相同參數與種子產生相同程式）
+    """
+    lines: int = 10000
+    csects: int = 1
+    use_blocks: int = 0
+    literal_density: float = 0.0
+    equ_depth: int = 0
+    extref_density: float = 0.0
+    seed: int = 0
+
+
+def generate(spec: ProgramSpec) -> str:
+    return "".join(iter_lines(spec))
+
+
+def iter_lines(spec: ProgramSpec) -> Iterator[str]:
+    """逐行產生原始碼（每行含換行字元）"""
+    rng = random.Random(spec.seed)
+    csects = max(1, spec.csects)
+    per_section = max(CHUNK_LINES, spec.lines // csects)
+    #! 每個區塊的行數：程式碼 + 資料 + EQU 鏈 + USE 切換 + LTORG
+    chunk_size = CHUNK_LINES + CHUNK_WORDS + spec.equ_depth + (2 if spec.use_blocks else 0) + (1 if spec.literal_density else 0)
+    chunks = max(1, per_section // chunk_size)
+    entries = [[f"E{section}_{entry}" for entry in range(min(ENTRY_POINTS, chunks))] for section in range(csects)]
+
+    for section in range(csects):
+        name = f"SEC{section}"
+        yield f"{name}\tSTART\t0\n" if section == 0 else f"{name}\tCSECT\n"
+        externals: List[str] = []
+        if csects > 1:
+            yield f"\tEXTDEF\t{','.join(entries[section])}\n"
+            #! 參照前後兩個 section 的進入點
+            neighbours = sorted({(section + 1) % csects, (section - 1) % csects} - {section})
+            externals = [entry for neighbour in neighbours for entry in entries[neighbour]]
+            yield f"\tEXTREF\t{','.join(externals)}\n"
+        for chunk in range(chunks):
+            yield from _chunk_lines(rng, spec, section, chunk, entries[section], externals)
+    yield "\tEND\tSEC0\n"
+
+
+def _chunk_lines(rng: random.Random, spec: ProgramSpec, section: int, chunk: int,
+                 entries: List[str], externals: List[str]) -> Iterator[str]:
+    prefix = f"{section}_{chunk}"
+    data = [f"D{prefix}_{word}" for word in range(CHUNK_WORDS)]
+    loop = entries[chunk] if chunk < len(entries) else f"L{prefix}"
+    far = "+" if spec.use_blocks else "" #! 資料在 USE block 時距離不固定，以 Format 4 參照
+
+    #! EQU 鏈：Q_0 參照之後才定義的 Q_1，…，最後一個為常數
+    for depth in range(spec.equ_depth):
+        yield f"Q{prefix}_{depth}\tEQU\tQ{prefix}_{depth + 1}+1\n"
+    if spec.equ_depth:
+        yield f"Q{prefix}_{spec.equ_depth}\tEQU\t3\n"
+
+    for line in range(CHUNK_LINES):
+        label = loop if line == 0 else ""
+        kind = rng.random()
+        if line == 1 and spec.equ_depth:
+            yield f"{label}\tLDA\t#Q{prefix}_0\n"
+        elif kind < spec.literal_density:
+            yield f"{label}\tLDA\t=X'{rng.getrandbits(24):06X}'\n"
+        elif externals and kind < spec.literal_density + spec.extref_density:
+            yield f"{label}\t+{rng.choice(('JSUB', 'LDA', 'STA'))}\t{rng.choice(externals)}\n"
+        elif kind > 0.9:
+            yield f"{label}\t{rng.choice(('CLEAR', 'TIXR'))}\t{rng.choice('AXST')}\n"
+        elif line == CHUNK_LINES - 1:
+            yield f"{label}\tJLT\t{loop}\n"
+        else:
+            yield f"{label}\t{far}{rng.choice(_LOCAL_OPS)}\t{rng.choice(data)}\n"
+
+    if spec.use_blocks:
+        yield f"\tUSE\tB{chunk % spec.use_blocks}\n"
+    for word, name in enumerate(data):
+        yield f"{name}\tWORD\t{word}\n"
+    if spec.use_blocks:
+        yield "\tUSE\n"
+    if spec.literal_density:
+        yield "\tLTORG\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic SIC/XE program on stdout")
+    parser.add_argument("--lines", type=int, default=ProgramSpec.lines, help="Approximate number of lines")
+    parser.add_argument("--csects", type=int, default=ProgramSpec.csects, help="Number of control sections")
+    parser.add_argument("--use-blocks", type=int, default=ProgramSpec.use_blocks, help="USE program blocks per section")
+    parser.add_argument("--literals", type=float, default=ProgramSpec.literal_density, help="Fraction of instructions using a literal")
+    parser.add_argument("--equ-depth", type=int, default=ProgramSpec.equ_depth, help="Length of the EQU forward reference chains")
+    parser.add_argument("--extrefs", type=float, default=ProgramSpec.extref_density, help="Fraction of instructions referencing other sections")
+    parser.add_argument("--seed", type=int, default=ProgramSpec.seed, help="Random seed")
+    args = parser.parse_args()
+    spec = ProgramSpec(args.lines, args.csects, args.use_blocks, args.literals, args.equ_depth, args.extrefs, args.seed)
+    print(f". synthetic program {asdict(spec)}")
+    sys.stdout.writelines(iter_lines(spec))
+
+
+if __name__ == "__main__":
+    main()
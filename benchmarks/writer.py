@@ -0,0 +1,127 @@
+"""
+ObjectFileWriter 的 throughput benchmark
+比較舊的逐 record 字串串接與以 offset 切分 Text record 的做法，以及 binary 格式（bytearray/memoryview）
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.writer
+    python -m benchmarks.writer --lines 1000000
+"""
+import argparse
+import io
+import random
+import time
+from typing import Callable
+
+from config import opcode_table
+from src.corefunc.section import Section
+from src.io.writer import ObjectFileWriter
+from src.models.dataTypes import Instruction, Location, ModificationRecord, Symbol
+
+
+class LegacyWriter(ObjectFileWriter):
+    """改寫前的 Text record 寫法：逐一串接字串，每個 record 各自 write"""
+    def _write_text_records(self, section, output_file):
+        cur_start = None
+        cur_text = ""
+        for instruction in section.instructions:
+            if (instruction.mnemonic in ["RESW", "RESB", "USE"]):
+                if cur_text != "":
+                    self._write_single_text_record(output_file, cur_start, cur_text)
+                    cur_text = ""
+                continue
+            if not instruction.objectCode:
+                continue
+            if cur_text == "":
+                cur_start = instruction.location.address
+            if len(cur_text) + len(instruction.objectCode) > 60:
+                self._write_single_text_record(output_file, cur_start, cur_text)
+                cur_text = ""
+                cur_start = instruction.location.address
+            cur_text += instruction.objectCode
+        if cur_text != "":
+            self._write_single_text_record(output_file, cur_start, cur_text)
+
+    def write_section(self, section, output_file):
+        self._write_section_header(section, output_file)
+        self._write_extdef(section, output_file)
+        self._write_extref(section, output_file)
+        self._write_text_records(section, output_file)
+        self._write_modification_records(section, output_file)
+        self._write_section_end(section, output_file)
+
+
+def build_section(line_count: int, seed: int = 0) -> Section:
+    """建立已組譯完成（有 location 與 object code）的大型 section"""
+    rng = random.Random(seed)
+    section = Section("BENCH", opcode_table)
+    section.add_instruction(Instruction(0, 0, "BENCH", "START", "0", "", Location(0)))
+    address = 0
+    for index in range(1, line_count + 1):
+        kind = rng.random()
+        if kind < 0.6:
+            size, mnemonic = 3, "LDA"
+        elif kind < 0.8:
+            size, mnemonic = 4, "+JSUB"
+        elif kind < 0.95:
+            size, mnemonic = 2, "CLEAR"
+        else:
+            section.add_instruction(Instruction(index, 0, "", "RESW", "1", "", Location(address)))
+            address += 3
+            continue
+        code = f"{rng.getrandbits(size * 8):0{size * 2}X}"
+        section.add_instruction(Instruction(index, size, "", mnemonic, "X", code, Location(address)))
+        if size == 4:
+            section.modification_records.add(ModificationRecord(address + 1, 5, "", ""))
+        address += size
+    section.add_instruction(Instruction(line_count + 1, 0, "", "END", "BENCH", "", Location(address)))
+    section.symbol_table["BENCH"] = Symbol("BENCH", 0)
+    return section
+
+
+def measure(label: str, func: Callable[[], int], repeat: int) -> float:
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<22} {best * 1000:9.2f} ms  {size / best / 1e6:8.1f} MB/s  ({size} bytes)")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ObjectFileWriter throughput")
+    parser.add_argument("--lines", type=int, default=200000, help="Number of instructions (default: 200000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions, the best time is reported (default: 3)")
+    args = parser.parse_args()
+
+    section = build_section(args.lines)
+    writer = ObjectFileWriter()
+
+    def write_with(target_writer: ObjectFileWriter) -> Callable[[], int]:
+        def run() -> int:
+            output = io.StringIO()
+            target_writer.write_section(section, output)
+            return len(output.getvalue())
+        return run
+
+    def write_binary() -> int:
+        output = io.BytesIO()
+        writer.write_section_binary(section, output)
+        return len(output.getvalue())
+
+    #! 新舊寫法的輸出必須一致
+    legacy_output, new_output = io.StringIO(), io.StringIO()
+    LegacyWriter().write_section(section, legacy_output)
+    writer.write_section(section, new_output)
+    assert legacy_output.getvalue() == new_output.getvalue()
+
+    print(f"{args.lines} instructions")
+    legacy = measure("text (string concat)", write_with(LegacyWriter()), args.repeat)
+    packed = measure("text (offset slices)", write_with(writer), args.repeat)
+    measure("binary", write_binary, args.repeat)
+    print(f"text speedup: {legacy / packed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
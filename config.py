@@ -1,25 +1,27 @@
 import os
+from types import MappingProxyType
+
+from src.models.dataTypes import OpcodeEntry
 
 #! variables
 input_folder = "input"
 output_folder = "output"
+daemon_endpoint = "127.0.0.1:8765" #! --serve 未指定位址時使用（只接受本機連線）
 
-bonus = False
-
-# 定義全域的暫存器表
-REGISTER_TABLE = {
-    "A": "0",
-    "X": "1",
-    "L": "2",
-    "B": "3",
-    "S": "4",
-    "T": "5",
-    "F": "6",
-    "PC": "8",
-    "SW": "9"
-}
+# 定義全域的暫存器表（暫存器編號，唯讀）
+REGISTER_TABLE = MappingProxyType({
+    "A": 0,
+    "X": 1,
+    "L": 2,
+    "B": 3,
+    "S": 4,
+    "T": 5,
+    "F": 6,
+    "PC": 8,
+    "SW": 9,
+})
 
-directive_table = [
+directive_table = frozenset((
     "START",
     "END",
     "WORD",
@@ -32,251 +34,69 @@ directive_table = [
     "EXTREF",
     "CSECT",
     "LTORG",
-    "EQU"
-]
-
-opcode_table = {
-    "ADD": {
-        "obj": "18",
-        "format": 3
-    },
-    "ADDF": {
-        "obj": "58",
-        "format": 3
-    },
-    "ADDR": {
-        "obj": "90",
-        "format": 2
-    },
-    "AND": {
-        "obj": "40",
-        "format": 3
-    },
-    "CLEAR": {
-        "obj": "B4",
-        "format": 2
-    },
-    "COMP": {
-        "obj": "28",
-        "format": 3
-    },
-    "COMPF": {
-        "obj": "88",
-        "format": 3
-    },
-    "COMPR": {
-        "obj": "A0",
-        "format": 2
-    },
-    "DIV": {
-        "obj": "24",
-        "format": 3
-    },
-    "DIVF": {
-        "obj": "64",
-        "format": 3
-    },
-    "DIVR": {
-        "obj": "9C",
-        "format": 2
-    },
-    "FIX": {
-        "obj": "C4",
-        "format": 1
-    },
-    "FLOAT": {
-        "obj": "C0",
-        "format": 1
-    },
-    "HIO": {
-        "obj": "F4",
-        "format": 1
-    },
-    "J": {
-        "obj": "3C",
-        "format": 3
-    },
-    "JEQ": {
-        "obj": "30",
-        "format": 3
-    },
-    "JGT": {
-        "obj": "34",
-        "format": 3
-    },
-    "JLT": {
-        "obj": "38",
-        "format": 3
-    },
-    "JSUB": {
-        "obj": "48",
-        "format": 3
-    },
-    "LDA": {
-        "obj": "00",
-        "format": 3
-    },
-    "LDB": {
-        "obj": "68",
-        "format": 3
-    },
-    "LDCH": {
-        "obj": "50",
-        "format": 3
-    },
-    "LDF": {
-        "obj": "70",
-        "format": 3
-    },
-    "LDL": {
-        "obj": "08",
-        "format": 3
-    },
-    "LDS": {
-        "obj": "6C",
-        "format": 3
-    },
-    "LDT": {
-        "obj": "74",
-        "format": 3
-    },
-    "LDX": {
-        "obj": "04",
-        "format": 3
-    },
-    "LPS": {
-        "obj": "D0",
-        "format": 3
-    },
-    "MUL": {
-        "obj": "20",
-        "format": 3
-    },
-    "MULF": {
-        "obj": "60",
-        "format": 3
-    },
-    "MULR": {
-        "obj": "98",
-        "format": 2
-    },
-    "NORM": {
-        "obj": "C8",
-        "format": 1
-    },
-    "OR": {
-        "obj": "44",
-        "format": 3
-    },
-    "RD": {
-        "obj": "D8",
-        "format": 3
-    },
-    "RMO": {
-        "obj": "AC",
-        "format": 2
-    },
-    "RSUB": {
-        "obj": "4C",
-        "format": 3
-    },
-    "SHIFTL": {
-        "obj": "A4",
-        "format": 2
-    },
-    "SHIFTR": {
-        "obj": "A8",
-        "format": 2
-    },
-    "SIO": {
-        "obj": "F0",
-        "format": 1
-    },
-    "SSK": {
-        "obj": "EC",
-        "format": 3
-    },
-    "STA": {
-        "obj": "0C",
-        "format": 3
-    },
-    "STB": {
-        "obj": "78",
-        "format": 3
-    },
-    "STCH": {
-        "obj": "54",
-        "format": 3
-    },
-    "STF": {
-        "obj": "80",
-        "format": 3
-    },
-    "STI": {
-        "obj": "D4",
-        "format": 3
-    },
-    "STL": {
-        "obj": "14",
-        "format": 3
-    },
-    "STS": {
-        "obj": "7C",
-        "format": 3
-    },
-    "STSW": {
-        "obj": "E8",
-        "format": 3
-    },
-    "STT": {
-        "obj": "84",
-        "format": 3
-    },
-    "STX": {
-        "obj": "10",
-        "format": 3
-    },
-    "SUB": {
-        "obj": "1C",
-        "format": 3
-    },
-    "SUBF": {
-        "obj": "5C",
-        "format": 3
-    },
-    "SUBR": {
-        "obj": "94",
-        "format": 2
-    },
-    "SVC": {
-        "obj": "B0",
-        "format": 2
-    },
-    "TD": {
-        "obj": "E0",
-        "format": 3
-    },
-    "TIO": {
-        "obj": "F8",
-        "format": 1
-    },
-    "TIX": {
-        "obj": "2C",
-        "format": 3
-    },
-    "TIXR": {
-        "obj": "B8",
-        "format": 2
-    },
-    "WD": {
-        "obj": "DC",
-        "format": 3
-    }
-}
-
-
+    "EQU",
+    "ORG",
+))
 
-def set_bonus(value):
-    global bonus
-    bonus = value
-    print(f"bonus: {bonus}")
+#! opcode 表在 import 時就是整數與唯讀結構，組譯時不需要再解析十六進位字串
+opcode_table = MappingProxyType({
+    "ADD": OpcodeEntry(0x18, 3),
+    "ADDF": OpcodeEntry(0x58, 3),
+    "ADDR": OpcodeEntry(0x90, 2),
+    "AND": OpcodeEntry(0x40, 3),
+    "CLEAR": OpcodeEntry(0xB4, 2),
+    "COMP": OpcodeEntry(0x28, 3),
+    "COMPF": OpcodeEntry(0x88, 3),
+    "COMPR": OpcodeEntry(0xA0, 2),
+    "DIV": OpcodeEntry(0x24, 3),
+    "DIVF": OpcodeEntry(0x64, 3),
+    "DIVR": OpcodeEntry(0x9C, 2),
+    "FIX": OpcodeEntry(0xC4, 1),
+    "FLOAT": OpcodeEntry(0xC0, 1),
+    "HIO": OpcodeEntry(0xF4, 1),
+    "J": OpcodeEntry(0x3C, 3),
+    "JEQ": OpcodeEntry(0x30, 3),
+    "JGT": OpcodeEntry(0x34, 3),
+    "JLT": OpcodeEntry(0x38, 3),
+    "JSUB": OpcodeEntry(0x48, 3),
+    "LDA": OpcodeEntry(0x00, 3),
+    "LDB": OpcodeEntry(0x68, 3),
+    "LDCH": OpcodeEntry(0x50, 3),
+    "LDF": OpcodeEntry(0x70, 3),
+    "LDL": OpcodeEntry(0x08, 3),
+    "LDS": OpcodeEntry(0x6C, 3),
+    "LDT": OpcodeEntry(0x74, 3),
+    "LDX": OpcodeEntry(0x04, 3),
+    "LPS": OpcodeEntry(0xD0, 3),
+    "MUL": OpcodeEntry(0x20, 3),
+    "MULF": OpcodeEntry(0x60, 3),
+    "MULR": OpcodeEntry(0x98, 2),
+    "NORM": OpcodeEntry(0xC8, 1),
+    "OR": OpcodeEntry(0x44, 3),
+    "RD": OpcodeEntry(0xD8, 3),
+    "RMO": OpcodeEntry(0xAC, 2),
+    "RSUB": OpcodeEntry(0x4C, 3),
+    "SHIFTL": OpcodeEntry(0xA4, 2),
+    "SHIFTR": OpcodeEntry(0xA8, 2),
+    "SIO": OpcodeEntry(0xF0, 1),
+    "SSK": OpcodeEntry(0xEC, 3),
+    "STA": OpcodeEntry(0x0C, 3),
+    "STB": OpcodeEntry(0x78, 3),
+    "STCH": OpcodeEntry(0x54, 3),
+    "STF": OpcodeEntry(0x80, 3),
+    "STI": OpcodeEntry(0xD4, 3),
+    "STL": OpcodeEntry(0x14, 3),
+    "STS": OpcodeEntry(0x7C, 3),
+    "STSW": OpcodeEntry(0xE8, 3),
+    "STT": OpcodeEntry(0x84, 3),
+    "STX": OpcodeEntry(0x10, 3),
+    "SUB": OpcodeEntry(0x1C, 3),
+    "SUBF": OpcodeEntry(0x5C, 3),
+    "SUBR": OpcodeEntry(0x94, 2),
+    "SVC": OpcodeEntry(0xB0, 2),
+    "TD": OpcodeEntry(0xE0, 3),
+    "TIO": OpcodeEntry(0xF8, 1),
+    "TIX": OpcodeEntry(0x2C, 3),
+    "TIXR": OpcodeEntry(0xB8, 2),
+    "WD": OpcodeEntry(0xDC, 3),
+})
@@ -1,9 +1,57 @@
 import os
+import sys
+import time
 import argparse
+import contextlib
+import signal
 
-import config
-from config import output_folder, input_folder
+from config import daemon_endpoint, output_folder, input_folder
 from src.assembler import MyAssembler
+from src.models.dataTypes import AssemblerOptions
+from src.batch import assemble_batch, expand_sources, print_summary
+from src.io.cache import BuildCache, DEFAULT_CACHE_SIZE
+from src.io.report import open_report
+from src.io.writer import OBJECT_FORMATS
+from src.log import configure_logging, get_logger, level_for
+from src.profiling import Profiler
+
+logger = get_logger("main")
+
+def _stop_daemon(signum, frame):
+    raise KeyboardInterrupt
+
+def _hex_address(value):
+    try:
+        return int(value, 16)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid hexadecimal address: '{value}'")
+
+def _device_file(value):
+    """ID=FILE，ID 為十六進位的裝置編號"""
+    number, separator, path = value.partition("=")
+    try:
+        device = int(number, 16)
+    except ValueError:
+        device = -1
+    if not separator or not path or not 0 <= device <= 0xFF:
+        raise argparse.ArgumentTypeError(f"invalid device '{value}', expected ID=FILE with a hex device number 00-FF")
+    return device, path
+
+def _simulate(image, args):
+    """--run：執行載入的記憶體映像，印出每秒執行的指令數與各裝置的輸出"""
+    from src.simulator import Device, Simulator #! 只在執行時才 import
+    with contextlib.ExitStack() as stack:
+        devices = {number: Device.from_file(path) for number, path in args.device or ()}
+        for number, path in args.device_out or ():
+            device = devices.setdefault(number, Device())
+            device.output = stack.enter_context(open(path, "wb"))
+        simulator = Simulator(image, devices)
+        result = simulator.run(args.max_steps)
+    print(f"Executed {result.steps} instructions in {result.seconds:.3f} s "
+          f"({result.instructions_per_second:,.0f} instructions/s), stopped ({result.reason}) at {result.pc:06X}")
+    for number, device in sorted(simulator.devices.items()):
+        if device.written:
+            print(f"Device {number:02X} output ({len(device.written)} bytes): {device.written.decode('ascii', 'replace')}")
 
 def main():
     #! Initial value of variables
@@ -13,7 +61,7 @@ def main():
     # Parser setting
     parser = argparse.ArgumentParser(formatter_class=argparse.RawTextHelpFormatter)
     parser.add_argument("-i", "--input", type=str, 
-                       help="Input file name in the input folder (Required)\n\n"
+                       help="Input file name in the input folder, or '-' to read from stdin (Required)\n\n"
                             "Example: python main.py -i source.asm\n")
     parser.add_argument("-o", "--output", type=str, 
                        help="Output file name for the object program (Optional)\n\n"
@@ -22,15 +70,189 @@ def main():
     parser.add_argument("-b", "--bonus", action="store_true", 
                        help="Enable bonus features (Optional)\n\n"
                             "Default: False\n")
+    parser.add_argument("-j", "--jobs", type=int, 
+                       help="Number of processes used to assemble control sections in parallel (Optional)\n"
+                            "In batch mode: number of files assembled in parallel\n\n"
+                            "Default: 1 (serial)\n",
+                       default=1)
+    parser.add_argument("--batch", type=str, nargs="+", metavar="SOURCE",
+                       help="Assemble many source files or glob patterns in one process (Optional)\n"
+                            "Each object program is written next to its source (or in --output-dir) as <name>.obj\n\n"
+                            "Example: python main.py --batch 'input/*.asm' input/fig2_5.txt -b -j 8\n")
+    parser.add_argument("--output-dir", type=str, metavar="DIR",
+                       help="In batch mode: write the object programs to DIR instead of next to each source (Optional)\n")
+    parser.add_argument("--compact", action="store_true",
+                       help="Keep assembled instructions in a compact columnar table to reduce memory (Optional)\n\n"
+                            "Default: False\n")
+    parser.add_argument("--cache-dir", type=str, metavar="DIR",
+                       help="Directory of the incremental build cache (Optional)\n"
+                            "Unchanged sections skip pass 1/pass 2 and reuse the cached results\n\n"
+                            "Default: no cache\n")
+    parser.add_argument("--cache-size", type=int, metavar="MB",
+                       help="Maximum size of the build cache in MB, least recently used entries are evicted (Optional)\n\n"
+                            f"Default: {DEFAULT_CACHE_SIZE // (1024 * 1024)}\n",
+                       default=DEFAULT_CACHE_SIZE // (1024 * 1024))
+    parser.add_argument("--format", type=str, choices=OBJECT_FORMATS, dest="object_format",
+                       help="Object program format (Optional)\n"
+                            "text: H/D/R/T/M/E records in hex, binary: the same records as raw bytes\n\n"
+                            "Default: text\n",
+                       default="text")
+    parser.add_argument("--mmap", action="store_true",
+                       help="Read the input file through mmap, for very large generated sources (Optional)\n\n"
+                            "Default: False\n")
+    parser.add_argument("--profile", action="store_true",
+                       help="Measure wall time, allocations (tracemalloc) and call counts per phase and per section,\n"
+                            "and print them as a table after assembly (Optional)\n\n"
+                            "Default: False\n")
+    parser.add_argument("--profile-json", type=str, metavar="FILE",
+                       help="Write the profile as JSON to FILE (implies --profile measurements, Optional)\n")
+    parser.add_argument("--profile-cprofile", type=str, metavar="FILE",
+                       help="Also run cProfile and dump the stats to FILE, hot functions are added to the report (Optional)\n")
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                       help="Log progress messages (Optional)\n"
+                            "-v: file and section progress, -vv: every pass 1/pass 2 step\n\n"
+                            "Default: quiet, only warnings and errors are printed\n")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                       help="Only print errors, warnings are suppressed as well (Optional)\n")
+    parser.add_argument("--analyze", action="store_true",
+                       help="Print the symbol, EXTREF/EXTDEF, literal, modification and instruction tables\n"
+                            "of every section after assembly (Optional)\n\n"
+                            "Default: False\n")
+    parser.add_argument("--serve", type=str, nargs="?", const=daemon_endpoint, metavar="ENDPOINT",
+                       help="Run as a long-lived daemon that accepts assemble requests over HTTP (Optional)\n"
+                            "ENDPOINT: HOST:PORT on localhost, or unix:PATH for a Unix domain socket\n"
+                            "-j sets the number of worker processes, -b/--format the defaults of each request\n\n"
+                            f"Default endpoint: {daemon_endpoint}\n")
+    parser.add_argument("--listing", type=str, metavar="FILE",
+                       help="Write an assembly listing (line, location, source fields, object code and symbol table)\n"
+                            "of every section to FILE (Optional)\n")
+    parser.add_argument("--xref", type=str, metavar="FILE",
+                       help="Write a symbol cross-reference listing (value, defining line and referencing lines\n"
+                            "of every symbol) of every section to FILE (Optional)\n")
+    parser.add_argument("--report", type=str, metavar="FILE",
+                       help="Stream the analyzer tables of every section to FILE (Optional)\n"
+                            ".jsonl: one JSON object per row, .csv: one CSV file per table (FILE.symtab.csv, ...)\n")
+    parser.add_argument("--link", type=str, nargs="+", metavar="OBJECT",
+                       help="Link and load object program files or glob patterns (text or binary) instead of assembling,\n"
+                            "and print the load map (ESTAB) (Optional)\n\n"
+                            "Example: python main.py --link output/main.txt output/lib.txt --load-address 4000 --image image.bin\n")
+    parser.add_argument("--image", type=str, metavar="FILE",
+                       help="Write the linked and loaded memory image as raw bytes to FILE (Optional)\n"
+                            "When assembling, the assembled sections are linked directly without the text records\n")
+    parser.add_argument("--load-address", type=_hex_address, metavar="ADDR",
+                       help="Load address (hex) of the first control section for --link/--image (Optional)\n\n"
+                            "Default: the start address in the first H record\n")
+    parser.add_argument("--disassemble", type=str, nargs="+", metavar="OBJECT",
+                       help="Disassemble object program files or glob patterns (text or binary) back into source\n"
+                            "that re-assembles to the same object program, and print it (Optional)\n\n"
+                            "Example: python main.py --disassemble output/code1.txt > code1_dis.asm\n")
+    parser.add_argument("--verify", type=str, nargs="+", metavar="SOURCE",
+                       help="Assemble, disassemble and re-assemble source files or glob patterns in one process,\n"
+                            "and report any difference between the two object programs (Optional)\n"
+                            "The exit code is 1 when a file fails to assemble or does not round-trip\n\n"
+                            "Example: python main.py --verify 'input/*' -b\n")
+    parser.add_argument("--run", action="store_true",
+                       help="Load the object program (or the --link objects) and execute it in the SIC/XE simulator,\n"
+                            "then print the instructions per second and the output of every device (Optional)\n"
+                            "The program stops when it returns to the initial L register (RSUB / J @RETADR) or jumps to itself\n\n"
+                            "Example: python main.py -i fig2_5.txt -b --run --device F1=input.txt --device-out 05=output.txt\n")
+    parser.add_argument("--device", type=_device_file, action="append", metavar="ID=FILE",
+                       help="Input of device ID (hex) for RD when running, read from FILE (Optional, repeatable)\n\n"
+                            "Default: an empty device, RD returns 0\n")
+    parser.add_argument("--device-out", type=_device_file, action="append", metavar="ID=FILE",
+                       help="Write the bytes sent to device ID (hex) by WD to FILE when running (Optional, repeatable)\n\n"
+                            "Default: the output is printed after execution\n")
+    parser.add_argument("--max-steps", type=int, metavar="N",
+                       help="Stop the simulator after N instructions (Optional)\n\n"
+                            "Default: no limit\n")
     
     try:
         args = parser.parse_args()
+        configure_logging(level_for(args.verbose, args.quiet))
+        
+        #! Check jobs
+        if args.jobs < 1:
+            parser.error("Number of jobs (-j/--jobs) must be at least 1")
+        
+        #! Daemon mode
+        if args.serve:
+            from src.server import AssemblerDaemon #! http/socket 模組只在 daemon 模式才 import
+            with AssemblerDaemon(args.serve, jobs=args.jobs, bonus=args.bonus, object_format=args.object_format) as daemon:
+                signal.signal(signal.SIGTERM, _stop_daemon) #! SIGTERM 與 Ctrl+C 一樣正常結束（關閉 worker、刪除 socket）
+                print(f"Assembler daemon listening on {daemon.address} with {args.jobs} worker(s)", flush=True)
+                try:
+                    daemon.serve_forever()
+                except KeyboardInterrupt:
+                    pass
+            return
+        
+        #! Link mode
+        if args.link:
+            from src.loader import LinkingLoader #! 只在連結時才 import
+            loader = LinkingLoader(args.load_address)
+            for path in expand_sources(args.link):
+                loader.add_file(path)
+            image = loader.link()
+            print(image.format_load_map())
+            if args.image:
+                with open(args.image, "wb") as f:
+                    f.write(image.memory)
+                print(f"Memory image ({len(image.memory)} bytes at {image.address:06X}) written to {args.image}")
+            if args.run:
+                _simulate(image, args)
+            return
+        
+        #! 這次組譯的設定（-b、--compact、--format、--mmap）
+        options = AssemblerOptions(bonus=args.bonus, compact=args.compact, object_format=args.object_format, use_mmap=args.mmap)
+        
+        #! Disassemble mode
+        if args.disassemble:
+            from src.disassembler import Disassembler #! 只在反組譯時才 import
+            from src.io.reader import ObjectFileReader
+            reader = ObjectFileReader()
+            for path in expand_sources(args.disassemble):
+                Disassembler().write(reader.read(path), sys.stdout)
+            return
+        
+        #! Verify mode
+        if args.verify:
+            from src.disassembler import verify_round_trip
+            sources = expand_sources(args.verify)
+            width = max(len(path) for path in sources)
+            start = time.perf_counter()
+            failed = 0
+            for path in sources:
+                file_start = time.perf_counter()
+                try:
+                    modules, differences = verify_round_trip(path, options)
+                    detail = f"{len(modules)} section(s)"
+                except Exception as e:
+                    differences, detail = [], f"assembly failed: {e}"
+                ok = not differences and not detail.startswith("assembly failed")
+                failed += not ok
+                print(f"{'OK' if ok else 'FAIL':<4} {path:<{width}} {(time.perf_counter() - file_start) * 1000:9.2f} ms  {detail}")
+                for difference in differences:
+                    print(f"     {difference}")
+            print(f"{len(sources)} file(s), {failed} failed, total {time.perf_counter() - start:.2f} s")
+            if failed:
+                sys.exit(1)
+            return
+        
+        #! Batch mode
+        if args.batch:
+            start = time.perf_counter()
+            results = assemble_batch(args.batch, options, jobs=args.jobs, cache_dir=args.cache_dir,
+                                     cache_size=args.cache_size * 1024 * 1024, output_dir=args.output_dir)
+            print_summary(results, time.perf_counter() - start)
+            if any(result.error is not None for result in results):
+                sys.exit(1)
+            return
         
         #! Check input file
         if not args.input or args.input.strip() == "":  # 檢查是否提供 -i 參數
            parser.error("Input file name (-i/--input) is required")
         #! Check file extension (optional)
-        if not args.input.endswith('.asm') and not args.input.endswith('.txt'):
+        if args.input != "-" and not args.input.endswith('.asm') and not args.input.endswith('.txt'):
             parser.error("Input file must have a .asm extension")
         
         #! Check output file
@@ -38,28 +260,50 @@ def main():
             parser.error("Output file name (-o/--output) is required")
         
         #! Combine input path
-        input_path = os.path.join(input_folder, args.input)
+        input_path = args.input if args.input == "-" else os.path.join(input_folder, args.input)
         output_path = os.path.join(output_folder, args.output)
         
         if not input_path:
             parser.error("Input file path (-i/--input) is required")
-        if not os.path.exists(input_path):
+        if input_path != "-" and not os.path.exists(input_path):
             parser.error(f"Input file '{args.input}' does not exist")
         
-        #! Check bonus flag
-        config.set_bonus(args.bonus)
-
         #? Print order information
-        print(f"Input file is at: {input_path}")
-        print(f"Output file is at: {output_folder}")
-        if config.bonus:
-            print("Bonus mode is on")
-        else:
-            print("Bonus mode is off")
+        logger.info("Input file is at: %s", input_path)
+        logger.info("Output file is at: %s", output_folder)
+        logger.info("Bonus mode is %s", "on" if options.bonus else "off")
             
         #! Start parsing
-        my_assembler = MyAssembler(input_path, output_path)
-        my_assembler.assemble_file()
+        cache = BuildCache(args.cache_dir, args.cache_size * 1024 * 1024) if args.cache_dir else None
+        profiler = None
+        if args.profile or args.profile_json or args.profile_cprofile:
+            profiler = Profiler(cprofile=args.profile_cprofile is not None)
+        with contextlib.ExitStack() as stack:
+            reports = [stack.enter_context(open_report(path, report_format))
+                       for path, report_format in ((args.listing, "listing"), (args.xref, "xref"), (args.report, None)) if path]
+            my_assembler = MyAssembler(input_path, output_path, options, jobs=args.jobs, cache=cache, profiler=profiler,
+                                       analyze=args.analyze, reports=reports, image_path=args.image, load_address=args.load_address)
+            with profiler or contextlib.nullcontext():
+                my_assembler.assemble_file()
+        
+        #! 執行組譯出的 object program
+        if args.run:
+            from src.loader import LinkingLoader
+            loader = LinkingLoader(args.load_address)
+            loader.add_file(output_path)
+            _simulate(loader.link(), args)
+        
+        #! Profile report
+        if profiler is not None:
+            if args.profile:
+                print(profiler.format_table())
+            if args.profile_json:
+                with open(args.profile_json, "w") as f:
+                    f.write(profiler.to_json())
+                print(f"Profile written to {args.profile_json}")
+            if args.profile_cprofile:
+                profiler.dump_cprofile(args.profile_cprofile)
+                print(f"cProfile stats written to {args.profile_cprofile}")
 
     except (argparse.ArgumentError, argparse.ArgumentTypeError) as e:
         parser.error(str(e))
@@ -1,13 +1,57 @@
-from typing import List
+import contextlib
+import io
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 from .corefunc.section import Section
 from .corefunc.analyzer import Analyzer
+from .models.dataTypes import AssemblerOptions
 
-from .io.preprocessor import Preprocessor
+from .io.preprocessor import Preprocessor, Source
 from .io.writer import ObjectFileWriter
+from .io.report import ReportWriter
+from .profiling import ANALYZE, CACHE_LOOKUP, PREPROCESS, WRITE, PhaseRecord, Profiler, profile_phase
+from .log import configure_logging, current_level, get_logger
 
 from config import output_folder
 
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ProcessPoolExecutor
+    from .io.cache import BuildCache
+    from .loader import LoadedImage
+
+logger = get_logger(__name__)
+
+
+def assemble_section(section_index: int, section: Section, profiler: Optional[Profiler] = None) -> None:
+    """對單一 section 執行 pass 1 與 pass 2（section.options.compact 時將結果轉為欄位式指令表）"""
+    logger.info("Processing section %d: %s", section_index, section.name)
+    
+    #! Pass 1
+    logger.debug("Pass 1")
+    section.pass1(profiler)
+    logger.debug("Pass 1 completed")
+    
+    #! Pass 2
+    logger.debug("Pass 2")
+    section.pass2(profiler)
+    logger.debug("Pass 2 completed")
+    
+    if section.options.compact:
+        section.compact()
+
+
+def _assemble_section_in_worker(section_index: int, section: Section, profile: bool = False) -> Tuple[Section, str, List[PhaseRecord]]:
+    """
+    worker process 的進入點：組譯 section，並回傳 section、其 log 訊息與量測結果
+    組譯設定隨 section.options 一起 pickle 到 worker，worker 的 logging 層級由 process pool 的 initializer（configure_logging）設定
+    profile 時在 worker 內另外建立 Profiler，結果回到主程序後再合併
+    """
+    profiler = Profiler() if profile else None
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer), (profiler or contextlib.nullcontext()):
+        assemble_section(section_index, section, profiler)
+    return section, buffer.getvalue(), list(profiler.records.values()) if profiler is not None else []
+
 
 class MyAssembler:
     """
@@ -15,11 +59,23 @@ class MyAssembler:
     負責協調整個組譯過程，包括：
     - 載入並管理指令處理器
     - 協調預處理、組譯和輸出過程
-    - 錯誤處理和日誌記錄
+    - 錯誤處理和日誌記錄（logging，層級由 src.log.configure_logging 設定）
     """
-    def __init__(self, input_path: str, output_path: str):
+    def __init__(self, input_path: Source, output_path: str, options: Optional[AssemblerOptions] = None, jobs: int = 1,
+                 cache: Optional["BuildCache"] = None, profiler: Optional[Profiler] = None, analyze: bool = False,
+                 reports: Sequence[ReportWriter] = (), image_path: Optional[str] = None, load_address: Optional[int] = None):
         self.sections: List[Section] = []
-        self.preprocessor = Preprocessor()
+        #! 這次組譯的設定（bonus、compact、object_format、use_mmap），不使用全域狀態，同一 process 內可同時進行多個組譯
+        self.options = options or AssemblerOptions()
+        self.jobs = jobs #! 平行組譯 section 的 process 數量（1 = serial）
+        self.cache = cache #! 增量建置快取（None 表示不使用）
+        self.profiler = profiler #! 量測各階段的時間與記憶體（None 表示不量測）
+        self.analyze = analyze #! 組譯後是否以 Analyzer 輸出每個 section 的表格（預設不輸出）
+        self.reports = reports #! 每個 section 組譯完成後串流寫入表格的 ReportWriter（JSON Lines/CSV/listing）
+        self.image_path = image_path #! 組譯後直接以 sections 連結載入，寫出記憶體映像（None 表示不寫）
+        self.load_address = load_address #! 記憶體映像的載入位址（None 表示使用第一個 section 的起始位址）
+        self.section_keys: List[str] = []
+        self.preprocessor = Preprocessor(self.options) #! 產生的 section 都帶有 self.options
         self.writer = ObjectFileWriter()
         #! File Path setting
         self.input_path = input_path
@@ -27,82 +83,246 @@ class MyAssembler:
 
     def preprocess(self) -> None:
         try:
-            print("-------------------------------------------------")
-            print(f"Starting preprocessing of {self.input_path}")
-            self.sections = self.preprocessor.process(self.input_path)
-            print(f"Preprocessing completed. Found {len(self.sections)} sections")
-            print("-------------------------------------------------\n")
+            logger.info("Starting preprocessing of %s", self.input_path)
+            with profile_phase(self.profiler, PREPROCESS):
+                self.sections = self.preprocessor.process(self.input_path)
+            logger.info("Preprocessing completed. Found %d sections", len(self.sections))
         except FileNotFoundError:
-            print(f"Input file {self.input_path} not found")
+            logger.error("Input file %s not found", self.input_path)
             raise
         except ValueError as e:
-            print(f"Invalid input format: {str(e)}")
+            logger.error("Invalid input format: %s", e)
             raise
 
     def assemble(self) -> None:
-        try:
-            print("---Starting assembly process---")
-            
-            for section_index, section in enumerate(self.sections, 1):
-                print(f"Processing section {section_index}: {section.name}")
-                
-                print("-------------------------------------------------")
-                #! Pass 1
-                print("Pass 1")
-                section.pass1()
-                print("Pass 1 completed")
-                print("-------------------------------------------------")
-                
-                #! Pass 2
-                print("Pass 2")
-                section.pass2()
-                print("Pass 2 completed")
-                print("-------------------------------------------------\n")
-                
-                #! 分析
-                analyzer = Analyzer(section)
-                analyzer.analyze("all") #! print on console
+        """組譯已經預處理完成的 sections"""
+        self._assemble(enumerate(self.sections))
+
+    def preprocess_and_assemble(self) -> None:
+        """
+        串流模式：Preprocessor 每完成一個 section 就立即送去組譯（jobs > 1 時交給 process pool），
+        讀檔與組譯重疊，不需要等整個檔案讀完
+        log 訊息仍依 preprocess → assemble 的順序輸出，與先 preprocess 再 assemble 完全相同
+        """
+        logger.info("Starting preprocessing of %s", self.input_path)
+
+        def preprocessing_completed() -> None:
+            logger.info("Preprocessing completed. Found %d sections", len(self.sections))
+
+        def preprocessing_failed(error: Exception) -> None:
+            if isinstance(error, FileNotFoundError):
+                logger.error("Input file %s not found", self.input_path)
+            elif isinstance(error, ValueError):
+                logger.error("Invalid input format: %s", error)
+
+        self._assemble(self._stream_sections(), preprocessing_completed, preprocessing_failed)
+
+    def _stream_sections(self) -> Iterator[Tuple[int, Section]]:
+        sections = self.preprocessor.iter_sections(self.input_path)
+        if self.profiler is not None:
+            sections = self.profiler.iterate(PREPROCESS, sections) #! 只計入讀檔與切分 section 的時間
+        yield from sections
+
+    def _assemble(self, arrivals: Iterable[Tuple[int, Section]], on_input_completed: Optional[Callable[[], None]] = None,
+                  on_input_failed: Optional[Callable[[Exception], None]] = None) -> None:
+        """
+        組譯依序到達的 (section 位置, Section)
+        1. 內容沒有改變的 section 從快取還原，不需要執行 pass1/pass2
+        2. jobs > 1 時，section 一到達就送進 process pool
+           各 section 之間只透過 EXTDEF/EXTREF 名稱相關，pass1/pass2 可獨立執行
+           worker 的 log 訊息先暫存，回到主程序後依 section 順序印出，與 serial 模式一致
+        3. jobs == 1 時，section 一到達就在主程序中組譯，讀檔與組譯同樣重疊；
+           log 訊息與錯誤同樣先暫存，輸入讀完後才依 section 順序輸出；
+           輸入中途失敗時，先依 section 順序印出已組譯 section 的 log，再交給 on_input_failed 回報輸入的錯誤
+        4. analyze 時才建立 Analyzer 並輸出表格，reports 則逐列寫入檔案
+        """
+        bonus = self.options.bonus
+        collected: Dict[int, Section] = {}
+        keys: Dict[int, str] = {}
+        restored: Dict[int, Section] = {}
+        futures: Dict[int, "Future[Tuple[Section, str, List[PhaseRecord]]]"] = {}
+        waiting: List[Tuple[int, Section]] = [] #! 只有一個 section 需要組譯時不建立 process pool
+        assembled: Dict[int, Tuple[str, Optional[Exception]]] = {} #! jobs == 1 時已組譯的 section 的 log 與錯誤
+        failed = False
+
+        with contextlib.ExitStack() as stack:
+            executor: Optional["ProcessPoolExecutor"] = None
+            try:
+                for index, section in arrivals:
+                    collected[index] = section
+                    if self.cache is not None:
+                        with profile_phase(self.profiler, CACHE_LOOKUP, section.name):
+                            keys[index] = self.cache.section_key(section, bonus, self.options.compact)
+                            cached = self.cache.load_section(keys[index], section, bonus)
+                        if cached is not None:
+                            restored[index] = cached
+                            continue
+                    if self.jobs > 1:
+                        waiting.append((index, section))
+                        if executor is None and len(waiting) > 1:
+                            from concurrent.futures import ProcessPoolExecutor #! multiprocessing 只在需要 worker 時才 import
+                            executor = stack.enter_context(ProcessPoolExecutor(max_workers=self.jobs, initializer=configure_logging,
+                                                                               initargs=(current_level(),)))
+                        if executor is not None:
+                            for waiting_index, waiting_section in waiting:
+                                futures[waiting_index] = executor.submit(_assemble_section_in_worker, waiting_index + 1, waiting_section,
+                                                                         self.profiler is not None)
+                            waiting = []
+                    elif not failed:
+                        buffer = io.StringIO()
+                        error: Optional[Exception] = None
+                        try:
+                            with contextlib.redirect_stdout(buffer):
+                                assemble_section(index + 1, section, self.profiler)
+                        except Exception as e:
+                            error, failed = e, True #! 之後的 section 不再組譯，錯誤在輪到這個 section 時才拋出
+                        assembled[index] = (buffer.getvalue(), error)
+            except Exception as e:
+                self._flush_assembled(assembled)
+                if on_input_failed is not None:
+                    on_input_failed(e)
+                raise
+
+            self.sections = [collected[index] for index in range(len(collected))]
+            self.section_keys = [keys[index] for index in range(len(keys))]
+            if on_input_completed is not None:
+                on_input_completed()
+
+            try:
+                logger.info("Starting assembly process")
                 
-            print("Assembly process completed successfully")
-        except Exception as e:
-            print(f"Assembly failed: {str(e)}")
-            raise
+                for index, section in enumerate(self.sections):
+                    if index in restored:
+                        section = restored[index]
+                        logger.info("Section %d: %s restored from cache", index + 1, section.name)
+                    else:
+                        if index in futures:
+                            section, log, records = futures[index].result()
+                            print(log, end="")
+                            for record in records:
+                                self.profiler.add(record)
+                        elif index in assembled:
+                            log, error = assembled[index]
+                            print(log, end="")
+                            if error is not None:
+                                raise error
+                        else:
+                            assemble_section(index + 1, section, self.profiler)
+                        if self.cache is not None:
+                            self.cache.store_section(self.section_keys[index], section)
+                    self.sections[index] = section
+                    
+                    #! 分析（opt-in，表格只在需要時才格式化）
+                    if self.analyze or self.reports:
+                        with profile_phase(self.profiler, ANALYZE, section.name):
+                            if self.analyze:
+                                analyzer = Analyzer(section)
+                                analyzer.analyze("all") #! print on console
+                            for report in self.reports:
+                                report.write_section(section)
+                    
+                logger.info("Assembly process completed successfully")
+            except Exception as e:
+                logger.error("Assembly failed: %s", e)
+                raise
+
+    @staticmethod
+    def _flush_assembled(assembled: Dict[int, Tuple[str, Optional[Exception]]]) -> None:
+        """
+        輸入中途失敗時，依 section 順序印出已組譯（jobs == 1）的 section 的 log，遇到組譯錯誤時回報並停止
+        第一個 section 要到 END 才完成，此時通常還沒組譯，所以不要求前面的 section 都已組譯
+        """
+        for index in sorted(assembled):
+            log, error = assembled[index]
+            print(log, end="")
+            if error is not None:
+                logger.error("Assembly failed: %s", error)
+                return
 
     def write_object_files(self) -> None:
         try:
-            print(f"Writing object files to {self.output_path}")
+            logger.info("Writing object files to %s", self.output_path)
+            
+            binary = self.options.object_format == "binary"
+            mode = "wb" if binary else "w"
+            
+            #! 所有 section 都沒有改變時，直接使用快取的 object program，不需要執行 writer
+            output_key = None
+            if self.cache is not None and len(self.section_keys) == len(self.sections):
+                output_key = self.cache.output_key([*self.section_keys, self.options.object_format])
+                cached_output = self.cache.load_output(output_key)
+                if cached_output is not None:
+                    with open(self.output_path, mode) as file:
+                        file.write(cached_output if binary else cached_output.decode())
+                    logger.info("Object program restored from cache")
+                    return
             
             # 打開一次目標檔案
-            with open(self.output_path, "w") as file:
+            with open(self.output_path, mode) as file:
+                target = (io.BytesIO() if binary else io.StringIO()) if output_key is not None else file
                 # 為每個區段寫入同一個目標檔案
-                print('\nWrite object file for section...')
-                for idx, section in enumerate(self.sections, 1):
-                    self.writer.write_section(section, file)
-                    file.write("\n")  # 添加區段間的分隔符（可選）
-                    print(f"Written section {idx} to {self.output_path}")
+                self._write_sections(target)
+                if output_key is not None:
+                    output = target.getvalue()
+                    file.write(output)
+                    self.cache.store_output(output_key, output if binary else output.encode())
                 
-            print("All object files written successfully")
-            print("-------------------------------------------------\n")
+            logger.info("All object files written successfully")
             
         except IOError as e:
-            print(f"Failed to write object files: {str(e)}")
+            logger.error("Failed to write object files: %s", e)
             raise
 
+    def _write_sections(self, target) -> None:
+        """依序將每個 section 的 object program 寫入 target（text 或 binary 依 object_format）"""
+        binary = self.options.object_format == "binary"
+        for idx, section in enumerate(self.sections, 1):
+            with profile_phase(self.profiler, WRITE, section.name):
+                if binary:
+                    self.writer.write_section_binary(section, target)
+                else:
+                    self.writer.write_section(section, target)
+                    target.write("\n")  # 添加區段間的分隔符（可選）
+            logger.debug("Written section %d", idx)
+
+    def object_program(self) -> Union[str, bytes]:
+        """在記憶體中產生 object program（不寫檔、不使用快取），binary 格式回傳 bytes"""
+        target = io.BytesIO() if self.options.object_format == "binary" else io.StringIO()
+        self._write_sections(target)
+        return target.getvalue()
+
+    def link(self, load_address: Optional[int] = None) -> "LoadedImage":
+        """以 linking loader 直接連結載入組譯完成的 sections（不經過 object program 文字）"""
+        from .loader import LinkingLoader
+        loader = LinkingLoader(self.load_address if load_address is None else load_address)
+        loader.add_sections(self.sections)
+        return loader.link()
+
+    def write_image(self) -> None:
+        image = self.link()
+        with open(self.image_path, "wb") as file:
+            file.write(image.memory)
+        logger.info("Memory image (%d bytes at %06X) written to %s", len(image.memory), image.address, self.image_path)
+        logger.debug("%s", image.format_load_map())
+
     def assemble_file(self) -> None:
         #! 呼叫的 entry point
-        print(f"Starting assembly of {self.input_path}")
+        logger.info("Starting assembly of %s", self.input_path)
         
         try:
-            self.preprocess()           #! 讀取檔案並產生 sections
-            self.assemble()             #! 組譯（處理包含符號表、修改記錄、指令、literal pool、program block）
+            self.preprocess_and_assemble()  #! 串流讀取檔案產生 sections 並組譯（處理包含符號表、修改記錄、指令、literal pool、program block）
             self.write_object_files()   #! 寫入目標檔案
-            print("Assembly completed successfully !!!!")
-            print(f"Please see the object program(s) in the {output_folder}")
-            print("-------------------------------------------------\n")
+            if self.image_path is not None:
+                self.write_image()      #! 連結載入後的記憶體映像
+            if self.cache is not None:
+                self.cache.evict()      #! 快取超過大小上限時刪除最久未使用的項目
+            logger.info("Assembly completed successfully !!!!")
+            logger.info("Please see the object program(s) in the %s", output_folder)
             
         except Exception as e:
-            print(f"Assembly failed: {str(e)}")
+            logger.error("Assembly failed: %s", e)
             raise
         finally:
             # 清理任何暫存資源
             self.sections = []
+            self.section_keys = []
@@ -0,0 +1,131 @@
+import contextlib
+import glob
+import io
+import os
+import time
+from dataclasses import dataclass
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional
+
+from .assembler import MyAssembler
+from .io.cache import BuildCache, DEFAULT_CACHE_SIZE
+from .log import configure_logging, current_level
+from .models.dataTypes import AssemblerOptions
+
+#! 批次模式 object program 的副檔名（原始檔不使用，glob 展開時不會把上一次的輸出當成原始檔）
+OUTPUT_SUFFIX = ".obj"
+
+
+@dataclass
+class BatchResult:
+    """單一檔案的批次組譯結果
+    input_path: 原始檔路徑
+    output_path: object program 路徑
+    sections: section 數量
+    seconds: 組譯耗時（秒）
+    error: 失敗時的錯誤訊息
+    """
+    input_path: str
+    output_path: str
+    sections: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def expand_sources(patterns: Iterable[str]) -> List[str]:
+    """展開檔名與 glob pattern，依出現順序去除重複"""
+    sources: List[str] = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for path in matches:
+            if path not in seen:
+                seen.add(path)
+                sources.append(path)
+    return sources
+
+
+def output_path_for(input_path: str, output_dir: Optional[str] = None) -> str:
+    """object program 的路徑：code1.asm -> code1.obj，寫在 output_dir（未指定時為原始檔旁邊）"""
+    stem, _ = os.path.splitext(input_path)
+    if output_dir is not None:
+        stem = os.path.join(output_dir, os.path.basename(stem))
+    return stem + OUTPUT_SUFFIX
+
+
+def assemble_one(input_path: str, options: AssemblerOptions, cache_dir: Optional[str] = None,
+                 cache_size: int = DEFAULT_CACHE_SIZE, output_path: Optional[str] = None) -> BatchResult:
+    """組譯單一檔案（worker 的進入點），組譯過程的訊息不輸出到 console"""
+    result = BatchResult(input_path, output_path or output_path_for(input_path))
+    start = time.perf_counter()
+    try:
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f"Input file '{input_path}' does not exist")
+        cache = BuildCache(cache_dir, cache_size) if cache_dir else None
+        assembler = MyAssembler(input_path, result.output_path, options, cache=cache)
+        with contextlib.redirect_stdout(io.StringIO()):
+            assembler.preprocess()
+            assembler.assemble()
+            assembler.write_object_files()
+        result.sections = len(assembler.sections)
+    except Exception as e:
+        result.error = str(e)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def assemble_batch(patterns: Iterable[str], options: Optional[AssemblerOptions] = None, jobs: int = 1,
+                   cache_dir: Optional[str] = None, cache_size: int = DEFAULT_CACHE_SIZE,
+                   output_dir: Optional[str] = None) -> List[BatchResult]:
+    """
+    批次組譯多個檔案
+    - 同一個 process 只載入一次 opcode_table/directive_table/REGISTER_TABLE，所有檔案共用
+    - jobs > 1 時以 process pool 平行組譯，結果依輸入順序回傳
+    - 展開的路徑中目錄與 OUTPUT_SUFFIX 結尾的檔案（先前的輸出）不組譯；對應到同一個輸出路徑的檔案都不組譯並回報錯誤
+    """
+    options = options or AssemblerOptions()
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    sources = [source for source in expand_sources(patterns)
+               if not source.endswith(OUTPUT_SUFFIX) and not os.path.isdir(source)]
+    outputs = [output_path_for(source, output_dir) for source in sources]
+    claimed: Dict[str, List[str]] = {}
+    for source, output in zip(sources, outputs):
+        claimed.setdefault(os.path.normcase(os.path.abspath(output)), []).append(source)
+
+    results: Dict[int, BatchResult] = {}
+    pending: List[int] = []
+    for position, (source, output) in enumerate(zip(sources, outputs)):
+        owners = claimed[os.path.normcase(os.path.abspath(output))]
+        if len(owners) > 1:
+            others = ", ".join(owner for owner in owners if owner != source)
+            results[position] = BatchResult(source, output, error=f"Output path '{output}' is also used by {others}")
+        else:
+            pending.append(position)
+
+    todo = [sources[position] for position in pending]
+    todo_outputs = [outputs[position] for position in pending]
+    if jobs > 1 and len(todo) > 1:
+        from concurrent.futures import ProcessPoolExecutor #! multiprocessing 只在平行組譯時才 import
+        with ProcessPoolExecutor(max_workers=min(jobs, len(todo)), initializer=configure_logging,
+                                 initargs=(current_level(),)) as executor:
+            assembled = list(executor.map(assemble_one, todo, repeat(options), repeat(cache_dir), repeat(cache_size),
+                                          todo_outputs, chunksize=max(1, len(todo) // (jobs * 4))))
+    else:
+        assembled = [assemble_one(source, options, cache_dir, cache_size, output)
+                     for source, output in zip(todo, todo_outputs)]
+    results.update(zip(pending, assembled))
+    if cache_dir: #! 整批完成後才做一次 LRU eviction
+        BuildCache(cache_dir, cache_size).evict()
+    return [results[position] for position in range(len(sources))]
+
+
+def print_summary(results: List[BatchResult], elapsed: float) -> None:
+    """輸出每個檔案的組譯結果與耗時"""
+    width = max((len(result.input_path) for result in results), default=10)
+    for result in results:
+        status = "OK" if result.error is None else "FAIL"
+        detail = f"{result.sections} section(s) -> {result.output_path}" if result.error is None else result.error
+        print(f"{status:<4} {result.input_path:<{width}} {result.seconds * 1000:9.2f} ms  {detail}")
+    failed = sum(result.error is not None for result in results)
+    print(f"{len(results)} file(s), {failed} failed, total {elapsed:.2f} s")
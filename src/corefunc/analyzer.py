@@ -1,10 +1,29 @@
-from typing import TextIO, TYPE_CHECKING, Dict
-from tabulate import tabulate
+from typing import Any, Dict, Iterator, List, TextIO, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from src.corefunc.section import Section
 
 import os
+
+#! 機器可讀的表格欄位（iter_rows 依此順序產生原始值，位址為 int，沒有位址時為 None）
+TABLE_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "SYMTAB": ("name", "address", "is_external"),
+    "EXTREF": ("name", "address", "is_external"),
+    "EXTDEF": ("name", "address", "is_external"),
+    "LITTAB": ("name", "data", "used_count"),
+    "MODREC": ("location", "length", "sign", "reference"),
+    "INSTR": ("index", "line", "format", "symbol", "mnemonic", "operand", "object_code", "location", "is_relative"),
+}
+
+#! 這些指令在表格中不顯示位址
+_NO_ADDRESS_MNEMONICS = frozenset(("LTORG", "END", "BASE", "EXTDEF", "EXTREF"))
+
+
+def _grid(rows: List[List[Any]], headers: List[str]) -> str:
+    """以 tabulate 的 grid 格式排版（tabulate 只在真的輸出表格時才 import，不影響一般組譯的啟動時間）"""
+    from tabulate import tabulate
+    return tabulate(rows, headers=headers, tablefmt="grid")
+
 class Analyzer:
     def __init__(self, section: "Section"):
         self.section = section
@@ -18,7 +37,7 @@ class Analyzer:
         ]
         
         print("\n=== Symbol Table ===", file=file)
-        print(tabulate(rows, headers=headers, tablefmt="grid"), file=file)
+        print(_grid(rows, headers), file=file)
         
     def print_extref_table(self, file: TextIO = None) -> None:
         """輸出外部參考表"""
@@ -29,7 +48,7 @@ class Analyzer:
         ]
         
         print("\n=== External Reference Table ===", file=file)
-        print(tabulate(rows, headers=headers, tablefmt="grid"), file=file)
+        print(_grid(rows, headers), file=file)
         
     def print_extdef_table(self, file: TextIO = None) -> None:
         """輸出外部定義表"""
@@ -40,7 +59,7 @@ class Analyzer:
         ]
         
         print("\n=== External Definition Table ===", file=file)
-        print(tabulate(rows, headers=headers, tablefmt="grid"), file=file)
+        print(_grid(rows, headers), file=file)
         
     def print_modification_records(self, file: TextIO = None) -> None:
         """輸出修改記錄"""
@@ -51,7 +70,7 @@ class Analyzer:
         ]
         
         print("\n=== Modification Records ===", file=file)
-        print(tabulate(rows, headers=headers, tablefmt="grid"), file=file)
+        print(_grid(rows, headers), file=file)
         
     def print_instructions(self, file: TextIO = None) -> None:
         """輸出指令列表資訊"""
@@ -62,18 +81,16 @@ class Analyzer:
                 inst.formatType,
                 inst.symbol,
                 inst.mnemonic if inst.formatType != 4 else f"+{inst.mnemonic}",
-                "" if inst.mnemonic == "RSUB" else (
-                    inst.operand + ",X" if (inst.mnemonic + inst.operand) in self.section.x_directive_mode and self.section.x_directive_mode[inst.mnemonic + inst.operand] else inst.operand
-                ),
+                self._display_operand(inst),
                 inst.objectCode,
-                f"{inst.location.address:04X}" if inst.mnemonic != "LTORG" and inst.mnemonic != "END" and inst.mnemonic != "BASE" and inst.mnemonic != "EXTDEF" and inst.mnemonic != "EXTREF" else "",
+                f"{inst.location.address:04X}" if self._has_address(inst) else "",
                 inst.location.is_relative if inst.location is not None else False
             ]
             for inst in self.section.instructions
         ]
         
         print("\n=== Instructions ===", file=file)
-        print(tabulate(rows, headers=headers, tablefmt="grid"), file=file)
+        print(_grid(rows, headers), file=file)
         
     def print_literal_table(self, file: TextIO = None) -> None:
         """輸出 Literal 表"""
@@ -86,7 +103,7 @@ class Analyzer:
         ]
         
         print("\n=== Literal Table ===", file=file)
-        print(tabulate(rows, headers=headers, tablefmt="grid"), file=file)
+        print(_grid(rows, headers), file=file)
         
     def analyze(self, phase: str) -> None:
         """執行完整分析並輸出所有資訊"""
@@ -111,3 +128,40 @@ class Analyzer:
             self.print_modification_records()
         elif phase == "INSTR":
             self.print_instructions()
+
+    def iter_rows(self, table: str) -> Iterator[Tuple[Any, ...]]:
+        """
+        逐列產生 table（TABLE_COLUMNS 的鍵）的原始值，不建立完整表格也不做格式化
+        供 src.io.report 串流輸出成 JSON Lines、CSV 或 listing
+        """
+        section = self.section
+        if table in ("SYMTAB", "EXTREF", "EXTDEF"):
+            symbols = {"SYMTAB": section.symbol_table, "EXTREF": section.extref_table, "EXTDEF": section.extdef_table}[table]
+            for name, symbol in symbols.items():
+                yield name, symbol.addr, symbol.is_external
+        elif table == "LITTAB":
+            for literal in section.literal_pool.get_literals_to_print():
+                yield literal.name, literal.data, literal.used_count
+        elif table == "MODREC":
+            for record in section.modification_records.in_location_order():
+                yield record.location, record.length, record.sign, record.reference
+        elif table == "INSTR":
+            for inst in section.instructions:
+                location = inst.location
+                yield (inst.index, inst.line, inst.formatType, inst.symbol, inst.mnemonic, self._display_operand(inst),
+                       inst.objectCode, location.address if self._has_address(inst) else None,
+                       location.is_relative if location is not None else False)
+        else:
+            raise ValueError(f"Unknown analyzer table '{table}'")
+
+    def _display_operand(self, inst) -> str:
+        """原始碼中的運算元（pass 2 移除的 ,X 會補回）"""
+        if inst.mnemonic == "RSUB":
+            return ""
+        if self.section.x_directive_mode.get(inst.mnemonic + inst.operand):
+            return inst.operand + ",X"
+        return inst.operand
+
+    @staticmethod
+    def _has_address(inst) -> bool:
+        return inst.location is not None and inst.mnemonic not in _NO_ADDRESS_MNEMONICS
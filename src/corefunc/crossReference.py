@@ -0,0 +1,157 @@
+from types import MappingProxyType
+from typing import Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from ..models.dataTypes import Instruction
+from ..models.instructionTable import InstructionTable, InstructionView
+from .expression import ExpressionError, SymbolReference, compile_expression
+
+#! 運算元是運算式的 directive（format 3/4 指令之外，運算元也會被計算的指令）
+EXPRESSION_DIRECTIVES = frozenset(("WORD", "EQU", "ORG", "BASE", "RESW", "RESB", "END"))
+
+_EMPTY: Mapping[int, Instruction] = MappingProxyType({})
+
+
+def _row_key(instruction: InstructionView) -> int:
+    return instruction.row
+
+
+class OperandSymbols(NamedTuple):
+    """
+    指令運算元引用的符號
+    references: 依運算式順序的符號與正負號（EXTDEF 列出的符號皆為 +）
+    uses_location: 運算式是否引用 `*`
+    """
+    references: Tuple[SymbolReference, ...]
+    uses_location: bool
+
+
+NO_SYMBOLS = OperandSymbols((), False)
+
+
+def operand_expression(instruction: Instruction) -> Optional[str]:
+    """會被當作運算式計算的運算元（format 3/4 去掉 #、@ 與 ,X），其餘回傳 None"""
+    if instruction.mnemonic in EXPRESSION_DIRECTIVES:
+        return instruction.operand or None
+    if instruction.formatType not in (3, 4) or not instruction.operand:
+        return None
+    operand = instruction.operand.split(",")[0]
+    return operand[1:] if operand.startswith(("#", "@")) else operand
+
+
+class CrossReference:
+    """
+    符號的交叉參考索引（pass 1 建立 SYMTAB 時一併建立）
+    1. 定義：符號 -> 定義它的指令（標籤、EQU、literal 的 BYTE；外部參考為 EXTREF 指令）
+    2. 使用：符號 -> {key: 指令}，運算元引用它的指令（format 3/4、WORD/EQU/ORG/BASE/RESW/RESB/END、EXTDEF）
+    3. 運算元：key -> (指令, OperandSymbols)，只記錄有引用符號或 `*` 的指令
+    key 為 id(指令)，查詢與加入/移除單一指令都是 O(1)（增量組譯依此找出需要重新編碼的指令）
+    Section.compact() 後指令換成 InstructionTable 的 InstructionView，key 改為列號（見 compact）
+    """
+    def __init__(self):
+        self._definitions: Dict[str, Instruction] = {}
+        self._uses: Dict[str, Dict[int, Instruction]] = {}
+        self._operands: Dict[int, Tuple[Instruction, OperandSymbols]] = {}
+        self._key: Callable[[Instruction], int] = id
+
+    def __getstate__(self) -> dict:
+        """id 在另一個 process 中不同，pickle 時只保留指令本身，__setstate__ 重建索引"""
+        return {"definitions": self._definitions, "operands": list(self._operands.values()),
+                "compact": self._key is _row_key}
+
+    def __setstate__(self, state: dict) -> None:
+        self._definitions = state["definitions"]
+        self._key = _row_key if state["compact"] else id
+        self._index(state["operands"])
+
+    def _index(self, operands: List[Tuple[Instruction, OperandSymbols]]) -> None:
+        self._uses, self._operands = {}, {}
+        for instruction, symbols in operands:
+            self._link(instruction, symbols)
+
+    def _link(self, instruction: Instruction, symbols: OperandSymbols) -> None:
+        key = self._key(instruction)
+        self._operands[key] = (instruction, symbols)
+        for reference in symbols.references:
+            self._uses.setdefault(reference.name, {})[key] = instruction
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._definitions or name in self._uses
+
+    def __len__(self) -> int:
+        return len(self._definitions.keys() | self._uses.keys())
+
+    def add(self, instruction: Instruction) -> None:
+        """加入指令的定義與運算元引用的符號"""
+        if instruction.symbol:
+            self._definitions[instruction.symbol] = instruction
+        match instruction.mnemonic:
+            case "EXTREF":
+                for name in instruction.operand.split(","):
+                    self._definitions[name] = instruction
+                return
+            case "EXTDEF":
+                symbols = OperandSymbols(tuple(SymbolReference(name, "+") for name in instruction.operand.split(",")), False)
+            case _:
+                text = operand_expression(instruction)
+                if text is None:
+                    return
+                try:
+                    expression = compile_expression(text)
+                except ExpressionError:
+                    return #! 無法計算的運算元（組譯時回報錯誤）沒有引用任何符號
+                symbols = OperandSymbols(tuple(expression.references), expression.uses_location)
+        if symbols.references or symbols.uses_location:
+            self._link(instruction, symbols)
+
+    def remove(self, instruction: Instruction) -> None:
+        """移除指令的定義與引用（add 的反向操作）"""
+        names = [instruction.symbol] if instruction.symbol else []
+        if instruction.mnemonic == "EXTREF":
+            names.extend(instruction.operand.split(","))
+        for name in names:
+            if self._definitions.get(name) is instruction:
+                del self._definitions[name]
+        key = self._key(instruction)
+        site = self._operands.pop(key, None)
+        if site is None:
+            return
+        for reference in site[1].references:
+            uses = self._uses.get(reference.name)
+            if uses is not None:
+                uses.pop(key, None)
+                if not uses:
+                    del self._uses[reference.name]
+
+    def compact(self, instructions: Sequence[Instruction], table: InstructionTable) -> None:
+        """instructions 轉為 table（同樣順序）後，索引中的指令換成對應列的 InstructionView，以列號為 key"""
+        rows = {id(instruction): row for row, instruction in enumerate(instructions)}
+        self._definitions = {name: table[rows[id(instruction)]] for name, instruction in self._definitions.items()}
+        self._key = _row_key
+        self._index([(table[rows[key]], symbols) for key, (_, symbols) in self._operands.items()])
+
+    #! ---- 查詢 ----
+    def definition(self, name: str) -> Optional[Instruction]:
+        """定義 name 的指令，未定義時回傳 None"""
+        return self._definitions.get(name)
+
+    def dependents(self, name: str) -> Mapping[int, Instruction]:
+        """引用 name 的指令（key -> 指令，依加入順序），O(1) 查詢，回傳的是索引本身，不可修改"""
+        return self._uses.get(name, _EMPTY)
+
+    def uses(self, name: str) -> List[Instruction]:
+        """引用 name 的指令，依原始碼順序"""
+        return sorted(self._uses.get(name, _EMPTY).values(), key=lambda instruction: instruction.index)
+
+    def operand_symbols(self, instruction: Instruction) -> OperandSymbols:
+        """指令運算元引用的符號（沒有引用任何符號時為 NO_SYMBOLS）"""
+        site = self._operands.get(self._key(instruction))
+        return site[1] if site is not None else NO_SYMBOLS
+
+    def symbols(self) -> List[str]:
+        """所有被定義或被引用的符號，依名稱排序"""
+        return sorted(self._definitions.keys() | self._uses.keys())
+
+    def entries(self) -> Iterator[Tuple[str, Optional[Instruction], List[Instruction]]]:
+        """依名稱逐一產生 (符號, 定義的指令, 引用的指令)，--xref listing 用"""
+        for name in self.symbols():
+            yield name, self._definitions.get(name), self.uses(name)
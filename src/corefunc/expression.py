@@ -0,0 +1,256 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from ..models.dataTypes import Symbol
+
+
+class ExpressionError(ValueError):
+    """運算式語法或語意錯誤"""
+
+
+class UnresolvedSymbolError(ExpressionError):
+    """運算式中的符號尚未有位址"""
+    def __init__(self, name: str):
+        super().__init__(f"Unresolved symbol '{name}'")
+        self.name = name
+
+
+class ExpressionValue(NamedTuple):
+    """運算結果
+    value: 運算後的值
+    relative: 相對項的淨數量（0 = absolute，1 = relative）
+    """
+    value: int
+    relative: int = 0
+
+    @property
+    def is_relative(self) -> bool:
+        return self.relative == 1
+
+    @property
+    def is_absolute(self) -> bool:
+        return self.relative == 0
+
+
+class SymbolReference(NamedTuple):
+    """運算式中引用的符號
+    name: 符號名稱
+    sign: 該項在運算式中的正負號（+ 或 -），用於產生修改記錄
+    """
+    name: str
+    sign: str
+
+
+#! 單一 regex 完成 tokenize：X'..' 十六進位、0x.. / 十進位常數、符號、運算子
+_TOKEN_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<hex>[Xx]'[0-9A-Fa-f]+')"
+    r"|(?P<num>0[xX][0-9A-Fa-f]+|\d+)"
+    r"|(?P<sym>[A-Za-z_][A-Za-z0-9_]*)"
+    r"|(?P<op>[-+*/()])"
+    r")"
+)
+
+
+def _tokenize(source: str) -> List[Tuple[str, str]]:
+    """將運算式切成 (kind, text) 的 token 列表"""
+    tokens: List[Tuple[str, str]] = []
+    pos = 0
+    end = len(source.rstrip())
+    while pos < end:
+        match = _TOKEN_RE.match(source, pos)
+        if match is None or match.end() == pos:
+            raise ExpressionError(f"Unexpected character in expression '{source}' at {pos}")
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        pos = match.end()
+    return tokens
+
+
+#! Expression tree nodes
+#? 每個節點的 evaluate 回傳 (value, relative)，symbols/externals 只做一次 dict 查找
+class _Constant:
+    __slots__ = ("value",)
+
+    def __init__(self, value: int):
+        self.value = value
+
+    def evaluate(self, symbols, externals, location):
+        return self.value, 0
+
+
+class _LocationCounter:
+    __slots__ = ()
+
+    def evaluate(self, symbols, externals, location):
+        return location, 1
+
+
+class _SymbolRef:
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def evaluate(self, symbols, externals, location):
+        symbol = symbols.get(self.name)
+        if symbol is not None and symbol.addr is not None:
+            return symbol.addr, 1 if symbol.is_relative else 0
+        if externals is not None:
+            symbol = externals.get(self.name)
+            if symbol is not None:
+                return symbol.addr or 0, 0 #! 外部符號由 loader 透過修改記錄補上
+        raise UnresolvedSymbolError(self.name)
+
+
+class _Negate:
+    __slots__ = ("operand",)
+
+    def __init__(self, operand):
+        self.operand = operand
+
+    def evaluate(self, symbols, externals, location):
+        value, relative = self.operand.evaluate(symbols, externals, location)
+        return -value, -relative
+
+
+class _BinaryOp:
+    __slots__ = ("op", "left", "right")
+
+    def __init__(self, op: str, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def evaluate(self, symbols, externals, location):
+        left, left_rel = self.left.evaluate(symbols, externals, location)
+        right, right_rel = self.right.evaluate(symbols, externals, location)
+        op = self.op
+        if op == "+":
+            return left + right, left_rel + right_rel
+        if op == "-":
+            return left - right, left_rel - right_rel
+        if left_rel or right_rel:
+            raise ExpressionError(f"Relative term cannot be used with '{op}'")
+        if op == "*":
+            return left * right, 0
+        if right == 0:
+            raise ExpressionError("Division by zero in expression")
+        quotient = abs(left) // abs(right) #! 整數除法，往 0 截斷
+        return (quotient if (left < 0) == (right < 0) else -quotient), 0
+
+
+class _Parser:
+    """遞迴下降 parser
+    expr   := term (('+' | '-') term)*
+    term   := factor (('*' | '/') factor)*
+    factor := NUMBER | SYMBOL | '*' | '(' expr ')' | ('+' | '-') factor
+    """
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens = _tokenize(source)
+        self.pos = 0
+        self.references: List[SymbolReference] = []
+        self.uses_location = False
+
+    def _peek(self) -> Optional[Tuple[str, str]]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self) -> Tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            raise ExpressionError(f"Unexpected end of expression '{self.source}'")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise ExpressionError("Empty expression")
+        node = self._expr(False)
+        if self._peek() is not None:
+            raise ExpressionError(f"Unexpected token '{self._peek()[1]}' in expression '{self.source}'")
+        return node
+
+    def _expr(self, negated: bool):
+        node = self._term(negated)
+        while (token := self._peek()) is not None and token in (("op", "+"), ("op", "-")):
+            self.pos += 1
+            right = self._term(negated ^ (token[1] == "-"))
+            node = _BinaryOp(token[1], node, right)
+        return node
+
+    def _term(self, negated: bool):
+        node = self._factor(negated)
+        while (token := self._peek()) is not None and token in (("op", "*"), ("op", "/")):
+            self.pos += 1
+            node = _BinaryOp(token[1], node, self._factor(negated))
+        return node
+
+    def _factor(self, negated: bool):
+        kind, text = self._next()
+        if kind == "num":
+            return _Constant(int(text, 0) if text[:2] in ("0x", "0X") else int(text))
+        if kind == "hex":
+            return _Constant(int(text[2:-1], 16))
+        if kind == "sym":
+            self.references.append(SymbolReference(text, "-" if negated else "+"))
+            return _SymbolRef(text)
+        if text == "*":
+            self.uses_location = True
+            return _LocationCounter()
+        if text == "(":
+            node = self._expr(negated)
+            if self._next() != ("op", ")"):
+                raise ExpressionError(f"Missing ')' in expression '{self.source}'")
+            return node
+        if text in ("+", "-"):
+            node = self._factor(negated ^ (text == "-"))
+            return _Negate(node) if text == "-" else node
+        raise ExpressionError(f"Unexpected token '{text}' in expression '{self.source}'")
+
+
+class Expression:
+    """已編譯的 SIC/XE 運算式
+    source: 原始運算元字串
+    references: 運算式中引用的符號（依出現順序）
+    uses_location: 是否引用 location counter（`*`）
+    """
+    __slots__ = ("source", "references", "uses_location", "_root")
+
+    def __init__(self, source: str):
+        parser = _Parser(source)
+        self._root = parser.parse()
+        self.source = source
+        self.references: Tuple[SymbolReference, ...] = tuple(parser.references)
+        self.uses_location: bool = parser.uses_location
+
+    @property
+    def symbols(self) -> Tuple[str, ...]:
+        return tuple(reference.name for reference in self.references)
+
+    def evaluate(self, symbols: Mapping[str, Symbol], location: int = 0,
+                 externals: Optional[Mapping[str, Symbol]] = None) -> ExpressionValue:
+        """
+        計算運算式的值
+        Args:
+            symbols: SYMTAB（name -> Symbol）
+            location: 目前的 location counter（`*` 的值）
+            externals: EXTREF table，若提供則外部符號以其位址計算
+        Raises:
+            UnresolvedSymbolError: 符號不存在或尚未有位址
+            ExpressionError: 運算式不合法
+        """
+        value, relative = self._root.evaluate(symbols, externals, location)
+        return ExpressionValue(value, relative)
+
+
+@lru_cache(maxsize=65536)
+def compile_expression(source: str) -> Expression:
+    """編譯運算元字串，結果依字串快取"""
+    return Expression(source.strip())
+
+
+def evaluate_expression(source: str, symbols: Dict[str, Symbol], location: int = 0,
+                        externals: Optional[Mapping[str, Symbol]] = None) -> ExpressionValue:
+    """編譯（使用快取）並計算運算式"""
+    return compile_expression(source).evaluate(symbols, location, externals)
@@ -1,10 +1,14 @@
 from typing import Dict, List
 from ..models.dataTypes import Literal
+from ..log import get_logger
+
+logger = get_logger(__name__)
 
 class LiteralManager:
     def __init__(self):
         self.literal_table: List[Literal] = []  #! literal table，紀錄 name, data, used_count
         self.literal_set: Dict[str, str] = {}   #! 快速查找用的 set
+        self.literal_entries: Dict[str, Literal] = {}  #! name -> entry，重複的 literal 直接更新 used_count
         self.literal_count: int = 1             #! 紀錄 literal 的數量
         self.literal_temp_table: List[Literal] = [] #! 紀錄輸出用的 literal
     
@@ -13,14 +17,13 @@ class LiteralManager:
         # 檢查是否已存在
         if literal_value in self.literal_set:
             # 更新使用次數
-            for entry in self.literal_table:
-                if entry.name == self.literal_set[literal_value]:
-                    entry.used_count += 1
-            return self.literal_set[literal_value] #! instruction.operand = literal_set[literal_value]
+            name = self.literal_set[literal_value]
+            self.literal_entries[name].used_count += 1
+            return name #! instruction.operand = literal_set[literal_value]
 
         # 創建新的 literal entry
         new_name = f"literal{self.literal_count}"
-        print(f"New literal: {new_name} = {literal_value}")
+        logger.debug("New literal: %s = %s", new_name, literal_value)
         new_entry = Literal(
             name=new_name,
             data=literal_value[1:],  # 移除 '=' 前綴
@@ -30,6 +33,7 @@ class LiteralManager:
         # 更新表格和集合
         self.literal_table.append(new_entry)
         self.literal_set[literal_value] = new_name
+        self.literal_entries[new_name] = new_entry
         self.literal_count += 1
         
         return new_name
@@ -47,4 +51,5 @@ class LiteralManager:
         self.literal_temp_table.extend(self.literal_table)  # 使用 extend 而不是 append
         self.literal_table = []
         self.literal_set = {}
+        self.literal_entries = {}
         
@@ -0,0 +1,69 @@
+from typing import Dict, Iterator, List, Tuple
+
+from ..models.dataTypes import ModificationRecord
+
+
+class ModificationRecordTable:
+    """
+    修改記錄表
+    1. 以 (location, reference) 為 key，O(1) 判斷是否重複
+    2. 迭代時維持插入順序
+    3. 記錄插入是否已依 location 排序，寫檔時通常不需要再排序
+    """
+    def __init__(self):
+        self._records: Dict[Tuple[int, str], ModificationRecord] = {}
+        self._in_order: bool = True          #! 插入的 location 是否非遞減
+        self._last_location: int = -1
+        self._sorted_cache: List[ModificationRecord] = []
+
+    def __iter__(self) -> Iterator[ModificationRecord]:
+        return iter(self._records.values())
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __bool__(self) -> bool:
+        return bool(self._records)
+
+    def __contains__(self, key: Tuple[int, str]) -> bool:
+        """key 為 (location, reference)"""
+        return key in self._records
+
+    def add(self, record: ModificationRecord) -> bool:
+        """加入修改記錄，若相同 (location, reference) 已存在則忽略並回傳 False"""
+        key = (record.location, record.reference)
+        if key in self._records:
+            return False
+        self._records[key] = record
+        if record.location < self._last_location:
+            self._in_order = False
+        self._last_location = max(self._last_location, record.location)
+        self._sorted_cache = []
+        return True
+
+    def in_location_order(self) -> List[ModificationRecord]:
+        """依 location 排序的修改記錄（同一 location 維持插入順序）"""
+        if self._in_order:
+            return list(self._records.values())
+        if not self._sorted_cache:
+            self._sorted_cache = sorted(self._records.values(), key=lambda record: record.location)
+        return self._sorted_cache
+
+    def relocate(self, start: int, end: int, delta: int) -> None:
+        """
+        增量組譯用：刪除 location 在 [start, end) 的記錄（被取代的指令），location >= end 的記錄平移 delta
+        其餘記錄維持插入順序
+        """
+        records: Dict[Tuple[int, str], ModificationRecord] = {}
+        in_order, last = True, -1
+        for record in self._records.values():
+            if start <= record.location < end:
+                continue
+            if record.location >= end:
+                record.location += delta
+            if record.location < last:
+                in_order = False
+            last = max(last, record.location)
+            records[(record.location, record.reference)] = record
+        self._records, self._in_order, self._last_location = records, in_order, last
+        self._sorted_cache = []
@@ -1,16 +1,39 @@
 
-from typing import Dict, Tuple, List, TYPE_CHECKING
-from ..models.dataTypes import Instruction, Symbol, Location, ModificationRecord, OpcodeTable
+from typing import Dict, Tuple, List, Optional, TYPE_CHECKING
+from ..models.dataTypes import AssemblerOptions, Instruction, Symbol, Location, ModificationRecord, OpcodeTable
+from .expression import ExpressionError, compile_expression
+from .modificationTable import ModificationRecordTable
 from config import REGISTER_TABLE
-import ast
 
 if TYPE_CHECKING:
     from .section import Section
 
+def decode_opcodes(opcode_table: OpcodeTable) -> Dict[str, int]:
+    """mnemonic -> opcode 的平坦 dict（編碼時少一次屬性存取）"""
+    return {mnemonic: entry.opcode for mnemonic, entry in opcode_table.items()}
+
+
+def encode_format3(opcode: int, n: int, i: int, x: int, b: int, p: int, e: int, disp: int) -> int:
+    """Format 3: opcode 前 6 位元 | nixbpe | 12 位元位移"""
+    return ((opcode & 0xFC) << 16) | (n << 17) | (i << 16) | (x << 15) | (b << 14) | (p << 13) | (e << 12) | (disp & 0xFFF)
+
+
+def encode_format4(opcode: int, n: int, i: int, x: int, b: int, p: int, e: int, address: int) -> int:
+    """Format 4: opcode 前 6 位元 | nixbpe | 20 位元位址"""
+    return ((opcode & 0xFC) << 24) | (n << 25) | (i << 24) | (x << 23) | (b << 22) | (p << 21) | (e << 20) | (address & 0xFFFFF)
+
+
+def to_hex(value: int, width: int) -> str:
+    """整數目標碼轉成固定位數的十六進位字串"""
+    return f"{value:0{width}X}"
+
+
 class ObjectCodeGenerator:
-    def __init__(self, section: 'Section'):
+    def __init__(self, section: 'Section', options: Optional[AssemblerOptions] = None):
         self.sectionTmp = section
+        self.options = options or section.options #! 預設使用 section 所屬組譯的設定
         self.base_value = 0
+        self.opcode_values = decode_opcodes(section.opcode_table)
         
     @property
     def symbol_table(self) -> Dict[str, Symbol]:
@@ -25,7 +48,7 @@ class ObjectCodeGenerator:
         return self.sectionTmp.opcode_table
     
     @property
-    def modification_records(self) -> List[ModificationRecord]:
+    def modification_records(self) -> ModificationRecordTable:
         return self.sectionTmp.modification_records
     
     @property
@@ -50,18 +73,20 @@ class ObjectCodeGenerator:
             return operand[2:-1]
         return ""
     
-    def _generate_word_code(self, operand: str) -> str:
+    def _generate_word_code(self, operand: str, location: int = 0) -> str:
         """
         生成 WORD 指令的目標碼
-        轉換為 6 位十六進位數
+        轉換為 6 位十六進位數（外部參考以 0 計算，由修改記錄補上）
         """
+        value = self._evaluate(operand, location)
+        return f"{value & 0xFFFFFF:06X}"  # 確保是 6 位十六進位，0xFFFFFF = 16777215 = 24 個 1
+    
+    def _evaluate(self, operand: str, location: int = 0) -> int:
+        """計算運算元的值，無法計算時回傳 0"""
         try:
-            value = ast.literal_eval(operand) #! 比較安全的 eval
-            if not isinstance(value, int):
-                raise ValueError("Operand must evaluate to an integer")
-            return f"{value & 0xFFFFFF:06X}"  # 確保是 6 位十六進位，0xFFFFFF = 16777215 = 24 個 1
-        except:
-            return "000000"
+            return compile_expression(operand).evaluate(self.symbol_table, location, self.extref_table).value
+        except ExpressionError:
+            return 0
     
     #! Calculate Target Address
     def _get_target_address(self, operand: str) -> int:
@@ -69,34 +94,23 @@ class ObjectCodeGenerator:
         if operand.startswith(("#", "@")):
             operand = operand[1:] #? Pass the '#' or '@'
             
-        #! If is number, return it
-        if operand.isdigit():
-            return int(operand)
-
-        #! Search for symbol table
-        if operand in self.symbol_table:
-            return self.symbol_table[operand].addr or 0
-        
-        #! Search for external references
-        if operand in self.extref_table:
-            return self.extref_table[operand].addr or 0
-        
-        return 0
+        #! 數字、符號（SYMTAB → EXTREF）或運算式
+        return self._evaluate(operand)
     
     #! Format 1
-    def _format1(self, instruction: Instruction) -> str:
+    def _format1(self, instruction: Instruction) -> int:
         """Format 1: 8位元操作碼"""
-        return f"{self.opcode_table[instruction.mnemonic]['obj']}"
+        return self.opcode_values[instruction.mnemonic]
     
     #! Format 2
-    def _format2(self, instruction: Instruction) -> str:
+    def _format2(self, instruction: Instruction) -> int:
         """Format 2: 8位元操作碼 + 4位元暫存器1 + 4位元暫存器2"""
         operand = instruction.operand.split(',')
         #! Range 0-9
         #? Ex: ADDR, A,X or CLEAR, A
         r1 = REGISTER_TABLE[operand[0]]
         r2 = REGISTER_TABLE[operand[1] if len(operand) > 1 else 'A'] #! 如果沒有第二個暫存器，則使用 A(default)
-        return f"{self.opcode_table[instruction.mnemonic]['obj']}{r1}{r2}" #! 四位 16 進位
+        return (self.opcode_values[instruction.mnemonic] << 8) | (r1 << 4) | r2
         
     #! Format 3
     def _cal_flags(self, instruction: Instruction, current_location: Location) -> Tuple[int, int, int, int, int, int]:
@@ -155,7 +169,6 @@ class ObjectCodeGenerator:
             flags.b = 1
             flags.p = 0
         else:
-            print(f"Error determining flags on: {instruction.mnemonic} {instruction.operand} {current_location.address}")
             raise ValueError(f"Error determining flags on: {instruction.mnemonic} {instruction.operand} {current_location.address}")
         
         return flags.n, flags.i, flags.x, flags.b, flags.p, flags.e
@@ -188,18 +201,13 @@ class ObjectCodeGenerator:
             displacement = target_address & 0x7FF #! (2^11 - 1) = 2047, 於確保位移值不超過 11 位元
         return displacement
     
-    def _format3(self, instruction: Instruction, current_location: Location) -> str:
+    def _format3(self, instruction: Instruction, current_location: Location) -> int:
         """Format 3: 6位元操作碼 + nixbpe + 12位元位移"""
-        opcode = int(self.opcode_table[instruction.mnemonic]["obj"], 16) >> 2 #! 取前 6 位
         flags = self._cal_flags(instruction, current_location)
         disp = self._cal_displacement(instruction, current_location, flags)
         
-        #! 組合目標碼
-        #? 先把所有這些二進制位串接在一起，形成一個 24 位元的二進制字串
-        #? 然後用 int(code, 2) 將二進制字串轉換為整數
-        #? 最後用 {:06X} 將整數轉換為 6 位的十六進制字串
-        code = f"{opcode:06b}{flags[0]}{flags[1]}{flags[2]}{flags[3]}{flags[4]}{flags[5]}{disp:012b}"
-        return f"{int(code, 2):06X}"
+        #! 組合目標碼：直接以位移與 OR 組成 24 位元整數，輸出時才轉成十六進位
+        return encode_format3(self.opcode_values[instruction.mnemonic], *flags, disp)
 
     def _parse_addressing_mode_for_format4(self, instruction: Instruction, operand: str) -> Tuple[int, int, int]:
         """解析定址模式，返回 n, i, x 值"""
@@ -231,53 +239,45 @@ class ObjectCodeGenerator:
         if operand.startswith(("#", "@")):
             operand = operand[1:]
         
-        # 如果是數字，直接返回
-        if operand.isdigit():
-            return int(operand)
-        
-        # 查找符號表
-        if operand in self.symbol_table:
-            return self.symbol_table[operand].addr or 0
-        
-        # 查找外部參照
-        if operand in self.extref_table:
-            return self.extref_table[operand].addr or 0
-        
-        return 0
+        # 數字、符號（符號表 → 外部參照）或運算式
+        return self._evaluate(operand)
     
-    def _format4(self, instruction: Instruction) -> str:
+    def _format4(self, instruction: Instruction) -> int:
         """Format 4: 6位元操作碼 + nixbpe + 20位元位址"""
-        opcode = int(self.opcode_table[instruction.mnemonic]["obj"], 16) >> 2 #! 取前 6 位
         n, i, x = self._parse_addressing_mode_for_format4(instruction, instruction.operand)
         b, p, e = 0, 0, 1 #! default (e = 1)
         
         #! Deal with address
         address = self._cal_address(instruction.operand)
         
-        #! 組合 object code
-        code = f"{opcode:06b}{n}{i}{x}{b}{p}{e}{address:020b}"
+        #! 組合 object code（32 位元整數）
+        code = encode_format4(self.opcode_values[instruction.mnemonic], n, i, x, b, p, e, address)
         
         #! 只在 simple addressing (n=1, i=1) 的情況下處理 modification record
         if n == 1 and i == 1: #! Simple addressing
             #? Need to check modification record
             if instruction.location != None:
-                record_exists = any(record.location == instruction.location.address + 1 and record.reference == instruction.operand for record in self.modification_records)
-                if not record_exists:
+                if (instruction.location.address + 1, instruction.operand) not in self.modification_records:
                     self.sectionTmp._add_modification_record(ModificationRecord(instruction.location.address + 1, 5, "", ""))
     
-        return f"{int(code, 2):08X}"
+        return code
     
-    def generate_for_instruction(self, instruction: Instruction, current_location: Location) -> str:
-        """生成指令格式 1-4 的目標碼"""
+    def encode_instruction(self, instruction: Instruction, current_location: Location) -> Tuple[int, int]:
+        """生成指令格式 1-4 的目標碼，回傳 (整數值, 十六進位位數)"""
         if instruction.formatType == 1:
-            return self._format1(instruction)
+            return self._format1(instruction), 2
         elif instruction.formatType == 2:
-            return self._format2(instruction)
+            return self._format2(instruction), 4
         elif instruction.formatType == 3:
-            return self._format3(instruction, current_location)
+            return self._format3(instruction, current_location), 6
         elif instruction.formatType == 4:
-            return self._format4(instruction)
-        return ""
+            return self._format4(instruction), 8
+        return 0, 0
+    
+    def generate_for_instruction(self, instruction: Instruction, current_location: Location) -> str:
+        """生成指令格式 1-4 的目標碼（十六進位字串）"""
+        value, width = self.encode_instruction(instruction, current_location)
+        return to_hex(value, width) if width else ""
         
     #! 生成指令的 object code
     def generateOpCode(self, instruction: Instruction, location: Location) -> str:
@@ -285,7 +285,7 @@ class ObjectCodeGenerator:
         if instruction.mnemonic == "BYTE":
             return self._generate_byte_code(instruction.operand)
         elif instruction.mnemonic == "WORD":
-            return self._generate_word_code(instruction.operand)
+            return self._generate_word_code(instruction.operand, location.address if location is not None else 0)
         elif instruction.mnemonic == "RSUB":
             return "4F0000"
         elif instruction.formatType > 0:
@@ -1,11 +1,20 @@
-from typing import List, Dict, Optional
-from ..models.dataTypes import Instruction, Symbol, ModificationRecord, Location, OpcodeTable
+from typing import List, Dict, Optional, Tuple, Union
+from ..models.dataTypes import AssemblerOptions, Instruction, Symbol, ModificationRecord, Location, OpcodeTable
+from ..models.instructionTable import InstructionTable
 from ..corefunc.literal import LiteralManager
+from ..corefunc.modificationTable import ModificationRecordTable
 from ..corefunc.objectCode import ObjectCodeGenerator
+from ..corefunc.expression import Expression, ExpressionError, ExpressionValue, UnresolvedSymbolError, compile_expression
+from ..corefunc.symbolGraph import SymbolGraph
+from ..corefunc.crossReference import CrossReference
+from ..profiling import (ADDRESS, EXTERNAL_DEFINITIONS, LITERAL_POOL, OBJECT_CODE, PROGRAM_BLOCK, REORDER,
+                         SYMBOL_TABLE, Profiler, profile_phase)
 
 from .analyzer import Analyzer
+from ..log import get_logger
+from config import opcode_table as shared_opcode_table
 
-import config
+logger = get_logger(__name__)
 
 DEFAULT_BLOCK = ""
 
@@ -19,17 +28,20 @@ class Section:
     4. 管理外部參考和定義
     5. 產生修改紀錄
     """
-    def __init__(self, name: str, opcode_table: OpcodeTable): #! name = symbol(label, section 的名稱)
+    def __init__(self, name: str, opcode_table: OpcodeTable, options: AssemblerOptions = AssemblerOptions()): #! name = symbol(label, section 的名稱)
         self.name = name
         self.opcode_table: OpcodeTable = opcode_table #! To write object code, give to ObjectCodeGenerator
+        self.options = options #! 這個 section 所屬組譯的設定（bonus 等），每個組譯各自獨立
         
-        self.instructions: List[Instruction] = []
+        self.instructions: Union[List[Instruction], InstructionTable] = []
         # 符號相關的 Table
         self.symbol_table: Dict[str, Symbol] = {}       #TODO 放 symbol 跟他的 location（address 實際記憶體位置）
         self.extdef_table: Dict[str, Symbol] = {}       #TODO 放 external definition 的 symbol
         self.extref_table: Dict[str, Symbol] = {}       #TODO 放 external reference 的 symbol
+        self._extref_positions: Dict[str, int] = {}     #! EXTREF 宣告順序，排序多個外部參考的修改紀錄用
+        self.xref = CrossReference()                    #! 符號的定義與引用位置（pass 1 建立）
         # 修改紀錄
-        self.modification_records: List[ModificationRecord] = []
+        self.modification_records = ModificationRecordTable()
         # Literal
         self.literal_pool = LiteralManager()
         
@@ -42,72 +54,101 @@ class Section:
         self.x_directive_mode: Dict[str, bool] = {"key": False}
 
 
+    def __getstate__(self) -> dict:
+        """
+        送到 worker process 或寫入快取時不帶共用的 config.opcode_table（唯讀的 MappingProxyType 不能 pickle），
+        __setstate__ 還原時重新指向同一份表
+        """
+        state = self.__dict__.copy()
+        if state["opcode_table"] is shared_opcode_table:
+            del state["opcode_table"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        if "opcode_table" not in state:
+            self.opcode_table = shared_opcode_table
+
     def add_instruction(self, instruction: Instruction) -> None:
         self.instructions.append(instruction)
+
+    def compact(self) -> None:
+        """組譯完成後將指令轉為欄位式的 InstructionTable 以節省記憶體"""
+        if not isinstance(self.instructions, InstructionTable):
+            table = InstructionTable(self.instructions)
+            self.xref.compact(self.instructions, table)
+            self.instructions = table
         
     def has_END(self) -> bool:
         """檢查區段是否有 END 指令"""
         return any(inst.mnemonic == "END" for inst in self.instructions)
     
     def _add_modification_record(self, record: ModificationRecord) -> None:
-        """添加修改紀錄"""
-        self.modification_records.append(record)
+        """添加修改紀錄（相同 location 與 reference 的紀錄只會保留一筆）"""
+        self.modification_records.add(record)
     
     def _makeModificationRecord(self, operand: str, mnemonic: str, location: int) -> None:
         """
-        1. 遍歷所有外部參考符號（EXTREF）
-        2. 檢查該符號是否出現在運算式（operand）中
-        3. 如果找到符號，則替換為其值
-        4. 判斷符號前的運算子
-        5. 檢查是否已存在相同的修改紀錄
-        6. 如果不存在相同的修改紀錄，則創建新的
+        1. 編譯運算式（operand），取得其中引用的符號
+        2. 找出屬於外部參考（EXTREF）的符號與其正負號
+        3. 檢查是否已存在相同的修改紀錄
+        4. 如果不存在相同的修改紀錄，則創建新的
         """
-        for symbol, symbol_info in self.extref_table.items():
-            # print('symbol, operand, address:', symbol, operand, symbol_info.addr)
-            if symbol in operand and symbol_info.addr is not None:
-                m = operand.find(symbol)
-                operand = operand.replace(symbol, str(symbol_info.addr))
-                #! 判斷符號前的運算子
-                sign = "+" if m == 0 or operand[m - 1] == "+" else "-"
-                # 檢查是否已存在相同的修改紀錄
-                record_exists = any(
-                    ((mnemonic == "WORD" and MRecord.location == location) or (mnemonic != "WORD" and MRecord.location == location + 1)) and MRecord.reference == symbol
-                    for MRecord in self.modification_records
-                )
-                # 如果不存在相同的修改紀錄，則創建新的
-                if not record_exists:
-                    self._add_modification_record(ModificationRecord(location + 1 if mnemonic != "WORD" else location, 6 if mnemonic == "WORD" else 5, sign, symbol))
-    
-    def _evaluate_operand(self, operand: str, mnemonic: str) -> int:
+        try:
+            expression = compile_expression(operand)
+        except ExpressionError:
+            return
+        self._add_expression_modification_records(expression, mnemonic, location)
+
+    def _add_expression_modification_records(self, expression: Expression, mnemonic: str, location: int) -> None:
+        """依已編譯的運算式產生外部參考的修改紀錄"""
+        record_location = location if mnemonic == "WORD" else location + 1
+        references = {}
+        for reference in expression.references:
+            symbol_info = self.extref_table.get(reference.name)
+            if symbol_info is not None and symbol_info.addr is not None:
+                references.setdefault(reference.name, reference)
+        if len(references) > 1:
+            #! 同一運算式有多個外部參考時，依 EXTREF 宣告順序輸出
+            order = self._extref_order()
+            references = dict(sorted(references.items(), key=lambda item: order[item[0]]))
+        for symbol, reference in references.items():
+            # 如果不存在相同的修改紀錄，則創建新的（修改紀錄表以 (location, reference) 去除重複）
+            if (record_location, symbol) not in self.modification_records:
+                self._add_modification_record(ModificationRecord(record_location, 6 if mnemonic == "WORD" else 5, reference.sign, symbol))
+
+    def _extref_order(self) -> Dict[str, int]:
+        """EXTREF 符號的宣告順序（EXTREF table 改變時才重新建立）"""
+        if len(self._extref_positions) != len(self.extref_table):
+            self._extref_positions = {name: position for position, name in enumerate(self.extref_table)}
+        return self._extref_positions
+
+    def _evaluate_expression(self, operand: str, mnemonic: str) -> Optional[ExpressionValue]:
         """
-        計算運算式的值
+        計算運算式的值（含 absolute/relative 資訊），無法計算時回傳 None
         """
-        if operand == "*":
-            operand = str(self.current_location)
-            return self.current_location
         try:
-            # 替換符號為其值
-            for symbol, symbol_info in self.symbol_table.items():
-                if symbol in operand and symbol_info.addr is not None: #! 如果 operand 本身是符號，則替換為其值
-                    #? operand 會被透過 symbol table 的對應替換成 address，以讓 eval 可以正常運作
-                    operand = operand.replace(symbol, str(symbol_info.addr)) #? Ex: operand = "BUFFER + LENGTH" -> operand = "1000 + 100"
-
-            self._makeModificationRecord(operand, mnemonic, self.current_location)
+            expression = compile_expression(operand)
+        except ExpressionError:
+            return None
+        #! 外部參考的修改紀錄不需要等符號解析完成
+        self._add_expression_modification_records(expression, mnemonic, self.current_location)
+        try:
+            return expression.evaluate(self.symbol_table, self.current_location)
+        except ExpressionError:
+            return None
 
-            return eval(operand)
-        except:
-            return 0
+    def _evaluate_operand(self, operand: str, mnemonic: str) -> int:
+        """
+        計算運算式的值
+        """
+        result = self._evaluate_expression(operand, mnemonic)
+        return result.value if result is not None else 0
     
     def _makeMrecordSure(self, operand: str, mnemonic: str, location: int) -> None:
         """
-        計算運算式的值
+        確認運算元中的外部參考都有對應的修改紀錄
         """
-        # 替換符號為其值
-        for symbol, symbol_info in self.symbol_table.items():
-            if symbol in operand and symbol_info.addr is not None: #! 如果 operand 本身是符號，則替換為其值
-                #? operand 會被透過 symbol table 的對應替換成 address，以讓 eval 可以正常運作
-                operand = operand.replace(symbol, str(symbol_info.addr)) #? Ex: operand = "BUFFER + LENGTH" -> operand = "1000 + 100"
-
         self._makeModificationRecord(operand, mnemonic, location)
     
     def _update_location_counter(self, instruction: Instruction) -> None:
@@ -155,10 +196,6 @@ class Section:
             self.current_location += 3
         elif instruction.mnemonic == "RSUB": #! 固定使用 3 bytes
             self.current_location += 3
-        elif instruction.mnemonic == "ORG":
-            result = self._evaluate_operand(instruction.operand, instruction.mnemonic)
-            if result != 0:
-                self.current_location = result
         elif instruction.formatType > 0:  #! 一般指令
             self.current_location += instruction.formatType
     
@@ -175,7 +212,10 @@ class Section:
         - 支援的格式包括 =C'...' 和 =X'...'
         - 字面值會被轉換為 BYTE 指令
         """
-        #! 處理帶有 = 前綴的字面值運算元（例如：=C'EOF'）
+        #! 單次串流改寫：產生新的指令列表，literal 的 BYTE 指令直接放在 LTORG/END 之前
+        #? 每個指令的 index 加上前面已插入的 literal 數量，不需要逐一往後重新編號
+        expanded: List[Instruction] = []
+        shift = 0
         for index, instruction in enumerate(self.instructions):
             if instruction.operand != "" and instruction.mnemonic != "LTORG" and instruction.mnemonic != "END":
                 # 處理 * mnemonic 的特殊情況
@@ -187,32 +227,32 @@ class Section:
                     try:
                         instruction.operand = self.literal_pool.add_literal(instruction.operand)
                     except ValueError as e:
-                        print(f"Warning: Invalid literal format at instruction {index}: {e}")
+                        logger.warning("Invalid literal format at instruction %d: %s", index, e)
 
             # 處理 LTORG 和 END
             #? 在遇到 LTORG 或 END 指令時，將收集到的字面值轉換為 BYTE 指令
             elif instruction.mnemonic in ("LTORG", "END"):
-                # 獲取當前的 literal table
-                current_literals_table = self.literal_pool.get_current_literals()
-                
                 # 為每個 literal 創建指令
-                for literal in reversed(current_literals_table):
-                    literal_instruction = Instruction(
-                        index=index, #! LTORG 後面
+                for literal in self.literal_pool.get_current_literals():
+                    expanded.append(Instruction(
+                        index=instruction.index + shift, #! LTORG 前面
                         formatType=0,
                         symbol=literal.name,
                         mnemonic="BYTE",
                         operand=literal.data,
                         objectCode="",
                         location=None,
-                    )
-                    self.instructions.insert(index, literal_instruction)
-                    # 更新後續指令的索引
-                    for i in range(index + 1, len(self.instructions)):
-                        self.instructions[i].index += 1
+                        line=instruction.line,
+                    ))
+                    shift += 1
                 # 清空當前的 literal table
                 self.literal_pool.clear_table()
 
+            instruction.index += shift
+            expanded.append(instruction)
+
+        self.instructions = expanded
+
     def _process_program_block(self) -> None:
         """處理 program block"""
         """
@@ -239,8 +279,9 @@ class Section:
                     if current_block not in blocks_permutation:
                         blocks_permutation.append(current_block)
                 case "CSECT":
-                    blocks.setdefault(instruction.symbol, [])
-                    current_block = instruction.symbol
+                    default_block = instruction.symbol #! CSECT 內不帶 operand 的 USE 回到 section 本身的 block
+                    blocks.setdefault(default_block, [])
+                    current_block = default_block
                     if current_block not in blocks_permutation:
                         blocks_permutation.append(current_block)
                 case "END":
@@ -275,9 +316,11 @@ class Section:
                 raise ValueError(f"Error while calculating max index: {e}")
 
     def _process_symbol(self) -> None:
-        """處理符號（建立 SYMTAB 和 EXTDEF 和 EXTREF，設定 addr）"""
+        """處理符號（建立 SYMTAB 和 EXTDEF 和 EXTREF 與交叉參考索引，設定 addr）"""
         #! 初始化 symbol table
+        xref = self.xref
         for instruction in self.instructions:
+            xref.add(instruction)
             if instruction.symbol:
                 self.symbol_table[instruction.symbol] = Symbol(name=instruction.symbol, addr=None, is_external=False)
             match instruction.mnemonic:
@@ -293,56 +336,168 @@ class Section:
                         for symbol_name in instruction.operand.split(",")
                     })
             
-        while any(symbol.addr is None for symbol in self.symbol_table.values()):
-            self.current_location = 0 #! initial 0
-            for instruction in self.instructions:
-                if instruction.symbol != "":
-                    self.symbol_table[instruction.symbol].addr = self.current_location
-                    if instruction.symbol in self.extdef_table:
-                        self.extdef_table[instruction.symbol].addr = self.current_location
-                        
-                if instruction.mnemonic == "START":
-                    self.current_location = int(instruction.operand, 16)
-                    self.symbol_table[instruction.symbol].addr = self.current_location
-                elif instruction.mnemonic == "RESW":
-                    self.symbol_table[instruction.symbol].addr = self.current_location
-                    self._update_location_counter(instruction)
-                elif instruction.mnemonic == "RESB":
-                    self.symbol_table[instruction.symbol].addr = self.current_location
-                    self._update_location_counter(instruction)
-                elif instruction.mnemonic == "BYTE":
-                    self.symbol_table[instruction.symbol].addr = self.current_location
-                    self._update_location_counter(instruction)
-                elif instruction.mnemonic == "WORD":
-                    self._update_location_counter(instruction) #! Already set symbol talbe in there
-                elif instruction.mnemonic == "EQU":
-                    result = self._evaluate_operand(instruction.operand, instruction.mnemonic)
-                    if result != 0:
-                        self.symbol_table[instruction.symbol].addr = result
-                        instruction.location = Location(result, is_relative=False)
-                elif instruction.mnemonic == "RSUB":
+        #! 單次線性掃描：能立即計算的位址直接設定，其餘（forward reference）加入相依圖
+        graph = SymbolGraph()
+        anchors: Dict[str, int] = {}        #! location counter 錨點（ORG/RESW/RESB 無法立即計算時建立）的值
+        anchor: Optional[str] = None        #! 目前 location counter 依附的錨點，None 表示 current_location 為實際位址
+        saved: Optional[Tuple[Optional[str], int]] = None #! 有運算元的 ORG 之前的 (錨點, location counter)，沒有運算元的 ORG 還原
+        base_instructions: List[Instruction] = []
+        self.current_location = 0
+
+        for instruction in self.instructions:
+            mnemonic = instruction.mnemonic
+            if mnemonic == "START":
+                anchor, self.current_location = None, int(instruction.operand, 16)
+            elif mnemonic == "CSECT":
+                anchor, self.current_location = None, 0
+
+            if instruction.symbol != "" and mnemonic != "EQU":
+                self._define_symbol(graph, anchors, instruction, anchor, self.current_location)
+
+            match mnemonic:
+                case "EQU":
+                    self._process_equ(graph, anchors, instruction, anchor, self.current_location)
+                case "ORG" if not instruction.operand:
+                    if saved is None:
+                        raise ValueError(f"In line {instruction.line}, ORG without operand has no location counter to restore")
+                    anchor, self.current_location = saved #! 仍依附錨點時，之後的標籤經由相依圖解析
+                case "RESW" | "RESB" | "ORG":
+                    if mnemonic == "ORG":
+                        saved = (anchor, self.current_location)
+                    anchor = self._process_location_directive(graph, anchors, instruction, anchor, self.current_location)
+                case "BASE":
+                    base_instructions.append(instruction)
+                case "RSUB":
                     instruction.operand = "#0"
-                    self._update_location_counter(instruction) #! Don't need to set symbol table
-                elif instruction.mnemonic == "BASE":
-                    result = self._evaluate_operand(instruction.operand, instruction.mnemonic)
-                    if result != 0:
-                        self.base_register_value = result
-                        instruction.operand = result
-                elif instruction.mnemonic == "CSECT":
-                    self.current_location = 0
-                    self.symbol_table[instruction.symbol].addr = self.current_location
-                elif instruction.mnemonic == "ORG":
-                    result = self._evaluate_operand(instruction.operand, instruction.mnemonic)
-                    if result != 0:
-                        self.current_location = result
-                        instruction.operand = result
-                elif instruction.formatType > 0:
+                    self.current_location += 3
+                case "WORD":
+                    self.current_location += 3 #! 修改紀錄在 _calculate_address 位址確定後產生
+                case "BYTE":
+                    self._update_location_counter(instruction)
+                case _ if instruction.formatType > 0:
                     self._update_location_counter(instruction) #! Normal instruction for format 1 - 4
+
+        #! 依拓撲順序解析 forward reference，循環相依會以 CircularReferenceError 回報
+        graph.resolve()
+
+        for instruction in base_instructions:
+            result = self._try_evaluate(instruction.operand, instruction.location.address if instruction.location else 0)
+            if result is not None:
+                self.base_register_value = result.value
+
+        for name, symbol in self.extdef_table.items():
+            if name in self.symbol_table:
+                symbol.addr = self.symbol_table[name].addr
         self.current_location = 0
+
+    def _try_evaluate(self, operand: str, location: int) -> Optional[ExpressionValue]:
+        """計算運算式但不產生修改紀錄，無法計算時回傳 None"""
+        try:
+            return compile_expression(operand).evaluate(self.symbol_table, location)
+        except ExpressionError:
+            return None
+
+    def _define_symbol(self, graph: SymbolGraph, anchors: Dict[str, int], instruction: Instruction,
+                       anchor: Optional[str], offset: int) -> None:
+        """將標籤定義在目前的 location counter（若依附錨點則加入相依圖）"""
+        symbol = self.symbol_table[instruction.symbol]
+        symbol.is_relative = True
+        if anchor is None:
+            symbol.addr = offset
+            graph.discard(symbol.name)
+            return
+        symbol.addr = None
+        def resolve() -> None:
+            symbol.addr = anchors[anchor] + offset
+        graph.add(symbol.name, instruction, (anchor,), resolve)
+
+    def _process_equ(self, graph: SymbolGraph, anchors: Dict[str, int], instruction: Instruction,
+                     anchor: Optional[str], offset: int) -> None:
+        """處理 EQU：可立即計算則設定符號，否則依其引用的符號加入相依圖"""
+        try:
+            expression = compile_expression(instruction.operand)
+        except ExpressionError as e:
+            logger.warning("In line %s, invalid EQU expression '%s': %s", instruction.line, instruction.operand, e)
+            self._define_symbol(graph, anchors, instruction, anchor, offset)
+            return
+        symbol = self.symbol_table[instruction.symbol]
+
+        def assign(location: int) -> None:
+            try:
+                result = expression.evaluate(self.symbol_table, location)
+            except ExpressionError as e:
+                #! 無法計算時沿用目前的 location counter
+                logger.warning("In line %s, cannot evaluate EQU '%s': %s", instruction.line, instruction.operand, e)
+                symbol.addr, symbol.is_relative = location, True
+                return
+            symbol.addr, symbol.is_relative = result.value, result.is_relative
+            instruction.location = Location(result.value, is_relative=result.is_relative)
+
+        if anchor is None or not expression.uses_location:
+            try:
+                result = expression.evaluate(self.symbol_table, offset)
+            except UnresolvedSymbolError:
+                pass
+            else:
+                symbol.addr, symbol.is_relative = result.value, result.is_relative
+                instruction.location = Location(result.value, is_relative=result.is_relative)
+                graph.discard(symbol.name)
+                return
+
+        symbol.addr = None
+        dependencies = expression.symbols + ((anchor,) if anchor is not None and expression.uses_location else ())
+        graph.add(symbol.name, instruction, dependencies,
+                  lambda: assign(anchors.get(anchor, 0) + offset if anchor is not None else offset))
+
+    def _process_location_directive(self, graph: SymbolGraph, anchors: Dict[str, int], instruction: Instruction,
+                                    anchor: Optional[str], offset: int) -> Optional[str]:
+        """
+        處理 RESW/RESB/ORG 對 location counter 的影響
+        可立即計算時直接更新 current_location，否則建立新的錨點並回傳其名稱
+        """
+        mnemonic = instruction.mnemonic
+        try:
+            expression = compile_expression(instruction.operand)
+        except ExpressionError as e:
+            raise ValueError(f"In line {instruction.line}, invalid {mnemonic} operand '{instruction.operand}': {e}") from e
+
+        def apply(result: ExpressionValue, base: int) -> int:
+            if mnemonic == "ORG":
+                return result.value
+            if result.value < 0:
+                raise ValueError(f"{mnemonic} cannot reserve negative space: {result.value} (line {instruction.line})")
+            return base + result.value * (3 if mnemonic == "RESW" else 1)
+
+        if anchor is None or not expression.uses_location:
+            try:
+                result = expression.evaluate(self.symbol_table, offset)
+            except UnresolvedSymbolError:
+                pass
+            else:
+                self.current_location = apply(result, offset)
+                return None if mnemonic == "ORG" else anchor
+
+        #! 建立新的錨點：其值在相依的符號解析後才計算
+        new_anchor = f"*{instruction.index}" #! `*` 不會出現在符號名稱中
+        previous = anchor
+        def resolve() -> None:
+            base = anchors.get(previous, 0) + offset if previous is not None else offset
+            try:
+                result = expression.evaluate(self.symbol_table, base)
+            except ExpressionError as e:
+                raise ValueError(f"In line {instruction.line}, cannot evaluate {mnemonic} '{instruction.operand}': {e}") from e
+            anchors[new_anchor] = apply(result, base)
+        #! ORG 的新位址只有在引用 `*` 時才與前一個錨點有關
+        depends_on_previous = previous is not None and (mnemonic != "ORG" or expression.uses_location)
+        dependencies = expression.symbols + ((previous,) if depends_on_previous else ())
+        graph.add(new_anchor, instruction, dependencies, resolve)
+        self.current_location = 0
+        return new_anchor
     
     def _calculate_address(self) -> None:
         """計算每個指令的地址"""
         self.current_location = 0
+        saved: Optional[int] = None #! 有運算元的 ORG 之前的 location counter
         for instruction in self.instructions:
             # 判斷是否為相對定址
             # is_relative_for_current_instruction = (
@@ -362,7 +517,14 @@ class Section:
                 self.current_location = 0
                 instruction.location = Location(0, is_relative=False)
             elif instruction.mnemonic == "WORD":
+                self._makeModificationRecord(instruction.operand, instruction.mnemonic, self.current_location)
                 self.current_location += 3
+            elif instruction.mnemonic == "ORG":
+                if instruction.operand:
+                    saved = self.current_location
+                    self.current_location = self._evaluate_operand(instruction.operand, instruction.mnemonic)
+                elif saved is not None: #! 沒有可還原的值時 _process_symbol 已回報錯誤
+                    self.current_location = saved
             else:
                 self._update_location_counter(instruction)
     
@@ -379,7 +541,7 @@ class Section:
         self.instructions.sort(key=lambda x: x.index)
         
     def _generate_object_code(self) -> None:
-        generator = ObjectCodeGenerator(self)
+        generator = ObjectCodeGenerator(self, self.options)
         base_value = 0
         
         for instruction in self.instructions:
@@ -389,71 +551,71 @@ class Section:
                 generator.set_base_value(base_value)
                 continue #! Don't need to generate object code
             
-            if config.bonus:
-                if instruction.operand != "*":
-                    if instruction.mnemonic == "WORD":
-                        self._makeMrecordSure(instruction.operand, instruction.mnemonic, instruction.location.address)
-                    elif instruction.mnemonic in self.opcode_table:
-                        if instruction.formatType == 3 or instruction.formatType == 4:
-                            if ",X" in instruction.operand:
-                                self.x_directive_mode[instruction.mnemonic + instruction.operand[:-2]] = True
-                            else:
-                                self.x_directive_mode[instruction.mnemonic + instruction.operand[:-2]] = False
-                            if "," in instruction.operand:
-                                instruction.operand = instruction.operand[:-2]
-                            if instruction.operand.startswith("#") or instruction.operand.startswith("@"):
-                                self._makeMrecordSure(instruction.operand[1:], instruction.mnemonic, instruction.location.address)
-                            else:
-                                self._makeMrecordSure(instruction.operand, instruction.mnemonic, instruction.location.address)
+            if self.options.bonus:
+                self._prepare_operand(instruction)
 
             #! Generate object code
             instruction.objectCode = generator.generateOpCode(instruction, instruction.location)
+
+    def _prepare_operand(self, instruction: Instruction) -> None:
+        """bonus 模式產生目標碼前的處理：記錄 ,X 定址並從運算元移除、確認外部參考的修改紀錄"""
+        if instruction.operand == "*":
+            return
+        if instruction.mnemonic == "WORD":
+            self._makeMrecordSure(instruction.operand, instruction.mnemonic, instruction.location.address)
+        elif instruction.mnemonic in self.opcode_table:
+            if instruction.formatType == 3 or instruction.formatType == 4:
+                if ",X" in instruction.operand:
+                    self.x_directive_mode[instruction.mnemonic + instruction.operand[:-2]] = True
+                else:
+                    self.x_directive_mode[instruction.mnemonic + instruction.operand[:-2]] = False
+                if "," in instruction.operand:
+                    instruction.operand = instruction.operand[:-2]
+                if instruction.operand.startswith("#") or instruction.operand.startswith("@"):
+                    self._makeMrecordSure(instruction.operand[1:], instruction.mnemonic, instruction.location.address)
+                else:
+                    self._makeMrecordSure(instruction.operand, instruction.mnemonic, instruction.location.address)
         
-    def pass1(self) -> None:
-        """第一次掃描"""
-        if config.bonus:
-            print('-' * 25)
-            print('Process Literal Pool')
-            self._process_literal_pool()
+    def pass1(self, profiler: Optional[Profiler] = None) -> None:
+        """第一次掃描（profiler 不為 None 時量測每個步驟，每個步驟以 DEBUG 層級記錄）"""
+        if self.options.bonus:
+            logger.debug("Process Literal Pool")
+            with profile_phase(profiler, LITERAL_POOL, self.name):
+                self._process_literal_pool()
             # analyzer = Analyzer(self)
             # analyzer.analyze("LITTAB") #! print on console
-            print('Process Literal Pool completed')
-            print('-' * 25)
     
-            print('Process Program Block')
-            self._process_program_block()
-            print('Process Program Block completed')
-            print('-' * 25)
+            logger.debug("Process Program Block")
+            with profile_phase(profiler, PROGRAM_BLOCK, self.name):
+                self._process_program_block()
         
-        print('Set symbol table')
-        self._process_symbol()
+        logger.debug("Set symbol table")
+        with profile_phase(profiler, SYMBOL_TABLE, self.name):
+            self._process_symbol()
         # analyzer = Analyzer(self)
         # analyzer.analyze("SYMTAB") #! print on console
-        print('Set symbol table completed')
-        print('-' * 25)
         
-        print('Calculate address of each instruction')
-        self._calculate_address()
-        print('Calculate address completed')
-        print('-' * 25)
+        logger.debug("Calculate address of each instruction")
+        with profile_phase(profiler, ADDRESS, self.name):
+            self._calculate_address()
         
-        if config.bonus:
-            print('Set external defintion location')
-            self._set_external_definition_location()
-            print('Set external defintion location completed')
+        if self.options.bonus:
+            logger.debug("Set external defintion location")
+            with profile_phase(profiler, EXTERNAL_DEFINITIONS, self.name):
+                self._set_external_definition_location()
             # analyzer = Analyzer(self)
             # analyzer.analyze("EXTREF") #! print on console
             # analyzer.analyze("EXTDEF")
 
-    def pass2(self) -> None:
-        """第二次掃描"""
-        if config.bonus:
-            print('Reorder instruction')
-            self._reorder_index()
-            print('Reorder instruction completed')
-        print('Generate object code for each instruction')
-        self._generate_object_code()
+    def pass2(self, profiler: Optional[Profiler] = None) -> None:
+        """第二次掃描（profiler 不為 None 時量測每個步驟，每個步驟以 DEBUG 層級記錄）"""
+        if self.options.bonus:
+            logger.debug("Reorder instruction")
+            with profile_phase(profiler, REORDER, self.name):
+                self._reorder_index()
+        logger.debug("Generate object code for each instruction")
+        with profile_phase(profiler, OBJECT_CODE, self.name):
+            self._generate_object_code()
         # analyzer = Analyzer(self)
         # analyzer.analyze("MODREC") #! print on console
         # analyzer.analyze("INSTR") #! print on console
-        print('Generate object code completed')
@@ -0,0 +1,93 @@
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..models.dataTypes import Instruction
+
+
+class CircularReferenceError(ValueError):
+    """符號定義之間存在循環相依"""
+
+
+class _Node:
+    __slots__ = ("key", "instruction", "dependencies", "resolve")
+
+    def __init__(self, key: str, instruction: Optional[Instruction], dependencies: Tuple[str, ...], resolve: Callable[[], None]):
+        self.key = key
+        self.instruction = instruction
+        self.dependencies = dependencies
+        self.resolve = resolve
+
+
+class SymbolGraph:
+    """
+    尚未解析的符號（EQU）與 location counter 錨點（ORG/RESW/RESB）的相依圖
+    1. pass 1 線性掃描時，無法立即計算的定義以節點加入
+    2. 掃描結束後依拓撲順序呼叫每個節點的 resolve，總成本 O(n + e)
+    3. 若有循環相依，回報循環路徑與行號
+    """
+    def __init__(self):
+        self._nodes: Dict[str, _Node] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._nodes
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def add(self, key: str, instruction: Optional[Instruction], dependencies: Iterable[str], resolve: Callable[[], None]) -> None:
+        """加入（或取代）一個節點，dependencies 為它引用的符號/錨點名稱"""
+        self._nodes[key] = _Node(key, instruction, tuple(dependencies), resolve)
+
+    def discard(self, key: str) -> None:
+        """符號被重新定義為已知值時移除節點"""
+        self._nodes.pop(key, None)
+
+    def resolve(self) -> None:
+        """依拓撲順序解析所有節點（Kahn's algorithm）"""
+        nodes = self._nodes
+        pending: Dict[str, int] = {}
+        dependents: Dict[str, List[str]] = {}
+        for key, node in nodes.items():
+            #! 只有圖中的名稱才是邊，其餘符號已解析或未定義（由 resolve 自行處理）
+            edges = {dependency for dependency in node.dependencies if dependency in nodes and dependency != key}
+            pending[key] = len(edges) + (key in node.dependencies)
+            for dependency in edges:
+                dependents.setdefault(dependency, []).append(key)
+
+        ready = deque(key for key, count in pending.items() if count == 0)
+        while ready:
+            key = ready.popleft()
+            nodes[key].resolve()
+            del pending[key]
+            for dependent in dependents.get(key, ()):
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    ready.append(dependent)
+
+        if pending:
+            raise CircularReferenceError(self._describe_cycle(pending))
+        self._nodes = {}
+
+    def _describe_cycle(self, remaining: Dict[str, int]) -> str:
+        """從未解析的節點中找出一個循環並格式化為錯誤訊息"""
+        nodes = self._nodes
+        #! 剩下的節點都在循環上或相依於循環，沿著仍未解析的相依往回走必定會回到走過的節點
+        key = next(iter(remaining))
+        path: List[str] = []
+        seen: Dict[str, int] = {}
+        while key not in seen:
+            seen[key] = len(path)
+            path.append(key)
+            key = next(dependency for dependency in nodes[key].dependencies if dependency in remaining)
+        cycle = path[seen[key]:] + [key]
+        return "Circular symbol definition: " + " -> ".join(self._describe_node(nodes[name]) for name in cycle)
+
+    @staticmethod
+    def _describe_node(node: _Node) -> str:
+        instruction = node.instruction
+        if instruction is None:
+            return node.key
+        #! 錨點節點以指令本身描述，符號節點以符號名稱描述
+        label = f"{instruction.mnemonic} {instruction.operand}" if node.key.startswith("*") else node.key
+        line = instruction.line if instruction.line is not None else instruction.index
+        return f"{label} (line {line})"
@@ -0,0 +1,345 @@
+import bisect
+import io
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, TextIO, Tuple, Union
+
+from config import REGISTER_TABLE, opcode_table
+from .io.writer import ObjectFileWriter
+from .models.dataTypes import AssemblerOptions, ObjectModule
+
+#! 反向索引：opcode -> mnemonic、暫存器編號 -> 名稱
+MNEMONICS = {entry.opcode: mnemonic for mnemonic, entry in opcode_table.items()}
+REGISTER_NAMES = {number: name for name, number in REGISTER_TABLE.items()}
+
+
+def _build_opcode_lookup() -> Tuple[Optional[Tuple[str, int]], ...]:
+    """
+    以目標碼的第一個 byte 直接查表的 256 個項目：(mnemonic, format)，不是合法指令時為 None
+    format 1/2 的 byte 必須等於 opcode，format 3/4 忽略最低 2 位元（n、i）
+    """
+    lookup: List[Optional[Tuple[str, int]]] = []
+    for value in range(256):
+        mnemonic = MNEMONICS.get(value & 0xFC)
+        entry = opcode_table[mnemonic] if mnemonic is not None else None
+        if entry is None or (entry.format in (1, 2) and value & 0x03):
+            lookup.append(None)
+        else:
+            lookup.append((mnemonic, entry.format))
+    return tuple(lookup)
+
+
+OPCODE_LOOKUP = _build_opcode_lookup()
+
+#! 只有一個暫存器運算元的 format 2 指令（r2 為 0 時省略）
+_SINGLE_REGISTER = frozenset(("CLEAR", "TIXR", "SVC"))
+
+#! 每一行 BYTE 最多的 bytes 數
+BYTES_PER_LINE = 16
+
+
+class Statement(NamedTuple):
+    """反組譯出的一個敘述
+    address: 位址
+    size: 目標碼的 bytes 數
+    mnemonic: 指令（format 4 含 '+'）或 WORD
+    operand: 運算元，'{}' 的位置填入 target 的 label
+    target: 運算元引用的位址（沒有時為 None）
+    """
+    address: int
+    size: int
+    mnemonic: str
+    operand: str
+    target: Optional[int] = None
+
+
+class Disassembler:
+    """
+    把 object program（ObjectModule）還原成可以再組譯的原始碼
+    - 以 256 個項目的 OPCODE_LOOKUP 解碼 T 記錄的每個 byte，format 3/4 依 nixbpe 還原 #、@、,X 與 PC/base-relative 的目標位址
+    - LDB #label 之後加上 BASE，之後的 base-relative 指令才能以 label 表示
+    - M 記錄決定 format 4 的外部符號（R 記錄）與 WORD 的運算式，D 記錄的符號與 control section 名稱作為 label，其餘目標位址產生 L<位址> label
+    - 只有重新組譯後會得到相同目標碼的解碼結果才輸出為指令（ObjectCodeGenerator 的編碼方式：先 PC-relative 再 base-relative、
+      #數字 不使用相對定址），其餘 bytes 以 BYTE 輸出，T 記錄之間的空間以 RESB 輸出
+    """
+    def iter_source(self, modules: Iterable[ObjectModule]) -> Iterator[str]:
+        """逐行產生原始碼，一次只處理一個 control section"""
+        entry: Optional[str] = None
+        for index, module in enumerate(modules):
+            label = None
+            for line in self._disassemble_module(module, index == 0):
+                if isinstance(line, tuple): #! 進入點的 label（END 在整個程式的最後）
+                    label = line[0]
+                    continue
+                yield line
+            if entry is None and module.entry is not None:
+                entry = label
+        yield f"\tEND\t{entry}" if entry else "\tEND"
+
+    def disassemble(self, modules: Iterable[ObjectModule]) -> str:
+        return "\n".join(self.iter_source(modules)) + "\n"
+
+    def write(self, modules: Iterable[ObjectModule], output: TextIO) -> None:
+        for line in self.iter_source(modules):
+            output.write(line + "\n")
+
+    #! 解碼
+    def _disassemble_module(self, module: ObjectModule, first: bool) -> Iterator[Union[str, Tuple[str]]]:
+        start, end = module.start, module.start + module.length
+        runs = _merge_text(module.text)
+        formats4: Dict[int, List[Tuple[str, str]]] = {} #! 指令位址 -> M 記錄的 (正負號, 符號)
+        words: Dict[int, List[Tuple[str, str]]] = {}
+        for record in module.modifications:
+            if record.length == 5:
+                formats4.setdefault(record.location - 1, []).append((record.sign, record.reference))
+            elif record.length == 6:
+                words.setdefault(record.location, []).append((record.sign, record.reference))
+        symbols: Set[int] = set(module.definitions.values()) #! 一定要有 label 的位址
+        if module.entry is not None:
+            symbols.add(module.entry)
+        anchors = {address for address, _ in runs} | formats4.keys() | words.keys() | symbols #! 一定是敘述開頭的位址
+
+        statements: Dict[int, Statement] = {}
+        bases: Dict[int, Statement] = {} #! 位址 -> 在該位址之前輸出的 BASE
+        base: Optional[int] = None
+        for run_start, code in runs:
+            pc, run_end = run_start, run_start + len(code)
+            while pc < run_end:
+                offset = pc - run_start
+                if pc in words and pc + 3 <= run_end:
+                    operand, target = _relocated(int.from_bytes(code[offset:offset + 3], "big"), words[pc], 24)
+                    statements[pc] = Statement(pc, 3, "WORD", operand, target)
+                    pc += 3
+                    continue
+                statement = self._decode(code, offset, pc, formats4.get(pc), base, start, end)
+                if statement is None or any(address in anchors for address in range(pc + 1, pc + statement.size)):
+                    pc += 1
+                    continue
+                statements[pc] = statement
+                pc += statement.size
+                if statement.mnemonic.lstrip("+") == "LDB" and statement.operand.startswith("#") and "," not in statement.operand:
+                    base = statement.target if statement.target is not None else int(statement.operand[1:])
+                    bases[pc] = Statement(pc, 0, "BASE", statement.operand[1:], statement.target)
+
+        #! 目標位址落在指令中間時（資料被解碼成指令），該指令改以 BYTE 輸出
+        while True:
+            targets = {s.target for s in statements.values() if s.target is not None}
+            targets.update(s.target for s in bases.values() if s.target is not None)
+            targets.update(symbols)
+            order = sorted(statements)
+            inner = {}
+            for target in targets:
+                index = bisect.bisect_right(order, target) - 1
+                if index >= 0 and order[index] < target < order[index] + statements[order[index]].size:
+                    inner[target] = order[index]
+            #! 有 M 記錄的 format 4 與 WORD 一定是原本的敘述，以 label+位移 表示
+            removable = [address for address in inner.values() if address not in formats4 and address not in words]
+            if not removable:
+                break
+            for address in removable:
+                statements.pop(address, None)
+
+        #! Label
+        used = set(module.references) | {module.name}
+        names: Dict[int, List[str]] = {start: [module.name]}
+        for name, address in module.definitions.items():
+            if address not in inner:
+                names.setdefault(address, []).append(name)
+            used.add(name)
+        for target in sorted(targets - inner.keys()):
+            if target not in names:
+                label = f"L{target:04X}"
+                while label in used:
+                    label += "X"
+                used.add(label)
+                names[target] = [label]
+        for target, address in inner.items():
+            names.setdefault(address, [f"L{address:04X}"])
+
+        def label_of(target: int) -> str:
+            if target in inner:
+                return f"{names[inner[target]][0]}+{target - inner[target]}"
+            return names[target][0]
+
+        #! 輸出
+        yield f"{module.name}\tSTART\t{start:X}" if first else f"{module.name}\tCSECT"
+        if module.definitions:
+            yield f"\tEXTDEF\t{','.join(module.definitions)}"
+        if module.references:
+            yield f"\tEXTREF\t{','.join(module.references)}"
+        for name in names[start][1:]:
+            yield f"{name}\tEQU\t*"
+        boundaries = sorted(set(names) | set(statements) | set(bases) | {address for run in runs for address in (run[0], run[0] + len(run[1]))} | {end})
+        run_starts = [address for address, _ in runs]
+        pc = start
+        while pc < end:
+            if pc in bases:
+                yield _format(bases[pc], "", label_of)
+            labels = names.get(pc, ()) if pc != start else ("",)
+            for name in labels[1:]:
+                yield f"{name}\tEQU\t*"
+            label = labels[0] if labels else ""
+            statement = statements.get(pc)
+            if statement is not None:
+                yield _format(statement, label, label_of)
+                pc += statement.size
+                continue
+            stop = boundaries[bisect.bisect_right(boundaries, pc)]
+            index = bisect.bisect_right(run_starts, pc) - 1
+            if index >= 0 and pc < runs[index][0] + len(runs[index][1]):
+                stop = min(stop, pc + BYTES_PER_LINE)
+                offset = pc - runs[index][0]
+                yield f"{label}\tBYTE\tX'{runs[index][1][offset:offset + stop - pc].hex().upper()}'"
+            else:
+                yield f"{label}\tRESB\t{stop - pc}"
+            pc = stop
+        if pc in bases:
+            yield _format(bases[pc], "", label_of)
+        for name in names.get(end, ()) if end != start else ():
+            yield f"{name}\tEQU\t*"
+        for name, address in module.definitions.items():
+            if address in inner:
+                yield f"{name}\tEQU\t{label_of(address)}"
+        if module.entry is not None:
+            yield (label_of(module.entry),)
+
+    def _decode(self, code: bytes, offset: int, pc: int, references: Optional[List[Tuple[str, str]]],
+                base: Optional[int], start: int, end: int) -> Optional[Statement]:
+        """解碼 pc 的指令，無法以原始碼重現相同的目標碼時回傳 None"""
+        info = OPCODE_LOOKUP[code[offset]]
+        if info is None:
+            return None
+        mnemonic, format_type = info
+        if format_type == 1:
+            return Statement(pc, 1, mnemonic, "") if references is None else None
+        if offset + 2 > len(code) or references is not None and format_type == 2:
+            return None
+        second = code[offset + 1]
+        if format_type == 2:
+            r1, r2 = REGISTER_NAMES.get(second >> 4), REGISTER_NAMES.get(second & 0x0F)
+            if r1 is None or r2 is None:
+                return None
+            return Statement(pc, 2, mnemonic, r1 if mnemonic in _SINGLE_REGISTER and not second & 0x0F else f"{r1},{r2}")
+
+        first = code[offset]
+        ni = first & 0x03
+        if ni == 0 or offset + 3 > len(code): #! SIC 格式（n = i = 0）不會由 ObjectCodeGenerator 產生
+            return None
+        prefix = ("", "#", "@", "")[ni]
+        suffix = ",X" if second & 0x80 else ""
+        if mnemonic == "RSUB": #! RSUB 固定編碼為 4F0000
+            return Statement(pc, 3, mnemonic, "") if first == 0x4F and second == 0 and code[offset + 2] == 0 and references is None else None
+        if second & 0x10: #! Format 4：b = p = 0，n = i = 1 時一定有 M 記錄
+            if second & 0x60 or offset + 4 > len(code) or (references is None and ni == 3):
+                return None
+            address = ((second & 0x0F) << 16) | (code[offset + 2] << 8) | code[offset + 3]
+            if references is None:
+                return Statement(pc, 4, "+" + mnemonic, f"{prefix}{address}{suffix}")
+            operand, target = _relocated(address, references, 20)
+            if target is not None and not start <= target <= end:
+                return None
+            return Statement(pc, 4, "+" + mnemonic, prefix + operand + suffix, target)
+        if references is not None:
+            return None
+        disp = ((second & 0x0F) << 8) | code[offset + 2]
+        relative = second & 0x60
+        if relative == 0: #! #數字：不使用相對定址，位移最多 11 位元
+            return Statement(pc, 3, mnemonic, f"#{disp}{suffix}") if ni == 1 and disp <= 0x7FF else None
+        if relative == 0x20:
+            target = pc + 3 + (disp - 0x1000 if disp & 0x800 else disp)
+        elif relative == 0x40 and base is not None:
+            target = base + disp
+            if -2048 <= target - (pc + 3) <= 2047: #! 在 PC-relative 的範圍內時組譯器不會使用 base-relative
+                return None
+        else:
+            return None
+        if not start <= target <= end:
+            return None
+        return Statement(pc, 3, mnemonic, prefix + "{}" + suffix, target)
+
+
+def _format(statement: Statement, label: str, label_of) -> str:
+    operand = statement.operand.format(label_of(statement.target)) if statement.target is not None else statement.operand
+    return f"{label}\t{statement.mnemonic}\t{operand}" if operand else f"{label}\t{statement.mnemonic}"
+
+
+def _relocated(value: int, references: List[Tuple[str, str]], bits: int) -> Tuple[str, Optional[int]]:
+    """
+    由 M 記錄還原運算元，回傳 (運算元, target)
+    沒有符號的 M 記錄表示欄位的值是 section 內的位址（以 label 表示），有符號時欄位的值為常數部分
+    """
+    terms = "".join(f"{'-' if sign == '-' else '+'}{reference}"
+                    for sign, reference in sorted(references, key=lambda item: item[0] == "-") if reference)
+    if any(not reference for _, reference in references):
+        return "{}" + terms, value
+    constant = value - (1 << bits) if value >> (bits - 1) else value
+    operand = terms[1:] if terms.startswith("+") else "0" + terms
+    return (operand + f"{constant:+d}" if constant else operand), None
+
+
+def _merge_text(text: Iterable[Tuple[int, bytes]]) -> List[Tuple[int, bytes]]:
+    """依位址排序並合併連續的 T 記錄"""
+    runs: List[Tuple[int, bytearray]] = []
+    for start, code in sorted(text, key=lambda item: item[0]):
+        if runs and runs[-1][0] + len(runs[-1][1]) == start:
+            runs[-1][1].extend(code)
+        else:
+            runs.append((start, bytearray(code)))
+    return [(start, bytes(code)) for start, code in runs]
+
+
+#! Round trip
+def assemble_modules(source: Union[str, TextIO], options: Optional[AssemblerOptions] = None) -> List[ObjectModule]:
+    """組譯原始碼（路徑或 text stream），回傳每個 control section 的 ObjectModule"""
+    from .assembler import MyAssembler
+    assembler = MyAssembler(source, "", options)
+    assembler.preprocess_and_assemble()
+    writer = ObjectFileWriter()
+    return [writer.to_module(section) for section in assembler.sections]
+
+
+def compare_modules(expected: Sequence[ObjectModule], actual: Sequence[ObjectModule]) -> List[str]:
+    """比較兩份 object program 的內容（T 記錄合併後比較，M 記錄不計順序），回傳差異的說明"""
+    differences: List[str] = []
+    if len(expected) != len(actual):
+        differences.append(f"{len(expected)} control section(s) != {len(actual)}")
+    for left, right in zip(expected, actual):
+        prefix = f"section {left.name}"
+        for field in ("name", "start", "length", "entry", "definitions"):
+            if getattr(left, field) != getattr(right, field):
+                differences.append(f"{prefix}: {field} {getattr(left, field)!r} != {getattr(right, field)!r}")
+        if sorted(left.references) != sorted(right.references):
+            differences.append(f"{prefix}: references {left.references} != {right.references}")
+        key = lambda record: (record.location, record.length, record.sign, record.reference)
+        missing = sorted(map(key, left.modifications))
+        extra = sorted(map(key, right.modifications))
+        if missing != extra:
+            differences.append(f"{prefix}: M records {missing} != {extra}")
+        left_runs, right_runs = _merge_text(left.text), _merge_text(right.text)
+        if left_runs != right_runs:
+            differences.append(f"{prefix}: text differs at {_first_difference(left_runs, right_runs):06X}")
+    return differences
+
+
+def _first_difference(left: List[Tuple[int, bytes]], right: List[Tuple[int, bytes]]) -> int:
+    for (left_start, left_code), (right_start, right_code) in zip(left, right):
+        if left_start != right_start:
+            return min(left_start, right_start)
+        if left_code != right_code:
+            index = next((i for i, (a, b) in enumerate(zip(left_code, right_code)) if a != b), min(len(left_code), len(right_code)))
+            return left_start + index
+    shorter = left if len(left) < len(right) else right
+    longer = right if shorter is left else left
+    return longer[len(shorter)][0]
+
+
+def verify_round_trip(source: Union[str, TextIO], options: Optional[AssemblerOptions] = None) -> Tuple[List[ObjectModule], List[str]]:
+    """
+    組譯 -> 反組譯 -> 再組譯，回傳 (第一次組譯的 ObjectModule, 差異)
+    差異為空 list 表示反組譯的原始碼組譯出完全相同的 object program
+    """
+    modules = assemble_modules(source, options)
+    text = Disassembler().disassemble(modules)
+    try:
+        again = assemble_modules(io.StringIO(text), options)
+    except Exception as e:
+        return modules, [f"re-assembly of the disassembled source failed: {e}"]
+    return modules, compare_modules(modules, again)
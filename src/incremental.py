@@ -0,0 +1,523 @@
+"""
+增量組譯（editor integration）
+組譯一次後保留 sections 與原始碼，每次編輯（取代一段行範圍）時：
+1. 只重新 tokenize 被修改的行，將新的指令接回 section 的指令序列
+2. 後面的指令（suffix）、其定義的符號與修改紀錄平移 location 的變化量
+3. 以 pass 1 建立的交叉參考索引（section.xref）找出 target 改變的指令，只重新編碼
+   PC/base relative displacement 或絕對位址（format 4、WORD）真的改變的指令
+改變 section 結構的編輯（START/CSECT/END、EXTDEF/EXTREF、LTORG/literal、USE/ORG、EQU/BASE）
+或無法增量處理的 section，改為整份原始碼重新組譯，結果與完整組譯完全相同
+"""
+import bisect
+import dataclasses
+import io
+import math
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from .assembler import MyAssembler
+from .corefunc.crossReference import OperandSymbols, operand_expression
+from .corefunc.expression import ExpressionError, compile_expression
+from .corefunc.objectCode import ObjectCodeGenerator
+from .corefunc.section import Section
+from .io.preprocessor import Preprocessor
+from .io.writer import ObjectFileWriter
+from .log import get_logger
+from .models.dataTypes import AssemblerOptions, Instruction, Location, Symbol
+
+logger = get_logger(__name__)
+
+#! 可以增量處理的 directive（其餘 directive 會改變 section 的結構）
+DATA_DIRECTIVES = frozenset(("BYTE", "WORD", "RESW", "RESB"))
+#! 指令順序或位址不依原始碼順序的 section 不做增量處理
+_STRUCTURAL_DIRECTIVES = frozenset(("USE", "ORG"))
+#! 只有符號、數字與 +/- 的運算式，target 的變化量等於各符號變化量的代數和
+_LINEAR_EXPRESSION = re.compile(r"[A-Za-z0-9_\s+\-]*")
+
+_REMOVED = None #! changed 中表示符號被新增或刪除（引用它的指令一定要重新編碼）
+
+
+class _Unsupported(Exception):
+    """這次編輯無法增量處理（改為整份重新組譯）"""
+
+
+class EditResult(NamedTuple):
+    """
+    incremental: 是否以增量方式完成（False 表示整份重新組譯）
+    changed: 新的指令與目標碼改變的指令（整份重新組譯時為空）
+    reencoded: 重新編碼的指令數
+    seconds: 這次編輯花費的時間
+    """
+    incremental: bool
+    changed: List[Instruction]
+    reencoded: int
+    seconds: float
+
+
+def _line_key(instruction: Instruction) -> float:
+    return instruction.line if instruction.line is not None else math.inf #! 補上的 END 沒有行號
+
+
+def _operand_text(instruction: Instruction) -> Optional[str]:
+    """產生目標碼時會計算其值的運算元（format 3/4 去掉 #、@ 與 ,X；WORD 整個運算元），其餘回傳 None"""
+    if instruction.mnemonic == "WORD" or instruction.formatType in (3, 4):
+        return operand_expression(instruction)
+    return None
+
+
+class _SectionState:
+    """
+    一個 section 的增量組譯狀態（符號的定義與引用見 section.xref）
+    absolute_references: 符號 -> 以絕對位址（format 4、WORD）引用它的指令
+    unanchored: target 不是單一可重定位符號（常數、絕對 EQU、外部參考、`*`、非線性運算式）的 relative 指令
+                與引用 `*` 的 format 4/WORD 指令，平移時不一定與 target 一起移動
+    equs: EQU 指令與其 `*` 所在位置的指令（下一個不是 EQU 的指令）
+    bases: BASE 指令與目前的值
+    base_relative: 目前以 base relative 編碼的 format 3 指令
+    """
+    def __init__(self, section: Section):
+        self.section = section
+        self.xref = section.xref
+        self.absolute_references: Dict[str, Dict[int, Instruction]] = {}
+        self.unanchored: Dict[int, Instruction] = {}
+        self.equs: Dict[int, Tuple[Instruction, Instruction]] = {}
+        self.bases: List[Tuple[Instruction, int]] = []
+        self.base_relative: Dict[int, Instruction] = {}
+        self.literals = frozenset(literal.name for literal in section.literal_pool.get_literals_to_print())
+        self.supported = self._index()
+
+    @property
+    def first_line(self) -> float:
+        return _line_key(self.section.instructions[0])
+
+    def _index(self) -> bool:
+        """將指令依定址方式分類，回傳這個 section 是否可以增量處理"""
+        instructions = self.section.instructions
+        if not isinstance(instructions, list):
+            return False
+        pending: List[Instruction] = []
+        labels = set()
+        for position, instruction in enumerate(instructions):
+            mnemonic = instruction.mnemonic
+            if mnemonic in _STRUCTURAL_DIRECTIVES or (mnemonic in ("START", "CSECT") and position > 0):
+                return False
+            if instruction.symbol:
+                if instruction.symbol in labels:
+                    return False #! 重複定義的標籤以最後一個為準
+                labels.add(instruction.symbol)
+            if mnemonic in ("RESW", "RESB") and not instruction.operand.isdigit():
+                return False #! 大小依其他符號而定的保留空間
+            if mnemonic == "EQU":
+                pending.append(instruction)
+                continue
+            for equ in pending:
+                self.equs[id(equ)] = (equ, instruction)
+            pending = []
+            if mnemonic == "BASE":
+                self.bases.append((instruction, self._base_value(instruction)))
+            self.add(instruction)
+        return True
+
+    def _base_value(self, instruction: Instruction) -> int:
+        result = self.section._try_evaluate(instruction.operand, instruction.location.address)
+        return result.value if result is not None else 0
+
+    def add(self, instruction: Instruction) -> None:
+        """依（已編碼的）指令的定址方式分類，指令本身必須已在 section.xref 中"""
+        key = id(instruction)
+        if self._is_base_relative(instruction):
+            self.base_relative[key] = instruction
+        text = _operand_text(instruction)
+        if text is None:
+            return
+        #! 無法計算的運算元以 0 編碼，沒有引用符號，仍是固定的 target（PC relative 時 displacement 隨位址改變）
+        operand = self.xref.operand_symbols(instruction)
+        if instruction.formatType == 3:
+            if int(instruction.objectCode[2], 16) & 0x6 and not self._anchored(operand, text):
+                self.unanchored[key] = instruction
+        else:
+            for reference in operand.references:
+                self.absolute_references.setdefault(reference.name, {})[key] = instruction
+            if operand.uses_location:
+                self.unanchored[key] = instruction
+
+    def _anchored(self, operand: OperandSymbols, text: str) -> bool:
+        """target 是否為單一可重定位符號（加上常數），平移時與該符號一起移動"""
+        references = operand.references
+        if len(references) != 1 or references[0].sign == "-" or operand.uses_location \
+                or _LINEAR_EXPRESSION.fullmatch(text) is None:
+            return False
+        symbol = self.section.symbol_table.get(references[0].name)
+        return symbol is not None and symbol.is_relative
+
+    def remove(self, instruction: Instruction) -> None:
+        """將指令從分類中移除（在從 section.xref 移除之前呼叫）"""
+        key = id(instruction)
+        self.base_relative.pop(key, None)
+        self.unanchored.pop(key, None)
+        for reference in self.xref.operand_symbols(instruction).references:
+            self.absolute_references.get(reference.name, {}).pop(key, None)
+
+    @staticmethod
+    def _is_base_relative(instruction: Instruction) -> bool:
+        code = instruction.objectCode
+        return instruction.formatType == 3 and len(code) == 6 and bool(int(code[2], 16) & 0x4)
+
+    def base_at(self, instruction: Instruction) -> Tuple[int, int]:
+        """指令位置的 base register 值與對應的 BASE 在 bases 中的位置（沒有 BASE 時為 -1）"""
+        value, position = 0, -1
+        for i, (base, base_value) in enumerate(self.bases):
+            if base.index >= instruction.index:
+                break
+            value, position = base_value, i
+        return value, position
+
+
+class IncrementalAssembler:
+    """
+    編輯器用的增量組譯器
+    以原始碼（字串）建立，edit() 以 1-based 的行範圍取代原始碼，
+    sections 永遠等於對目前原始碼做完整組譯的結果
+    """
+    def __init__(self, source: str, options: Optional[AssemblerOptions] = None):
+        #! 增量處理需要 list 形式的指令序列
+        self.options = dataclasses.replace(options or AssemblerOptions(), compact=False)
+        self.lines: List[str] = source.splitlines()
+        self.preprocessor = Preprocessor(self.options)
+        self.writer = ObjectFileWriter()
+        self.sections: List[Section] = []
+        self._states: List[_SectionState] = []
+        self._assemble_all()
+
+    @property
+    def source(self) -> str:
+        return "".join(line + "\n" for line in self.lines)
+
+    def _assemble_all(self) -> None:
+        """整份原始碼重新組譯並重建索引（失敗時清空，下一次編輯再整份重新組譯）"""
+        self.sections, self._states = [], []
+        assembler = MyAssembler(io.StringIO(self.source), "", self.options)
+        assembler.preprocess_and_assemble()
+        self.sections = assembler.sections
+        self._states = sorted((_SectionState(section) for section in self.sections), key=lambda state: state.first_line)
+
+    def object_program(self) -> Union[str, bytes]:
+        """目前 sections 的 object program（格式依 options.object_format）"""
+        binary = self.options.object_format == "binary"
+        target = io.BytesIO() if binary else io.StringIO()
+        for section in self.sections:
+            if binary:
+                self.writer.write_section_binary(section, target)
+            else:
+                self.writer.write_section(section, target)
+                target.write("\n")
+        return target.getvalue()
+
+    def edit(self, first_line: int, last_line: int, text: str) -> EditResult:
+        """
+        以 text 取代第 first_line 到 last_line 行（1-based，包含兩端）
+        last_line = first_line - 1 表示在 first_line 之前插入
+        Raises:
+            ValueError: 行範圍不正確，或編輯後的原始碼無法組譯
+        """
+        start = time.perf_counter()
+        if not (1 <= first_line <= len(self.lines) + 1 and first_line - 1 <= last_line <= len(self.lines)):
+            raise ValueError(f"Invalid line range {first_line}-{last_line} (source has {len(self.lines)} lines)")
+        new_lines = text.splitlines()
+        self.lines[first_line - 1:last_line] = new_lines
+
+        try:
+            changed, reencoded = self._edit(first_line, last_line, new_lines)
+        except _Unsupported as e:
+            logger.debug("Re-assembling the whole source: %s", e)
+        except Exception as e:
+            #! 增量處理途中失敗時狀態可能不一致，整份重新組譯（真正的錯誤由完整組譯回報）
+            logger.debug("Incremental edit failed, re-assembling the whole source: %s", e)
+        else:
+            return EditResult(True, changed, reencoded, time.perf_counter() - start)
+        self._assemble_all()
+        return EditResult(False, [], 0, time.perf_counter() - start)
+
+    #! ---- 增量處理 ----
+    def _tokenize(self, first_line: int, new_lines: List[str]) -> List[Instruction]:
+        instructions = []
+        for offset, line in enumerate(new_lines):
+            tokens = self.preprocessor._parse_line(line)
+            if tokens[0]:
+                instructions.append(self.preprocessor._create_instruction(tokens, 0, first_line + offset))
+        return instructions
+
+    def _end_line(self) -> float:
+        """END 的行號，END 之後的內容不會被組譯"""
+        end = self.sections[0].instructions[-1]
+        return _line_key(end) if end.mnemonic == "END" else math.inf
+
+    def _edit(self, first_line: int, last_line: int, new_lines: List[str]) -> Tuple[List[Instruction], int]:
+        line_delta = len(new_lines) - (last_line - first_line + 1)
+        end_line = self._end_line()
+        if first_line > end_line:
+            return [], 0 #! END 之後的內容不會被組譯
+        if last_line >= end_line:
+            raise _Unsupported("edit touches END")
+        new = self._tokenize(first_line, new_lines)
+
+        #! 編輯範圍必須在單一 section 內（最後一個起始行不大於 first_line 的 section）
+        position = bisect.bisect_right([state.first_line for state in self._states], first_line) - 1
+        if position + 1 < len(self._states) and self._states[position + 1].first_line <= last_line:
+            raise _Unsupported("edit spans a section boundary")
+        if position < 0:
+            if new:
+                raise _Unsupported("instructions before the first section")
+            self._shift_lines(last_line, line_delta) #! 第一個 section 之前的註解
+            return [], 0
+        state = self._states[position]
+        instructions = state.section.instructions
+        low = bisect.bisect_left(instructions, first_line, key=_line_key)
+        high = bisect.bisect_right(instructions, last_line, key=_line_key)
+        old = instructions[low:high]
+        if not old and not new:
+            self._shift_lines(last_line, line_delta) #! 只改了空行或註解
+            return [], 0
+        if not state.supported:
+            raise _Unsupported(f"section {state.section.name} uses USE/ORG, computed RESW/RESB or duplicate labels")
+        if low == 0:
+            raise _Unsupported("edit before START/CSECT")
+        self._validate(state, old, new)
+
+        #! ---- 以下開始修改狀態 ----
+        section = state.section
+        old_start = self._counter_at(instructions, low)
+        old_end = self._counter_at(instructions, high)
+        location = old_start
+        for instruction in new:
+            instruction.location = Location(location, is_relative=False)
+            if instruction.mnemonic == "WORD":
+                location += 3
+            else:
+                section.current_location = location
+                section._update_location_counter(instruction)
+                location = section.current_location
+            if instruction.mnemonic == "RSUB":
+                instruction.operand = "#0"
+        section.current_location = 0
+        delta = (location - old_start) - (old_end - old_start)
+
+        first_index = instructions[low - 1].index + 1
+        for offset, instruction in enumerate(new):
+            instruction.index = first_index + offset
+        index_delta = len(new) - len(old)
+        instructions[low:high] = new
+        suffix = low + len(new)
+
+        #! 被取代指令的符號、索引與修改紀錄
+        changed: Dict[str, Optional[int]] = {} #! 符號 -> 位址的變化量（_REMOVED 表示新增或刪除）
+        previous: Dict[str, int] = {}
+        xref = section.xref
+        for instruction in old:
+            state.remove(instruction)
+            xref.remove(instruction)
+            if instruction.symbol:
+                previous[instruction.symbol] = section.symbol_table.pop(instruction.symbol).addr
+        section.modification_records.relocate(old_start, old_end, delta)
+        for instruction in new:
+            xref.add(instruction)
+
+        #! 後面的指令平移位址、索引與行號；平移的標籤只有以絕對位址（format 4、WORD）引用它的指令一定要重新編碼
+        symbol_table = section.symbol_table
+        new_ids = {id(instruction) for instruction in new}
+        candidates: Dict[int, Instruction] = {id(instruction): instruction for instruction in new}
+        if delta or index_delta or line_delta:
+            absolute_references = state.absolute_references
+            for instruction in instructions[suffix:]: #! suffix 的行號都在 last_line 之後
+                instruction.index += index_delta
+                if line_delta and instruction.line is not None:
+                    instruction.line += line_delta
+                if delta and instruction.mnemonic != "EQU":
+                    instruction.location.address += delta
+                    name = instruction.symbol
+                    if name:
+                        symbol_table[name].addr += delta
+                        changed[name] = delta
+                        if name in absolute_references:
+                            candidates.update(absolute_references[name])
+        self._shift_lines(last_line, line_delta, skip=state)
+
+        #! 其他改變的符號（新增、刪除、搬移的標籤與 EQU）：所有引用它的指令都是候選
+        others: Dict[str, Optional[int]] = {}
+        for instruction in new:
+            if instruction.symbol:
+                symbol_table[instruction.symbol] = Symbol(name=instruction.symbol, addr=instruction.location.address,
+                                                          is_external=False, is_relative=True)
+                if instruction.symbol in previous:
+                    moved = instruction.location.address - previous.pop(instruction.symbol)
+                    if moved:
+                        others[instruction.symbol] = moved
+                else:
+                    others[instruction.symbol] = _REMOVED
+        for name in previous:
+            others[name] = _REMOVED
+        self._update_equs(state, instructions, low, others)
+        changed.update(others)
+        for name in others:
+            candidates.update(xref.dependents(name))
+        for name, symbol in section.extdef_table.items():
+            if name in symbol_table:
+                symbol.addr = symbol_table[name].addr
+        base_deltas = self._update_bases(state)
+        if delta or any(base_deltas):
+            candidates.update(state.base_relative)
+
+        if delta:
+            #! PC relative 的範圍只有 ±2048 bytes：target 沒有一起平移的 suffix 指令，以及引用平移標籤的前面的指令，
+            #? 都只會出現在編輯位置之後 2048 bytes 內（其餘 target 固定的指令在 unanchored 中）
+            candidates.update(state.unanchored)
+            window = location + 2052
+            for position in range(suffix, len(instructions)):
+                instruction = instructions[position]
+                if instruction.mnemonic == "EQU":
+                    continue
+                if instruction.location.address >= window:
+                    break
+                if instruction.formatType >= 3 and instruction.operand or instruction.mnemonic == "WORD":
+                    candidates[id(instruction)] = instruction #! 會計算 target 的指令（同 _operand_text）
+                if instruction.symbol:
+                    candidates.update(xref.dependents(instruction.symbol))
+
+        suffix_index = first_index + len(new)
+        encode = [instruction for key, instruction in candidates.items() if key in new_ids or self._needs_encoding(
+            state, instruction, changed, delta if instruction.index >= suffix_index else 0, base_deltas)]
+        encode.sort(key=lambda instruction: instruction.index) #! 依原本的順序處理 ,X 紀錄與修改紀錄
+
+        generator = ObjectCodeGenerator(section)
+        result: List[Instruction] = []
+        for instruction in encode:
+            is_new = id(instruction) in new_ids
+            generator.set_base_value(state.base_at(instruction)[0])
+            if is_new:
+                if instruction.mnemonic == "WORD":
+                    section._makeModificationRecord(instruction.operand, instruction.mnemonic, instruction.location.address)
+                if section.options.bonus:
+                    section._prepare_operand(instruction)
+            state.remove(instruction)
+            code = instruction.objectCode
+            instruction.objectCode = generator.generateOpCode(instruction, instruction.location)
+            state.add(instruction)
+            if is_new or instruction.objectCode != code:
+                result.append(instruction)
+        return result, len(encode)
+
+    def _validate(self, state: _SectionState, old: List[Instruction], new: List[Instruction]) -> None:
+        """檢查被取代與新增的指令都可以增量處理（尚未修改任何狀態）"""
+        section = state.section
+        for instruction in (*old, *new):
+            mnemonic = instruction.mnemonic
+            if mnemonic not in section.opcode_table and mnemonic not in DATA_DIRECTIVES:
+                raise _Unsupported(f"directive {mnemonic}")
+            if instruction.operand.startswith("=") or (instruction.operand.lstrip("#@") in state.literals):
+                raise _Unsupported("literal")
+            if mnemonic in ("RESW", "RESB") and not instruction.operand.isdigit():
+                raise _Unsupported(f"computed {mnemonic}")
+        removed = {instruction.symbol for instruction in old if instruction.symbol}
+        defined = [instruction.symbol for instruction in new if instruction.symbol]
+        if len(set(defined)) != len(defined):
+            raise _Unsupported("duplicate label")
+        for name in defined:
+            if (name in section.symbol_table and name not in removed) or name in section.extref_table:
+                raise _Unsupported(f"label {name} is already defined")
+        for name in removed.difference(defined):
+            #! 引用未定義符號的結果依完整組譯的錯誤處理而定
+            if name in section.extdef_table or section.xref.dependents(name):
+                raise _Unsupported(f"removes the referenced symbol {name}")
+
+    @staticmethod
+    def _counter_at(instructions: List[Instruction], position: int) -> int:
+        """position 之前的 location counter（EQU 的 location 是其值，往後找第一個不是 EQU 的指令）"""
+        while instructions[position].mnemonic == "EQU":
+            position += 1
+        return instructions[position].location.address
+
+    def _shift_lines(self, last_line: int, line_delta: int, skip: Optional[_SectionState] = None) -> None:
+        """last_line 之後的行號平移 line_delta（skip 的 section 已在平移位址時處理）"""
+        if not line_delta:
+            return
+        for state in self._states:
+            if state is skip:
+                continue
+            instructions = state.section.instructions
+            position = bisect.bisect_right(instructions, last_line, key=_line_key)
+            for instruction in instructions[position:]:
+                if instruction.line is not None:
+                    instruction.line += line_delta
+
+    @staticmethod
+    def _update_equs(state: _SectionState, instructions: List[Instruction], low: int,
+                     changed: Dict[str, Optional[int]]) -> None:
+        """更新緊接在編輯位置前的 EQU 的 `*` 位置，並重新計算 EQU 直到值不再改變"""
+        if not state.equs:
+            return
+        anchor_position = low #! 新的指令不會是 EQU，沒有新指令時為 suffix 第一個不是 EQU 的指令
+        while instructions[anchor_position].mnemonic == "EQU":
+            anchor_position += 1
+        position = low - 1
+        while position >= 0 and instructions[position].mnemonic == "EQU":
+            equ = instructions[position]
+            state.equs[id(equ)] = (equ, instructions[anchor_position])
+            position -= 1
+
+        symbol_table = state.section.symbol_table
+        for _ in range(len(state.equs) + 1):
+            stable = True
+            for equ, anchor in state.equs.values():
+                try:
+                    result = compile_expression(equ.operand).evaluate(symbol_table, anchor.location.address)
+                except ExpressionError as e:
+                    raise _Unsupported(f"cannot evaluate EQU {equ.operand}") from e
+                symbol = symbol_table[equ.symbol]
+                if symbol.addr != result.value or symbol.is_relative != result.is_relative:
+                    changed[equ.symbol] = (changed.get(equ.symbol, 0) + result.value - symbol.addr
+                                           if symbol.addr is not None else _REMOVED)
+                    symbol.addr, symbol.is_relative = result.value, result.is_relative
+                    equ.location = Location(result.value, is_relative=result.is_relative)
+                    stable = False
+            if stable:
+                return
+
+    @staticmethod
+    def _update_bases(state: _SectionState) -> List[int]:
+        """重新計算每個 BASE 的值，回傳各自的變化量"""
+        deltas = []
+        for i, (base, value) in enumerate(state.bases):
+            new_value = state._base_value(base)
+            deltas.append(new_value - value)
+            state.bases[i] = (base, new_value)
+        return deltas
+
+    @staticmethod
+    def _needs_encoding(state: _SectionState, instruction: Instruction, changed: Dict[str, Optional[int]],
+                        moved: int, base_deltas: List[int]) -> bool:
+        """
+        已編碼的指令是否需要重新編碼
+        moved: 指令本身的位址變化量，base_deltas: 每個 BASE 的值的變化量
+        """
+        base_position = state.base_at(instruction)[1] if base_deltas else -1
+        base_delta = base_deltas[base_position] if base_position >= 0 else 0
+        text = _operand_text(instruction)
+        if text is None: #! EQU、BASE 等 directive 也在 xref 的引用中
+            return bool(base_delta) and id(instruction) in state.base_relative
+        operand = state.xref.operand_symbols(instruction)
+        target_delta = 0
+        for name, sign in operand.references:
+            name_delta = changed.get(name, 0)
+            if name_delta is _REMOVED or (name_delta and _LINEAR_EXPRESSION.fullmatch(text) is None):
+                return True
+            target_delta += -name_delta if sign == "-" else name_delta
+        if operand.uses_location and moved:
+            return True
+        if instruction.formatType == 3:
+            flags = int(instruction.objectCode[2], 16)
+            if flags & 0x2:
+                return target_delta != moved
+            if flags & 0x4: #! PC relative 優先，PC displacement 改變時也可能改用 PC relative
+                return target_delta != base_delta or target_delta != moved
+        return target_delta != 0
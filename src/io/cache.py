@@ -0,0 +1,163 @@
+import os
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+from ..corefunc.section import Section
+
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024 #! 256 MB
+
+_SECTION_SUFFIX = ".section"
+_OUTPUT_SUFFIX = ".obj"
+
+
+def _first_line(instructions) -> int:
+    """第一個有原始行號的指令的行號（組譯器產生的指令沒有行號）"""
+    return next((instruction.line for instruction in instructions if instruction.line is not None), 0)
+
+
+@lru_cache(maxsize=None)
+def assembler_version() -> str:
+    """以組譯器本身的原始碼（src/ 與 config.py）計算版本，程式修改後舊的快取自動失效"""
+    import hashlib
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    digest = hashlib.sha256()
+    paths = [os.path.join(root, "config.py")]
+    for directory, _, files in os.walk(os.path.join(root, "src")):
+        paths.extend(os.path.join(directory, name) for name in files if name.endswith(".py"))
+    for path in sorted(paths):
+        digest.update(os.path.relpath(path, root).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class BuildCache:
+    """
+    以內容雜湊為 key 的組譯快取
+    - section key：section 正規化後的原始行（含相對於 section 第一行的行號）+ 組譯器版本 + bonus 模式 + compact 模式
+    - section 快取 pass 2 完成後的 Section（SYMTAB、object code、修改記錄）
+    - output 快取整個檔案的 object program，所有 section 都命中時連 writer 都不用執行
+    - 以檔案的 mtime 作為 LRU，總大小超過 max_bytes 時從最久未使用的開始刪除
+    注意：快取以 pickle 儲存，只能指向受信任的本機目錄
+    """
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    #! Keys
+    def section_key(self, section: Section, bonus: bool, compact: bool = False) -> str:
+        """
+        計算 section 的內容雜湊
+        index 與行號以 section 第一個指令為基準，前面的 section 或註解改變行數時快取仍然有效
+        compact 決定快取的指令是 list 還是 InstructionTable，不同設定不共用快取
+        """
+        import hashlib #! hashlib/pickle 只有使用快取時才需要
+        digest = hashlib.sha256()
+        digest.update(f"{assembler_version()}\0{int(bonus)}\0{int(compact)}\0{section.name}\0".encode())
+        base = section.instructions[0].index if section.instructions else 0
+        first_line = _first_line(section.instructions)
+        for instruction in section.instructions:
+            index = instruction.index - base if instruction.index >= 0 else instruction.index
+            line = "" if instruction.line is None else instruction.line - first_line
+            digest.update(f"{index}\t{line}\t{instruction.formatType}\t{instruction.symbol}\t{instruction.mnemonic}\t{instruction.operand}\n".encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def output_key(section_keys: Iterable[str]) -> str:
+        """整個檔案的 key：依序組合每個 section 的 key"""
+        import hashlib
+        digest = hashlib.sha256()
+        for key in section_keys:
+            digest.update(key.encode())
+        return digest.hexdigest()
+
+    #! Sections
+    def load_section(self, key: str, section: Section, bonus: bool) -> Optional[Section]:
+        """
+        讀取快取的 section，未命中時回傳 None
+        非 bonus 模式下 instruction index 沿用原始的全域編號，需要平移到目前的位置
+        行號（listing、--xref、報表用）一律平移到目前原始碼中的位置
+        """
+        data = self._read(key + _SECTION_SUFFIX)
+        if data is None:
+            return None
+        import pickle
+        try:
+            cached: Section = pickle.loads(data)
+        except Exception:
+            return None #! 損毀或不相容的快取視為未命中
+        cached.opcode_table = section.opcode_table
+        if not bonus and section.instructions and cached.instructions:
+            delta = section.instructions[0].index - cached.instructions[0].index
+            if delta:
+                for instruction in cached.instructions:
+                    if instruction.index >= 0:
+                        instruction.index += delta
+        line_delta = _first_line(section.instructions) - _first_line(cached.instructions)
+        if line_delta:
+            for instruction in cached.instructions:
+                if instruction.line is not None:
+                    instruction.line += line_delta
+        return cached
+
+    def store_section(self, key: str, section: Section) -> None:
+        import pickle
+        self._write(key + _SECTION_SUFFIX, pickle.dumps(section, protocol=pickle.HIGHEST_PROTOCOL))
+
+    #! Object programs
+    def load_output(self, key: str) -> Optional[bytes]:
+        return self._read(key + _OUTPUT_SUFFIX)
+
+    def store_output(self, key: str, data: bytes) -> None:
+        self._write(key + _OUTPUT_SUFFIX, data)
+
+    #! LRU eviction
+    def evict(self) -> List[str]:
+        """刪除最久未使用的項目直到總大小不超過 max_bytes，回傳被刪除的檔名"""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.is_file() or not entry.name.endswith((_SECTION_SUFFIX, _OUTPUT_SUFFIX)):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.name))
+                total += stat.st_size
+        removed: List[str] = []
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass #! 其他 process 已刪除
+            total -= size
+            removed.append(name)
+        return removed
+
+    def _read(self, name: str) -> Optional[bytes]:
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except (FileNotFoundError, IsADirectoryError):
+            return None
+        try:
+            os.utime(path) #! 更新 mtime 作為最近使用時間
+        except OSError:
+            pass
+        return data
+
+    def _write(self, name: str, data: bytes) -> None:
+        import tempfile #! 只有寫入快取時才需要
+        #! 先寫入暫存檔再 rename，多個 process 同時寫入也不會讀到一半的檔案
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, os.path.join(self.directory, name))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
@@ -1,154 +1,236 @@
-from typing import List, Tuple, Set
-from ..models.dataTypes import Instruction, OpcodeTable
+import contextlib
+import os
+import re
+import sys
+from typing import ContextManager, Dict, Iterator, List, Optional, FrozenSet, TextIO, Tuple, Union
+from ..models.dataTypes import AssemblerOptions, Instruction, OpcodeTable
 from ..corefunc.section import Section
+from ..log import get_logger
 
 
 from config import directive_table, opcode_table
 
+logger = get_logger(__name__)
+
+# 輸入來源：檔案路徑、`-`（stdin）或 file-like object
+Source = Union[str, os.PathLike, TextIO]
+
+#! 一行的 token：(symbol, mnemonic, operand, extended)
+#? symbol 為第一個欄位（可能其實是 mnemonic，由 _create_instruction 判斷），extended 表示 symbol 或 mnemonic 前有 `+`（Format 4）
+LineTokens = Tuple[str, str, str, bool]
+_EMPTY_LINE: LineTokens = ("", "", "", False)
+
+#! 含引號的行：欄位由不含空白與 `.` 的字元或單引號常數組成（常數內可以有空白與 `.`，如 C'A. B'）
+_FIELD = r"(?:[^\s.']+|'[^'\n]*'?)+"
+_QUOTED_LINE_RE = re.compile(rf"\s*(?:(\+)?({_FIELD})(?:[ \t\r\f\v]+(\+)?({_FIELD})(?:[ \t\r\f\v]+({_FIELD}))?)?)?")
+
+#! mmap 模式：空行或純註解行（不需要解碼）
+_SKIP_RE = re.compile(rb"\s*(?:\.|$)")
+
 
 class Preprocessor:
-    def __init__(self):
+    def __init__(self, options: Optional[AssemblerOptions] = None):
+        self.options = options or AssemblerOptions() #! 產生的 Section 都帶有這份設定
         self.opcode_table: OpcodeTable = opcode_table
-        self.directive_table: Set[str] = directive_table
+        self.directive_table: FrozenSet[str] = directive_table
+        self.use_mmap = self.options.use_mmap #! 以 mmap 讀取檔案路徑的輸入（適合非常大的原始檔）
+        self.keywords = frozenset(self.opcode_table).union(self.directive_table) #! 不能當作 symbol 的名稱
+        self.formats: Dict[str, int] = {mnemonic: entry.format for mnemonic, entry in self.opcode_table.items()}
 
-    def _parse_line(self, line: str) -> Tuple[str, str, str]:
+    def _parse_line(self, line: str) -> LineTokens:
         """
-        解析單行組合語言程式碼
+        解析單行組合語言程式碼，一次切出 label/`+`/mnemonic/operand，`.` 之後為註解
+        - 一般的行：切掉註解後以 split() 分割（C 層級的單次掃描）
+        - 含引號的行（BYTE 常數、literal）：以預先編譯的 regex 掃描，引號內的空白與 `.` 不會被切開
         
         Args:
             line: 輸入的程式碼行
             
         Returns:
-            (symbol, mnemonic, operand) 的元組
+            (symbol, mnemonic, operand, extended)，空行或純註解行的欄位皆為空字串
         """
-        # 移除註解和空白
-        if line.strip().startswith('.'):
-            return "", "", ""
-        if '.' in line:
-            line = line.split('.')[0]  # 只取 `.` 前的部分
-        line = line.strip().replace('\t', ' ')
+        if "'" in line:
+            return self._parse_quoted_line(line)
         
-        # 分割行內容
-        parts = line.split()
-        parts.extend([""] * (3 - len(parts)))  # 確保有三個部分
+        parts = line.partition('.')[0].split()
+        count = len(parts)
+        if count == 0:
+            return _EMPTY_LINE
+        symbol = parts[0]
+        mnemonic = parts[1] if count > 1 else ""
+        operand = parts[2] if count > 2 else "" #! 第三個欄位之後的內容忽略
         
-        symbol, mnemonic, operand = parts[:3]
-        
-        #! 特殊處理 BYTE 指令的操作數
-        if mnemonic == "BYTE":
-            operand = " ".join([operand] + parts[3:])
-        
-        return symbol, mnemonic, operand
+        # 處理 Format 4 的 `+`
+        if symbol[0] == '+':
+            return symbol[1:], mnemonic, operand, True
+        if mnemonic[:1] == '+':
+            return symbol, mnemonic[1:], operand, True
+        return symbol, mnemonic, operand, False
+
+    def _parse_quoted_line(self, line: str) -> LineTokens:
+        """含單引號的行：regex 一次掃描出三個欄位與 `+`"""
+        plus1, symbol, plus2, mnemonic, operand = _QUOTED_LINE_RE.match(line).groups()
+        if symbol is None:
+            return _EMPTY_LINE
+        return symbol, mnemonic or "", operand or "", plus1 is not None or plus2 is not None
 
-    def _create_instruction(self, line_parts: Tuple[str, str, str], index: int) -> Instruction:
+    def _create_instruction(self, line_parts: LineTokens, index: int, line: Optional[int] = None) -> Instruction:
         """
         從解析後的行內容建立指令物件
         
         Args:
-            line_parts: (symbol, mnemonic, operand) 的元組
+            line_parts: _parse_line 產生的 (symbol, mnemonic, operand, extended)
             index: 指令的索引
+            line: 原始檔案中的行號
             
         Returns:
             建立的 Instruction 物件
         """
-        symbol, mnemonic, operand = line_parts
-        formatType = 0
+        symbol, mnemonic, operand, extended = line_parts
         
-        # 處理 Format 4 指令
-        if '+' in symbol:
-            formatType = 4
-            symbol = symbol.replace('+', '')
-        elif '+' in mnemonic:
-            formatType = 4
-            mnemonic = mnemonic.replace('+', '')
-            
         # 處理沒有標籤的指令
-        if symbol in self.opcode_table or symbol in self.directive_table or symbol == '*': #! mnemonic 是中間的指令
+        if symbol in self.keywords or symbol == '*': #! mnemonic 是中間的指令
             operand = mnemonic
             mnemonic = symbol
             symbol = ""
         
         #TODO 還需要處理 ADD ADD VALUE 這種指令，symbol 的名稱不能是 opcode 或 directive
         #! 處理指令中可能出現的情況，symbol 的名稱不能是 opcode 或 directive
-        if symbol in self.opcode_table or symbol in self.directive_table:
+        if symbol in self.keywords:
             # 如果 symbol 是 opcode 或 directive，則將其視為 operand
-            print(f"Warning: In index: {index}, insturction: {line_parts}, '{symbol}' is an opcode/directive and cannot be used as a symbol. Treating it as an operand.")
+            logger.warning("In index: %d, insturction: %s, '%s' is an opcode/directive and cannot be used as a symbol. Treating it as an operand.", index, line_parts, symbol)
             symbol = "WRONG_SYMBOL_NAME_" + symbol
         
         # 檢查指令格式是否有效
-        if mnemonic not in self.opcode_table and mnemonic not in self.directive_table:
+        if mnemonic not in self.keywords:
             raise ValueError(f"Invalid mnemonic '{mnemonic}' at index {index}: not found in opcode or directive tables.")
         
-        # 設定指令格式
-        if formatType != 4 and mnemonic in self.opcode_table:
-            formatType = self.opcode_table[mnemonic]['format']
+        # 設定指令格式（Format 4 的 `+` 已由 tokenizer 分離，directive 為 0）
+        formatType = 4 if extended else self.formats.get(mnemonic, 0)
             
+        #! symbol/mnemonic 重複率高，intern 後所有指令共用同一個字串物件
         return Instruction(
             index=index,
             formatType=formatType,
-            symbol=symbol,
-            mnemonic=mnemonic,
+            symbol=sys.intern(symbol),
+            mnemonic=sys.intern(mnemonic),
             operand=operand,
             objectCode="",
-            location=None
+            location=None,
+            line=line
         )
     
-    def process(self, input_file: str) -> List[Section]:
+    def _open(self, source: Source) -> ContextManager[TextIO]:
+        """開啟輸入來源：檔案路徑、`-`（stdin）或任何可逐行讀取的 file-like object"""
+        if source == "-":
+            return contextlib.nullcontext(sys.stdin)
+        if isinstance(source, (str, os.PathLike)):
+            return open(source, 'r')
+        return contextlib.nullcontext(source) #! 呼叫端負責關閉自己的 file-like object
+
+    def iter_fields(self, source: Source) -> Iterator[Tuple[int, LineTokens]]:
         """
-        處理輸入檔案並返回程式區段列表
+        逐行讀取輸入，依序產生 (行號, LineTokens)，跳過空行與純註解行
         Args:
-            input_file: 輸入檔案的路徑
-        Returns:
-            Section 物件的列表
+            source: 檔案路徑、`-`（stdin）或 file-like object
+        """
+        if self.use_mmap and isinstance(source, (str, os.PathLike)) and source != "-":
+            yield from self._iter_fields_mmap(source)
+            return
+        
+        parse_line = self._parse_line
+        with self._open(source) as f:
+            for line_number, line in enumerate(f, 1):
+                linesContent = parse_line(line)
+                if linesContent[0]:  # 跳過空行或純註解行
+                    yield line_number, linesContent
+
+    def _iter_fields_mmap(self, path: Union[str, os.PathLike]) -> Iterator[Tuple[int, LineTokens]]:
+        """
+        以 mmap 讀取檔案的 iter_fields
+        - 行邊界由 mmap.readline 直接在 bytes 上尋找，由作業系統按需載入分頁，不經過 text mode 的緩衝與解碼
+        - 空行與純註解行在 bytes 上判斷，不會解碼成字串
+        """
+        import mmap #! 只有 --mmap 才需要
+        parse_line = self._parse_line
+        skip = _SKIP_RE.match
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for line_number, line in enumerate(iter(data.readline, b""), 1):
+                    if skip(line): #! 空行或純註解行，不解碼
+                        continue
+                    linesContent = parse_line(line.decode())
+                    if linesContent[0]:
+                        yield line_number, linesContent
+
+    def iter_instructions(self, source: Source) -> Iterator[Instruction]:
+        """
+        逐行讀取輸入並依序產生 Instruction，不會一次讀入整個檔案
+        Args:
+            source: 檔案路徑、`-`（stdin）或 file-like object
+        """
+        for instruction_index, (line_number, linesContent) in enumerate(self.iter_fields(source)):
+            # 建立指令物件
+            yield self._create_instruction(linesContent, instruction_index, line_number)
+
+    def _close_section(self, section: Section) -> Section:
+        """確保區段有 END 指令"""
+        if not section.has_END():
+            logger.warning("No END directive found in section %s", section.name)
+            section.add_instruction(Instruction(
+                index=-1,
+                formatType=0,
+                symbol="",
+                mnemonic="END",
+                operand="",
+                objectCode="",
+                location=None
+            ))
+        return section
+
+    def iter_sections(self, source: Source) -> Iterator[Tuple[int, Section]]:
+        """
+        串流處理輸入，遇到 CSECT 時即建立新的區段，區段完成後立即產生 (區段位置, Section)
+        - END 屬於第一個區段（其 literal pool 與 entry point），因此第一個區段在讀到 END 時才完成，
+          其餘區段在下一個 CSECT 出現時就完成，產生順序不一定等於區段位置
+        - END 之後的內容不會被讀取
         Raises:
             FileNotFoundError: 當輸入檔案不存在時
             ValueError: 當輸入檔案格式不正確時
         """
-        sections: List[Section] = [Section("DEFAULT", self.opcode_table)] #! 傳送 opcode_table 供 Section 傳遞
-        instruction_index = 0
-        instruction_temp = []
-        
+        first = Section("DEFAULT", self.opcode_table, self.options) #! 傳送 opcode_table 供 Section 傳遞
+        current, position = first, 0
         try:
-            with open(input_file, 'r') as f:
-                for line in f:
-                    if line.strip() == "": #! 跳過空行
-                        continue
-                        
-                    # 解析行內容
-                    linesContent = self._parse_line(line)
-                    if not any(linesContent):  # 跳過空行或純註解行
-                        continue
-                        
-                    # 建立指令物件
-                    instruction = self._create_instruction(linesContent, instruction_index)
-                    instruction_index += 1
-                    
-                    instruction_temp.append(instruction)
-            
-            # 確保每個區段都有 END 指令
-            for instruction in instruction_temp:
+            for instruction in self.iter_instructions(source):
                 if instruction.mnemonic == "END":
-                    sections[0].add_instruction(instruction)
+                    first.add_instruction(instruction)
                     break
                 elif instruction.mnemonic == "CSECT":
-                    sections.append(Section(instruction.symbol, self.opcode_table))
-                sections[-1].add_instruction(instruction)
+                    if current is not first:
+                        yield position, self._close_section(current)
+                    current, position = Section(instruction.symbol, self.opcode_table, self.options), position + 1
+                current.add_instruction(instruction)
             
-            for section in sections:
-                if not section.has_END():
-                    print('Warning: No END directive found in section', section.name)
-                    section.add_instruction(Instruction(
-                        index=-1,
-                        formatType=0,
-                        symbol="",
-                        mnemonic="END",
-                        operand="",
-                        objectCode="",
-                        location=None
-                    ))
-                    
-            return sections
+            if current is not first:
+                yield position, self._close_section(current)
+            yield 0, self._close_section(first)
         except FileNotFoundError:
-            raise FileNotFoundError(f"Input file {input_file} not found")
+            raise FileNotFoundError(f"Input file {source} not found")
         except Exception as e:
-            raise ValueError(f"Error processing input file: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Error processing input file: {str(e)}")
+
+    def process(self, input_file: Source) -> List[Section]:
+        """
+        處理輸入檔案並返回程式區段列表
+        Args:
+            input_file: 輸入檔案的路徑（或 `-`、file-like object）
+        Returns:
+            Section 物件的列表（依原始順序）
+        Raises:
+            FileNotFoundError: 當輸入檔案不存在時
+            ValueError: 當輸入檔案格式不正確時
+        """
+        sections: Dict[int, Section] = dict(self.iter_sections(input_file))
+        return [sections[position] for position in range(len(sections))]
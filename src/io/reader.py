@@ -0,0 +1,143 @@
+from typing import List, Optional, Tuple, Union
+
+from ..models.dataTypes import ModificationRecord, ObjectModule
+
+
+class ObjectFileReader:
+    """
+    讀取 ObjectFileWriter 寫出的 object program，每個 control section（H ... E）轉成一個 ObjectModule
+    - text：H/D/R/T/M/E 十六進位文字記錄（D/R 的符號名稱為固定 6 個字元）
+    - binary：write_section_binary 的格式
+    檔案內容以第二個 byte 判斷格式（binary 的 H 記錄接著名稱長度，text 接著名稱字元）
+    """
+    def read(self, path: str) -> List[ObjectModule]:
+        with open(path, "rb") as f:
+            data = f.read()
+        if self.is_binary(data):
+            return self.parse_binary(data)
+        return self.parse_text(data.decode("ascii"))
+
+    @staticmethod
+    def is_binary(data: bytes) -> bool:
+        return len(data) > 1 and data[:1] == b"H" and data[1] < 0x20
+
+    def parse(self, data: Union[str, bytes]) -> List[ObjectModule]:
+        """str 為 text 格式，bytes 依內容判斷格式"""
+        if isinstance(data, str):
+            return self.parse_text(data)
+        if self.is_binary(data):
+            return self.parse_binary(data)
+        return self.parse_text(data.decode("ascii"))
+
+    def parse_text(self, text: str) -> List[ObjectModule]:
+        modules: List[ObjectModule] = []
+        module: Optional[ObjectModule] = None
+        for line_number, line in enumerate(text.splitlines(), 1):
+            if not line:
+                continue #! section 之間的空行
+            kind = line[0]
+            try:
+                if kind == "H":
+                    if module is not None:
+                        raise ValueError(f"section {module.name} has no E record")
+                    #! 名稱超過 6 個字元時 writer 不會截斷，位址與長度從行尾取
+                    module = ObjectModule(line[1:-12].rstrip(), int(line[-12:-6], 16), int(line[-6:], 16))
+                    continue
+                if module is None:
+                    raise ValueError(f"{kind} record outside of a section")
+                if kind == "T":
+                    length = int(line[7:9], 16)
+                    code = bytes.fromhex(line[9:])
+                    if len(code) != length:
+                        raise ValueError(f"T record length {length} does not match {len(code)} bytes of object code")
+                    module.text.append((int(line[1:7], 16), code))
+                elif kind == "M":
+                    module.modifications.append(ModificationRecord(int(line[1:7], 16), int(line[7:9], 16), line[9:10], line[10:]))
+                elif kind == "D":
+                    for offset in range(1, len(line), 12):
+                        module.definitions[line[offset:offset + 6].rstrip()] = int(line[offset + 6:offset + 12], 16)
+                elif kind == "R":
+                    module.references.extend(line[offset:offset + 6].rstrip() for offset in range(1, len(line), 6))
+                elif kind == "E":
+                    module.entry = int(line[1:7], 16) if len(line) > 1 else None
+                    modules.append(module)
+                    module = None
+                else:
+                    raise ValueError(f"unknown record type '{kind}'")
+            except ValueError as e:
+                raise ValueError(f"Invalid object program at line {line_number}: {e}")
+        if module is not None:
+            raise ValueError(f"Invalid object program: section {module.name} has no E record")
+        return modules
+
+    def parse_binary(self, data: bytes) -> List[ObjectModule]:
+        modules: List[ObjectModule] = []
+        module: Optional[ObjectModule] = None
+        position = 0
+        end = len(data)
+        try:
+            while position < end:
+                kind = data[position:position + 1]
+                position += 1
+                if kind == b"H":
+                    if module is not None:
+                        raise ValueError(f"section {module.name} has no E record")
+                    name, position = _name(data, position)
+                    module = ObjectModule(name, _addr(data, position), _addr(data, position + 3))
+                    position += 6
+                    continue
+                if module is None:
+                    raise ValueError(f"{kind!r} record outside of a section")
+                if kind == b"T":
+                    start, length = _addr(data, position), data[position + 3]
+                    position += 4
+                    if position + length > end:
+                        raise IndexError(position)
+                    module.text.append((start, data[position:position + length]))
+                    position += length
+                elif kind == b"M":
+                    location, length, sign = _addr(data, position), data[position + 3], chr(data[position + 4]).strip()
+                    reference, position = _name(data, position + 5)
+                    module.modifications.append(ModificationRecord(location, length, sign, reference))
+                elif kind == b"D":
+                    count = data[position]
+                    position += 1
+                    for _ in range(count):
+                        name, position = _name(data, position)
+                        module.definitions[name] = _addr(data, position)
+                        position += 3
+                elif kind == b"R":
+                    count = data[position]
+                    position += 1
+                    for _ in range(count):
+                        name, position = _name(data, position)
+                        module.references.append(name)
+                elif kind == b"E":
+                    module.entry = _addr(data, position + 1) if data[position] else None
+                    position += 4
+                    modules.append(module)
+                    module = None
+                else:
+                    raise ValueError(f"unknown record type {kind!r}")
+        except IndexError:
+            raise ValueError(f"Invalid binary object program: truncated record at byte {position}")
+        except ValueError as e:
+            raise ValueError(f"Invalid binary object program at byte {position}: {e}")
+        if module is not None:
+            raise ValueError(f"Invalid binary object program: section {module.name} has no E record")
+        return modules
+
+
+def _addr(data: bytes, position: int) -> int:
+    if position + 3 > len(data):
+        raise IndexError(position)
+    return int.from_bytes(data[position:position + 3], "big")
+
+
+def _name(data: bytes, position: int) -> Tuple[str, int]:
+    """回傳 (名稱, 下一個位置)"""
+    length = data[position]
+    end = position + 1 + length
+    if end > len(data):
+        raise IndexError(position)
+    return data[position + 1:end].decode("ascii"), end
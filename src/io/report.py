@@ -0,0 +1,161 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, TextIO
+
+from ..corefunc.analyzer import TABLE_COLUMNS, Analyzer
+
+#! --report 的輸出格式（由副檔名判斷）
+REPORT_FORMATS = ("jsonl", "csv", "listing", "xref")
+_EXTENSIONS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv", ".lst": "listing", ".xref": "xref"}
+
+
+class ReportWriter(ABC):
+    """
+    將每個組譯完成的 section 的 Analyzer 表格串流寫入檔案
+    表格由 Analyzer.iter_rows 逐列產生、逐列寫出，不建立完整表格，
+    輸出時間與 section 大小成線性，額外記憶體用量固定
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    @abstractmethod
+    def write_section(self, section) -> None:
+        """寫出一個組譯完成的 section"""
+
+    @abstractmethod
+    def close(self) -> None:
+        """關閉輸出的檔案"""
+
+    def __enter__(self) -> "ReportWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class JsonLinesReport(ReportWriter):
+    """
+    JSON Lines：每一列一個 JSON 物件
+    {"section": 名稱, "table": "SYMTAB"/"EXTREF"/"EXTDEF"/"LITTAB"/"MODREC"/"INSTR", 欄位...}
+    欄位名稱見 analyzer.TABLE_COLUMNS，位址為十進位整數（沒有位址時為 null）
+    """
+    def __init__(self, path: str):
+        import json #! json/csv 只有輸出對應格式的報表時才需要
+        super().__init__(path)
+        self.file = open(path, "w")
+        self._dumps = json.dumps
+
+    def write_section(self, section) -> None:
+        analyzer = Analyzer(section)
+        dumps = self._dumps
+        for table, columns in TABLE_COLUMNS.items():
+            prefix = {"section": section.name, "table": table}
+            self.file.writelines(
+                dumps({**prefix, **dict(zip(columns, row))}) + "\n"
+                for row in analyzer.iter_rows(table)
+            )
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class CsvReport(ReportWriter):
+    """
+    CSV：每個表格一個檔案，out.csv → out.symtab.csv、out.extref.csv、…、out.instr.csv
+    第一欄為 section 名稱，其後為 analyzer.TABLE_COLUMNS 的欄位
+    """
+    def __init__(self, path: str):
+        import csv
+        super().__init__(path)
+        stem, extension = os.path.splitext(path)
+        self.files: Dict[str, TextIO] = {}
+        self.writers = {}
+        for table, columns in TABLE_COLUMNS.items():
+            file = open(f"{stem}.{table.lower()}{extension or '.csv'}", "w", newline="")
+            self.files[table] = file
+            self.writers[table] = csv.writer(file)
+            self.writers[table].writerow(("section", *columns))
+
+    def write_section(self, section) -> None:
+        analyzer = Analyzer(section)
+        name = section.name
+        for table, writer in self.writers.items():
+            writer.writerows((name, *row) for row in analyzer.iter_rows(table))
+
+    def close(self) -> None:
+        for file in self.files.values():
+            file.close()
+
+
+class ListingReport(ReportWriter):
+    """
+    組譯 listing：每個 section 的原始行號、位址、原始碼欄位與目標碼，其後為該 section 的符號表
+    """
+    _LINE = "{:>5}  {:<6}  {:<8} {:<8} {:<20} {}\n"
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.file = open(path, "w")
+        self.file.write(self._LINE.format("Line", "Loc", "Symbol", "Mnemonic", "Operand", "Object code"))
+
+    def write_section(self, section) -> None:
+        analyzer = Analyzer(section)
+        template = self._LINE
+        self.file.write(f"\n. Section {section.name}\n")
+        self.file.writelines(
+            template.format("" if line is None else line, "" if location is None else f"{location:04X}",
+                            symbol, f"+{mnemonic}" if formatType == 4 else mnemonic, operand, object_code).rstrip() + "\n"
+            for _, line, formatType, symbol, mnemonic, operand, object_code, location, _ in analyzer.iter_rows("INSTR")
+        )
+        self.file.write(f"\n. Symbol table of {section.name}\n")
+        self.file.writelines(
+            f".   {name:<8} {'' if address is None else f'{address:04X}':<6}{' external' if is_external else ''}".rstrip() + "\n"
+            for name, address, is_external in analyzer.iter_rows("SYMTAB")
+        )
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class XrefReport(ReportWriter):
+    """
+    交叉參考 listing：每個 section 的符號依名稱排序，列出值、定義的行號與所有引用它的行號（section.xref）
+    外部參考的值為 EXTREF，未定義的符號沒有值與定義行號，組譯器產生的指令（literal pool 的 BYTE）沒有行號
+    """
+    _LINE = "{:<8} {:<8} {:>5}  {}\n"
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.file = open(path, "w")
+        self.file.write(self._LINE.format("Symbol", "Value", "Def", "References"))
+
+    def write_section(self, section) -> None:
+        template = self._LINE
+        symbol_table, extref_table = section.symbol_table, section.extref_table
+        self.file.write(f"\n. Section {section.name}\n")
+        for name, definition, uses in section.xref.entries():
+            if name in symbol_table:
+                address = symbol_table[name].addr
+                value = "" if address is None else f"{address:04X}"
+            else:
+                value = "EXTREF" if name in extref_table else ""
+            line = "" if definition is None or definition.line is None else definition.line
+            references = " ".join(str(use.line) for use in uses if use.line is not None)
+            self.file.write(template.format(name, value, line, references).rstrip() + "\n")
+
+    def close(self) -> None:
+        self.file.close()
+
+
+_WRITERS = {"jsonl": JsonLinesReport, "csv": CsvReport, "listing": ListingReport, "xref": XrefReport}
+
+
+def open_report(path: str, report_format: Optional[str] = None) -> ReportWriter:
+    """依 report_format（未指定時由副檔名 .jsonl/.csv/.lst 判斷）建立 ReportWriter"""
+    if report_format is None:
+        report_format = _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if report_format is None:
+            raise ValueError(f"Cannot infer the report format of '{path}': use a .jsonl, .csv, .lst or .xref extension")
+    if report_format not in _WRITERS:
+        raise ValueError(f"Unknown report format '{report_format}', expected one of {', '.join(REPORT_FORMATS)}")
+    return _WRITERS[report_format](path)
@@ -1,5 +1,24 @@
+import io
+from typing import List, Optional, Tuple
+
+from ..models.dataTypes import ObjectModule
+
+#! 一個 Text record 最多 30 bytes（60 個十六進位字元）
+TEXT_RECORD_BYTES = 30
+
+#! 遇到這些指令時結束目前的 Text record
+_TEXT_BREAK_MNEMONICS = frozenset(("RESW", "RESB", "USE"))
+
+OBJECT_FORMATS = ("text", "binary")
+
 
 class ObjectFileWriter:
+    """
+    寫出 object program
+    - text：一般的 H/D/R/T/M/E 十六進位文字記錄
+    - binary：相同的記錄以原始 bytes 儲存（見 write_section_binary），不做十六進位編碼
+    每個 section 先在記憶體中組好，再以一次 write 寫出
+    """
     def __init__(self):
         self.H_header = ""
         self.D_extdef = ""
@@ -8,28 +27,27 @@ class ObjectFileWriter:
         self.M_modification = ""
         self.E_end = ""
         self.text_record_template = "T{:06X}{:02X}{}\n"
-    
+
     #! 寫入 section 的 header (H) 記錄
     def _write_section_header(self, section, output_file):
-        start_loc = section.instructions[0].location.address
-        end_loc = section.instructions[-1].location.address
+        start_loc, length = self._section_bounds(section)
         self.H_header = (
             f"H{section.instructions[0].symbol.ljust(6)}"
             f"{start_loc:06X}"
-            f"{end_loc - start_loc:06X}\n" # Length of program
+            f"{length:06X}\n" # Length of program
         )
         output_file.write(self.H_header)
-    
+
     #! 寫入 EXTDEF (D) 記錄
     def _write_extdef(self, section, output_file):
         self.D_extdef = ""
         if not section.extdef_table:
             return
-        
+
         # 將符號和地址配對並分組（每組5個）
         symbols = [(name, symbol.addr) for name, symbol in section.extdef_table.items()]
         groups = [symbols[i : i + 5] for i in range(0, len(symbols), 5)]
-    
+
         # 寫入每一組
         for group in groups:
             output_file.write("D")
@@ -43,7 +61,7 @@ class ObjectFileWriter:
         self.R_extref = ""
         if not section.extref_table:
             return
-    
+
         # 將符號分組（每組5個）
         symbols = list(section.extref_table.keys())
         groups = [symbols[i : i + 5] for i in range(0, len(symbols), 5)]
@@ -55,31 +73,63 @@ class ObjectFileWriter:
                 output_file.write(name.ljust(6))
             output_file.write("\n")
 
+    #! 切出 section 的 Text record 範圍
+    def _collect_text_records(self, section) -> Tuple[str, List[Tuple[int, int, int]]]:
+        """
+        回傳 (整個 section 串接後的目標碼, [(起始位址, byte offset, byte 長度), ...])
+        record 的切分只用長度計算，目標碼只在最後 join 一次，不做逐 record 的字串串接
+        """
+        instructions = section.instructions
+        codes = [instruction.objectCode for instruction in instructions]
+        records: List[Tuple[int, int, int]] = []
+        append_record = records.append
+        offset = 0
+        cur_row = 0
+        cur_offset = 0
+        for row, object_code in enumerate(codes):
+            if not object_code:  # 跳過沒有目標碼的指令
+                if offset > cur_offset and instructions[row].mnemonic in _TEXT_BREAK_MNEMONICS:
+                    append_record((instructions[cur_row].location.address, cur_offset, offset - cur_offset))
+                    cur_offset = offset
+                continue
+
+            size = len(object_code) // 2
+            if offset == cur_offset:
+                cur_row = row
+            elif offset - cur_offset + size > TEXT_RECORD_BYTES:
+                append_record((instructions[cur_row].location.address, cur_offset, offset - cur_offset))
+                cur_offset = offset
+                cur_row = row
+            offset += size
+
+        if offset > cur_offset:
+            append_record((instructions[cur_row].location.address, cur_offset, offset - cur_offset))
+        text = "".join(codes)
+        if len(text) != offset * 2: #! 有奇數位數的目標碼時 record 長度無法以 byte 表示
+            odd = next(code for code in codes if len(code) % 2)
+            raise ValueError(f"Invalid object code '{odd}' in section {section.name}: odd number of hex digits")
+        return text, records
+
+    #! 將 section 的目標碼打包成 bytes
+    def _pack_text_records(self, section) -> Tuple[bytearray, List[Tuple[int, int, int]]]:
+        """回傳 (目標碼 bytearray, records)，整個 section 只做一次十六進位解碼"""
+        text, records = self._collect_text_records(section)
+        try:
+            code = bytearray.fromhex(text)
+        except ValueError as e:
+            raise ValueError(f"Invalid object code in section {section.name}: {e}")
+        if len(code) * 2 != len(text): #! fromhex 會忽略空白
+            raise ValueError(f"Invalid object code in section {section.name}: unexpected whitespace")
+        return code, records
+
     #! 寫入 Text (T) 記錄
     def _write_text_records(self, section, output_file):
-        cur_start = None
-        cur_text = ""
-        for instruction in section.instructions:
-            if (instruction.mnemonic in ["RESW", "RESB", "USE"]):
-                if cur_text != "":
-                    self._write_single_text_record(output_file, cur_start, cur_text)
-                    cur_text = ""
-                continue
-            
-            #TODO 不確定會不會有沒有目標碼的指令
-            if not instruction.objectCode:  # 跳過沒有目標碼的指令
-                continue
-            
-            if cur_text == "":
-                cur_start = instruction.location.address
-            if len(cur_text) + len(instruction.objectCode) > 60:
-                self._write_single_text_record(output_file, cur_start, cur_text)
-                cur_text = ""
-                cur_start = instruction.location.address
-            cur_text += instruction.objectCode
-            
-        if cur_text != "":
-            self._write_single_text_record(output_file, cur_start, cur_text)
+        text, records = self._collect_text_records(section)
+        template = self.text_record_template
+        output_file.write("".join(
+            template.format(start, length, text[offset * 2:(offset + length) * 2])
+            for start, offset, length in records
+        ))
 
     #! 寫入單一個 Text record
     def _write_single_text_record(self, output_file, start, text):
@@ -91,35 +141,130 @@ class ObjectFileWriter:
         self.M_modification = ""
         if not section.modification_records:
             return
-        
-        sorted_records = sorted(section.modification_records, key=lambda x: x.location)
-        for record in sorted_records:
-            output_file.write(f"M{record.location:06X}{record.length:02X}{record.sign}{record.reference}\n")
+
+        #! 修改記錄表已依 location 排序
+        output_file.write("".join(
+            f"M{record.location:06X}{record.length:02X}{record.sign}{record.reference}\n"
+            for record in section.modification_records.in_location_order()
+        ))
 
     #! 寫入 End (E) 記錄
     def _write_section_end(self, section, output_file):
         output_file.write("E")
+        entry_address = self._entry_address(section)
+        if entry_address is not None:
+            output_file.write(f"{entry_address:06X}")
+        output_file.write("\n\n")
+
+    @staticmethod
+    def _section_bounds(section) -> Tuple[int, int]:
+        """回傳 section 的 (起始位址, 長度)"""
+        start_loc = section.instructions[0].location.address
+        end_loc = section.instructions[-1].location.address
+        return start_loc, end_loc - start_loc
+
+    @staticmethod
+    def _entry_address(section) -> Optional[int]:
+        """END 指令指定的程式進入點，沒有指定時回傳 None"""
         last_instruction = section.instructions[-1]
         if last_instruction.mnemonic == "END" and last_instruction.operand != "":
             #TODO 在 section 的符號表中尋找該符號的位址(這個部分需要再確認)
             entry_symbol = last_instruction.operand
             if entry_symbol in section.symbol_table:
-                entry_address = section.symbol_table[entry_symbol].addr
-                output_file.write(f"{entry_address:06X}")
-            else:
-                raise ValueError(f"Symbol {entry_symbol} not found in symbol table")
-        output_file.write("\n\n")
-        
+                return section.symbol_table[entry_symbol].addr
+            raise ValueError(f"Symbol {entry_symbol} not found in symbol table")
+        return None
+
     def write_section(self, section, output_file):
         """
         主要的寫入函數，負責協調各個子函數來寫入完整的 section
+        所有記錄先寫入記憶體緩衝區，整個 section 只呼叫一次 output_file.write
+        """
+        buffer = io.StringIO()
+        self._write_section_header(section, buffer)
+        self._write_extdef(section, buffer)
+        self._write_extref(section, buffer)
+        self._write_text_records(section, buffer)
+        self._write_modification_records(section, buffer)
+        self._write_section_end(section, buffer)
+        output_file.write(buffer.getvalue())
+
+    def to_module(self, section) -> ObjectModule:
+        """
+        不經過文字記錄，直接把組譯完成的 section 轉成 ObjectModule（給 linking loader 使用）
+        內容與 write_section 的 H/D/R/T/M/E 相同，只是位址連續的 Text record 合併成一段
+        """
+        start_loc, length = self._section_bounds(section)
+        code, records = self._pack_text_records(section)
+        view = memoryview(code)
+        text: List[Tuple[int, bytes]] = []
+        run_start, run_offset, run_length = 0, 0, 0
+        for start, offset, size in records:
+            if run_length and start == run_start + run_length and offset == run_offset + run_length:
+                run_length += size
+                continue
+            if run_length:
+                text.append((run_start, bytes(view[run_offset:run_offset + run_length])))
+            run_start, run_offset, run_length = start, offset, size
+        if run_length:
+            text.append((run_start, bytes(view[run_offset:run_offset + run_length])))
+        return ObjectModule(
+            name=section.instructions[0].symbol,
+            start=start_loc,
+            length=length,
+            definitions={name: symbol.addr for name, symbol in section.extdef_table.items() if symbol.addr is not None},
+            references=list(section.extref_table),
+            text=text,
+            modifications=section.modification_records.in_location_order(),
+            entry=self._entry_address(section),
+        )
+
+    def write_section_binary(self, section, output_file):
         """
-        self._write_section_header(section, output_file)
-        self._write_extdef(section, output_file)
-        self._write_extref(section, output_file)
-        self._write_text_records(section, output_file)
-        self._write_modification_records(section, output_file)
-        self._write_section_end(section, output_file)
-    
-    
-    
+        以 binary 格式寫入 section（output_file 需以 "wb" 開啟），記錄與 text 格式一一對應：
+        - 位址/長度為 3 bytes big-endian，名稱為 1 byte 長度 + ASCII
+        - H: 'H' 名稱 起始位址 長度
+        - D: 'D' 個數(1) [名稱 位址]...        R: 'R' 個數(1) [名稱]...
+        - T: 'T' 起始位址 長度(1) 目標碼      M: 'M' 位址 半位元組數(1) 正負號(1) 名稱
+        - E: 'E' 是否有進入點(1) 進入點位址
+        """
+        out = bytearray()
+        start_loc, length = self._section_bounds(section)
+        out += b"H" + _name(section.instructions[0].symbol) + _addr(start_loc) + _addr(length)
+
+        symbols = [(name, symbol.addr) for name, symbol in section.extdef_table.items() if symbol.addr is not None]
+        for i in range(0, len(symbols), 5):
+            group = symbols[i : i + 5]
+            out += b"D" + bytes((len(group),))
+            for name, addr in group:
+                out += _name(name) + _addr(addr)
+
+        names = list(section.extref_table.keys())
+        for i in range(0, len(names), 5):
+            group = names[i : i + 5]
+            out += b"R" + bytes((len(group),))
+            for name in group:
+                out += _name(name)
+
+        code, records = self._pack_text_records(section)
+        view = memoryview(code)
+        for start, offset, length in records:
+            out += b"T" + _addr(start) + bytes((length,))
+            out += view[offset:offset + length]
+
+        for record in section.modification_records.in_location_order():
+            out += b"M" + _addr(record.location) + bytes((record.length,)) + (record.sign or " ").encode("ascii") + _name(record.reference)
+
+        entry_address = self._entry_address(section)
+        out += b"E" + (b"\x01" + _addr(entry_address) if entry_address is not None else b"\x00" + _addr(0))
+        output_file.write(out)
+
+
+def _addr(value: int) -> bytes:
+    """3 bytes big-endian 位址（與 text 格式的 6 位十六進位相同範圍）"""
+    return (value & 0xFFFFFF).to_bytes(3, "big")
+
+
+def _name(name: str) -> bytes:
+    data = name.encode("ascii")
+    return bytes((len(data),)) + data
@@ -0,0 +1,143 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .corefunc.section import Section
+from .io.reader import ObjectFileReader
+from .io.writer import ObjectFileWriter
+from .models.dataTypes import ObjectModule
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class LoadedImage:
+    """linking loader 的結果
+    address: 記憶體映像的起始位址（PROGADDR）
+    memory: 載入並完成修改的記憶體內容（memory[0] 對應 address，RESW/RESB 的空間為 0）
+    estab: 外部符號表（control section 名稱與 EXTDEF 符號 -> 載入後的位址）
+    sections: 每個 control section 的 (名稱, 載入位址, 長度)
+    entry: 開始執行的位址（第一個指定進入點的 E 記錄，都沒有時為 address）
+    """
+    address: int
+    memory: bytearray
+    estab: Dict[str, int] = field(default_factory=dict)
+    sections: List[Tuple[str, int, int]] = field(default_factory=list)
+    entry: int = 0
+
+    def format_load_map(self) -> str:
+        """ESTAB（load map）：每個 control section 的載入位址與長度，接著是它的 EXTDEF 符號"""
+        lengths = {name: length for name, _, length in self.sections}
+        lines = [f"{'Control section':<16}{'Symbol':<10}{'Address':<9}Length"]
+        for name, address in self.estab.items(): #! ESTAB 依 section、再依其 D 記錄的順序建立
+            if name in lengths:
+                lines.append(f"{name:<16}{'':<10}{address:06X}   {lengths[name]:06X}")
+            else:
+                lines.append(f"{'':<16}{name:<10}{address:06X}")
+        lines.append(f"Execution starts at {self.entry:06X}")
+        return "\n".join(lines)
+
+
+class LinkingLoader:
+    """
+    linking loader，把多個 control section（可來自多個 object program）載入成一份記憶體映像
+    1. pass 1：依序配置每個 control section 的載入位址（CSADDR），由 H/D 記錄建立全域的 ESTAB
+    2. pass 2：T 記錄以 slice 複製到 bytearray，再套用 M 記錄
+       M 記錄先依 (記憶體位置, 半位元組數) 累加成一個淨調整量，同一個欄位的多筆 +/- 只讀寫記憶體一次
+    輸入可以是 object program 檔案（text 或 binary）、ObjectModule，或直接是組譯完成的 Section（不經過文字記錄）
+    組譯時的位址以 H 記錄的起始位址為準，載入後平移 (CSADDR - 起始位址)
+    """
+    def __init__(self, address: Optional[int] = None):
+        self.address = address #! PROGADDR，None 表示使用第一個 control section 的起始位址
+        self.modules: List[ObjectModule] = []
+        self.reader = ObjectFileReader()
+        self.writer = ObjectFileWriter()
+
+    def add_module(self, module: ObjectModule) -> None:
+        self.modules.append(module)
+
+    def add_file(self, path: str) -> None:
+        """加入 object program 檔案中的所有 control section"""
+        self.modules.extend(self.reader.read(path))
+
+    def add_object_program(self, data: Union[str, bytes]) -> None:
+        """加入記憶體中的 object program（例如 MyAssembler.object_program() 的結果）"""
+        self.modules.extend(self.reader.parse(data))
+
+    def add_section(self, section: Section) -> None:
+        self.modules.append(self.writer.to_module(section))
+
+    def add_sections(self, sections: Iterable[Section]) -> None:
+        for section in sections:
+            self.add_section(section)
+
+    def link(self) -> LoadedImage:
+        if not self.modules:
+            raise ValueError("Nothing to load: no control sections were added")
+        address = self.modules[0].start if self.address is None else self.address
+        estab, sections = self._build_estab(address)
+        memory = bytearray(sections[-1][1] + sections[-1][2] - address)
+        entry: Optional[int] = None
+        adjustments: Dict[Tuple[int, int], int] = {}
+
+        #! Pass 2
+        for module, (name, base, length) in zip(self.modules, sections):
+            delta = base - module.start #! 組譯時的位址 -> 載入後的位址
+            offset = delta - address    #! 組譯時的位址 -> memory 的 index
+            low, high = base - address, base - address + length
+            for start, code in module.text:
+                index = start + offset
+                if index < low or index + len(code) > high:
+                    raise ValueError(f"T record at {start:06X} is outside of control section {name}")
+                memory[index:index + len(code)] = code
+            for record in module.modifications:
+                if record.reference:
+                    value = estab.get(record.reference)
+                    if value is None:
+                        raise ValueError(f"Undefined external symbol '{record.reference}' in control section {name}")
+                else:
+                    value = delta #! 沒有符號的 M 記錄：以 section 的載入位址重定位
+                key = (record.location + offset, record.length)
+                adjustments[key] = adjustments.get(key, 0) + (-value if record.sign == "-" else value)
+            if entry is None and module.entry is not None:
+                entry = module.entry + delta
+
+        self._apply(memory, adjustments)
+        logger.info("Loaded %d control section(s) at %06X, %d bytes, %d modification(s)",
+                    len(sections), address, len(memory), len(adjustments))
+        return LoadedImage(address, memory, estab, sections, address if entry is None else entry)
+
+    def _build_estab(self, address: int) -> Tuple[Dict[str, int], List[Tuple[str, int, int]]]:
+        """Pass 1：回傳 (ESTAB, [(section 名稱, 載入位址, 長度), ...])"""
+        estab: Dict[str, int] = {}
+        sections: List[Tuple[str, int, int]] = []
+        csaddr = address
+        for module in self.modules:
+            delta = csaddr - module.start
+            _define(estab, module.name, csaddr, module.name)
+            for name, value in module.definitions.items():
+                _define(estab, name, value + delta, module.name)
+            sections.append((module.name, csaddr, module.length))
+            csaddr += module.length
+        return estab, sections
+
+    @staticmethod
+    def _apply(memory: bytearray, adjustments: Dict[Tuple[int, int], int]) -> None:
+        """把累加好的調整量寫入記憶體：欄位為 (半位元組數 + 1) // 2 bytes，只修改最低的半位元組數 * 4 位元"""
+        size = len(memory)
+        from_bytes = int.from_bytes
+        for (index, nibbles), amount in adjustments.items():
+            if not amount:
+                continue
+            width = (nibbles + 1) // 2
+            if index < 0 or index + width > size:
+                raise ValueError(f"Modification at memory offset {index:06X} is outside of the loaded image")
+            mask = (1 << (4 * nibbles)) - 1
+            value = from_bytes(memory[index:index + width], "big")
+            memory[index:index + width] = ((value & ~mask) | ((value + amount) & mask)).to_bytes(width, "big")
+
+
+def _define(estab: Dict[str, int], name: str, address: int, section: str) -> None:
+    if name in estab:
+        raise ValueError(f"Duplicate external symbol '{name}' in control section {section}")
+    estab[name] = address
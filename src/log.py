@@ -0,0 +1,96 @@
+import contextlib
+import logging
+import sys
+from typing import Iterator, List
+
+#! 所有組譯器 logger 的共同前綴（get_logger 產生 sicxe.<module>）
+LOGGER_NAME = "sicxe"
+
+#! 預設只輸出 warning/error（quiet），-v 為 INFO（檔案/section 層級進度），-vv 為 DEBUG（每個步驟）
+DEFAULT_LEVEL = logging.WARNING
+
+
+def get_logger(name: str) -> logging.Logger:
+    """取得組譯器的 logger，訊息以 % 參數延遲格式化，未啟用的層級不會產生字串"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def level_for(verbose: int = 0, quiet: bool = False) -> int:
+    """命令列的 -v 次數與 --quiet 轉換成 logging 層級"""
+    if quiet:
+        return logging.ERROR
+    if verbose >= 2:
+        return logging.DEBUG
+    if verbose == 1:
+        return logging.INFO
+    return DEFAULT_LEVEL
+
+
+class _ConsoleHandler(logging.StreamHandler):
+    """
+    每次輸出時才取得 sys.stdout，
+    worker process 與批次模式以 contextlib.redirect_stdout 收集訊息時也會被導向
+    """
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class _ConsoleFormatter(logging.Formatter):
+    """INFO/DEBUG 只輸出訊息本身，WARNING 以上加上 'Warning: ' / 'Error: ' 前綴"""
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        if record.levelno >= logging.WARNING:
+            return f"{record.levelname.capitalize()}: {message}"
+        return message
+
+
+def configure_logging(level: int = DEFAULT_LEVEL) -> None:
+    """設定 console 輸出的層級（可重複呼叫，只會安裝一個 handler；也作為 worker process 的 initializer）"""
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level)
+    logger.propagate = False
+    if not any(isinstance(handler, _ConsoleHandler) for handler in logger.handlers):
+        handler = _ConsoleHandler()
+        handler.setFormatter(_ConsoleFormatter("%(message)s"))
+        logger.addHandler(handler)
+
+
+def current_level() -> int:
+    """目前生效的層級（傳給 worker process，使其輸出與主程序一致）"""
+    return logging.getLogger(LOGGER_NAME).getEffectiveLevel()
+
+
+class _RecordCollector(logging.Handler):
+    def __init__(self, level: int):
+        super().__init__(level)
+        self.records: List[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+@contextlib.contextmanager
+def capture_logs(level: int = logging.WARNING) -> Iterator[List[logging.LogRecord]]:
+    """
+    收集 with 區塊內 level 以上的 log record（daemon 以此回傳每個請求的診斷訊息）
+    logger 的層級高於 level 時暫時調低，結束後還原
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    handler = _RecordCollector(level)
+    previous = logger.level
+    if logger.getEffectiveLevel() > level:
+        logger.setLevel(level)
+    logger.addHandler(handler)
+    try:
+        yield handler.records
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(previous)
@@ -1,7 +1,20 @@
-from dataclasses import dataclass
-from typing import Optional, TypedDict, Dict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, NamedTuple, Mapping, Tuple
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class AssemblerOptions:
+    """組譯設定（不可變，同一個 process 中設定不同的多個組譯可以同時進行並共用 opcode/directive table）
+    bonus: 啟用 bonus 功能（literal pool、program block、EXTDEF/EXTREF、指令重新排序與對應的修改記錄）
+    compact: 組譯完成的 section 轉為欄位式的 InstructionTable
+    object_format: object program 格式（"text" 或 "binary"）
+    use_mmap: 以 mmap 讀取輸入檔
+    """
+    bonus: bool = False
+    compact: bool = False
+    object_format: str = "text"
+    use_mmap: bool = False
+
+@dataclass(slots=True)
 class Location:
     """位置類別，用於表示記憶體位置
     address: 記憶體地址
@@ -10,18 +23,20 @@ class Location:
     address: int
     is_relative: bool = True
 
-@dataclass
+@dataclass(slots=True)
 class Symbol:
     """符號類別，用於表示標籤
     name: 符號名稱
     addr: 符號對應的記憶體地址（可選）
     is_external: 是否為外部符號（預設為False）
+    is_relative: 是否為可重定位的位址（EQU 絕對值為 False）
     """
     name: str
     addr: Optional[int] = None
     is_external: bool = False
+    is_relative: bool = True
 
-@dataclass
+@dataclass(slots=True)
 class ModificationRecord:   #! 修改記錄(M 000007 05+COPY)
     """修改記錄類別，用於處理目標程式的修改記錄
     location: 需要修改的位置
@@ -34,7 +49,28 @@ class ModificationRecord:   #! 修改記錄(M 000007 05+COPY)
     sign: str = ""          #! +
     reference: str = ""     #! COPY
 
-@dataclass
+@dataclass(slots=True)
+class ObjectModule:
+    """一個 control section 的 object program（H/D/R/T/M/E 記錄的內容），linking loader 的輸入
+    name: section 名稱（H）
+    start: 組譯時的起始位址（H）
+    length: section 長度（H）
+    definitions: EXTDEF 符號 -> 組譯時的位址（D）
+    references: EXTREF 符號（R）
+    text: (起始位址, 目標碼) 的串列（T）
+    modifications: 修改記錄（M，reference 為空字串時表示以 section 的載入位址重定位）
+    entry: 程式進入點（E，沒有指定時為 None）
+    """
+    name: str
+    start: int
+    length: int
+    definitions: Dict[str, int] = field(default_factory=dict)
+    references: List[str] = field(default_factory=list)
+    text: List[Tuple[int, bytes]] = field(default_factory=list)
+    modifications: List[ModificationRecord] = field(default_factory=list)
+    entry: Optional[int] = None
+
+@dataclass(slots=True)
 class Instruction:
     """指令類別，用於表示組合語言指令
     index: 指令索引
@@ -44,6 +80,7 @@ class Instruction:
     operand: 運算元
     objectCode: 目標碼（預設為空字串）
     location: 指令位置（可選）
+    line: 原始檔案中的行號（可選，用於錯誤訊息）
     """
     index: int
     formatType: int
@@ -52,8 +89,9 @@ class Instruction:
     operand: str
     objectCode: str = ""
     location: Optional[Location] = None
+    line: Optional[int] = None
 
-@dataclass
+@dataclass(slots=True)
 class Literal:
     """字面值類別，用於處理常數或字串字面值
     name: 字面值名稱
@@ -64,14 +102,13 @@ class Literal:
     data: str
     used_count: int = 0
 
-@dataclass
-class OpcodeEntry(TypedDict):
-    """操作碼表項目類別，用於定義操作碼的相關資訊
-    obj: 操作碼的機器碼
+class OpcodeEntry(NamedTuple):
+    """操作碼表項目類別（不可變），用於定義操作碼的相關資訊
+    opcode: 操作碼的機器碼（整數）
     format: 指令格式
     """
-    obj: str
+    opcode: int
     format: int
     
-# 操作碼表型別定義，用於儲存所有操作碼
-OpcodeTable = Dict[str, OpcodeEntry]
\ No newline at end of file
+# 操作碼表型別定義，用於儲存所有操作碼（config.opcode_table 為唯讀的 MappingProxyType）
+OpcodeTable = Mapping[str, OpcodeEntry]
\ No newline at end of file
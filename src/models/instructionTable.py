@@ -0,0 +1,217 @@
+from array import array
+from typing import Iterable, Iterator, List, Optional, Union, overload
+
+from .dataTypes import Instruction, Location
+
+_NO_LINE = -1
+
+#! location 欄位的狀態
+_NO_LOCATION = 0
+_ABSOLUTE = 1
+_RELATIVE = 2
+
+
+class LocationView:
+    """InstructionTable 中某一列的 location，讀寫都直接對應到欄位"""
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "InstructionTable", row: int):
+        self._table = table
+        self._row = row
+
+    @property
+    def address(self) -> int:
+        return self._table._address[self._row]
+
+    @address.setter
+    def address(self, value: int) -> None:
+        self._table._address[self._row] = value
+
+    @property
+    def is_relative(self) -> bool:
+        return self._table._location_state[self._row] == _RELATIVE
+
+    @is_relative.setter
+    def is_relative(self, value: bool) -> None:
+        self._table._location_state[self._row] = _RELATIVE if value else _ABSOLUTE
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (Location, LocationView)):
+            return self.address == other.address and self.is_relative == other.is_relative
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Location(address={self.address}, is_relative={self.is_relative})"
+
+
+class InstructionView:
+    """InstructionTable 中的一列，提供與 Instruction 相同的屬性"""
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "InstructionTable", row: int):
+        self._table = table
+        self._row = row
+
+    @property
+    def row(self) -> int:
+        """在 InstructionTable 中的列號"""
+        return self._row
+
+    @property
+    def index(self) -> int:
+        return self._table._index[self._row]
+
+    @index.setter
+    def index(self, value: int) -> None:
+        self._table._index[self._row] = value
+
+    @property
+    def formatType(self) -> int:
+        return self._table._format[self._row]
+
+    @formatType.setter
+    def formatType(self, value: int) -> None:
+        self._table._format[self._row] = value
+
+    @property
+    def symbol(self) -> str:
+        return self._table._symbol[self._row]
+
+    @symbol.setter
+    def symbol(self, value: str) -> None:
+        self._table._symbol[self._row] = value
+
+    @property
+    def mnemonic(self) -> str:
+        return self._table._mnemonic[self._row]
+
+    @mnemonic.setter
+    def mnemonic(self, value: str) -> None:
+        self._table._mnemonic[self._row] = value
+
+    @property
+    def operand(self) -> str:
+        return self._table._operand[self._row]
+
+    @operand.setter
+    def operand(self, value: str) -> None:
+        self._table._operand[self._row] = value
+
+    @property
+    def objectCode(self) -> str:
+        return self._table._object_code[self._row]
+
+    @objectCode.setter
+    def objectCode(self, value: str) -> None:
+        self._table._object_code[self._row] = value
+
+    @property
+    def location(self) -> Optional[LocationView]:
+        if self._table._location_state[self._row] == _NO_LOCATION:
+            return None
+        return LocationView(self._table, self._row)
+
+    @location.setter
+    def location(self, value: Optional[Location]) -> None:
+        self._table._set_location(self._row, value)
+
+    @property
+    def line(self) -> Optional[int]:
+        line = self._table._line[self._row]
+        return None if line == _NO_LINE else line
+
+    @line.setter
+    def line(self, value: Optional[int]) -> None:
+        self._table._line[self._row] = _NO_LINE if value is None else value
+
+    def to_instruction(self) -> Instruction:
+        location = self.location
+        return Instruction(
+            index=self.index,
+            formatType=self.formatType,
+            symbol=self.symbol,
+            mnemonic=self.mnemonic,
+            operand=self.operand,
+            objectCode=self.objectCode,
+            location=Location(location.address, location.is_relative) if location is not None else None,
+            line=self.line,
+        )
+
+    def __repr__(self) -> str:
+        return repr(self.to_instruction())
+
+
+class InstructionTable:
+    """
+    欄位式（columnar）的指令表
+    - index/format/location/line 以 array 儲存，字串欄位以 list 儲存（字串已 intern）
+    - 不需要為每一行建立 Instruction 與 Location 物件，適合保存大型程式組譯完成後的結果
+    - 取出的元素為 InstructionView，屬性與 Instruction 相同，Section/ObjectFileWriter/Analyzer 可直接使用
+    """
+    __slots__ = ("_index", "_format", "_symbol", "_mnemonic", "_operand", "_object_code",
+                 "_address", "_location_state", "_line")
+
+    def __init__(self, instructions: Iterable[Instruction] = ()):
+        self._index = array("q")
+        self._format = array("b")
+        self._symbol: List[str] = []
+        self._mnemonic: List[str] = []
+        self._operand: List[str] = []
+        self._object_code: List[str] = []
+        self._address = array("q")
+        self._location_state = bytearray()
+        self._line = array("q")
+        for instruction in instructions:
+            self.append(instruction)
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state) -> None:
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def append(self, instruction: Union[Instruction, InstructionView]) -> None:
+        self._index.append(instruction.index)
+        self._format.append(instruction.formatType)
+        self._symbol.append(instruction.symbol)
+        self._mnemonic.append(instruction.mnemonic)
+        self._operand.append(instruction.operand)
+        self._object_code.append(instruction.objectCode)
+        self._address.append(0)
+        self._location_state.append(_NO_LOCATION)
+        self._line.append(_NO_LINE if instruction.line is None else instruction.line)
+        self._set_location(len(self._index) - 1, instruction.location)
+
+    def _set_location(self, row: int, location: Optional[Location]) -> None:
+        if location is None:
+            self._address[row] = 0
+            self._location_state[row] = _NO_LOCATION
+        else:
+            self._address[row] = location.address
+            self._location_state[row] = _RELATIVE if location.is_relative else _ABSOLUTE
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @overload
+    def __getitem__(self, key: int) -> InstructionView: ...
+    @overload
+    def __getitem__(self, key: slice) -> List[InstructionView]: ...
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [InstructionView(self, row) for row in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("instruction index out of range")
+        return InstructionView(self, key)
+
+    def __iter__(self) -> Iterator[InstructionView]:
+        for row in range(len(self)):
+            yield InstructionView(self, row)
+
+    def to_instructions(self) -> List[Instruction]:
+        """轉回 Instruction 物件的列表"""
+        return [view.to_instruction() for view in self]
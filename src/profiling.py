@@ -0,0 +1,247 @@
+import contextlib
+import io
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+if TYPE_CHECKING:
+    import cProfile
+    import pstats
+
+T = TypeVar("T")
+
+#! JSON 輸出格式的版本，欄位有不相容的改變時才遞增（CI 依此判斷能否比較）
+PROFILE_SCHEMA_VERSION = 1
+
+#! 階段名稱（穩定的名稱，CI 以此擷取數據）
+PREPROCESS = "preprocess"
+CACHE_LOOKUP = "cache_lookup"
+LITERAL_POOL = "literal_pool"
+PROGRAM_BLOCK = "program_block"
+SYMBOL_TABLE = "symbol_table"
+ADDRESS = "address"
+EXTERNAL_DEFINITIONS = "external_definitions"
+REORDER = "reorder"
+OBJECT_CODE = "object_code"
+ANALYZE = "analyze"
+WRITE = "write"
+
+PHASES = (PREPROCESS, CACHE_LOOKUP, LITERAL_POOL, PROGRAM_BLOCK, SYMBOL_TABLE, ADDRESS,
+          EXTERNAL_DEFINITIONS, REORDER, OBJECT_CODE, ANALYZE, WRITE)
+
+
+@dataclass
+class PhaseRecord:
+    """
+    單一階段（某個 section 或整個檔案）的量測結果
+    phase: 階段名稱（見 PHASES）
+    section: section 名稱，整個檔案層級的階段為 None
+    seconds: 累計 wall time
+    calls: 進入此階段的次數
+    allocated_bytes: 階段結束時 tracemalloc 追蹤到的淨配置量（未啟用 tracemalloc 時為 0）
+    peak_bytes: 階段執行期間相對於開始時的最高記憶體用量
+    function_calls: 階段內的 Python 函式呼叫次數（只有啟用 cProfile 時才有，否則為 None）
+    """
+    phase: str
+    section: Optional[str] = None
+    seconds: float = 0.0
+    calls: int = 0
+    allocated_bytes: int = 0
+    peak_bytes: int = 0
+    function_calls: Optional[int] = None
+
+    def merge(self, other: "PhaseRecord") -> None:
+        self.seconds += other.seconds
+        self.calls += other.calls
+        self.allocated_bytes += other.allocated_bytes
+        self.peak_bytes = max(self.peak_bytes, other.peak_bytes)
+        if other.function_calls is not None:
+            self.function_calls = (self.function_calls or 0) + other.function_calls
+
+
+class Profiler:
+    """
+    組譯流程的量測工具
+    1. phase(name, section) 量測一段程式的 wall time、tracemalloc 配置量與呼叫次數
+    2. iterate(name, iterable) 只量測取得下一個元素的時間（用於串流的 preprocess）
+    3. 可選擇同時啟用 cProfile，輸出最耗時的函式或 dump 成 pstats 檔案
+    注意：phase 不可巢狀（tracemalloc 的 peak 在每個 phase 開始時重設）
+    """
+    def __init__(self, trace_memory: bool = True, cprofile: bool = False):
+        self.trace_memory = trace_memory
+        self.records: Dict[Tuple[str, Optional[str]], PhaseRecord] = {}
+        self.total_seconds = 0.0
+        self._profile: Optional["cProfile.Profile"] = None
+        if cprofile:
+            import cProfile #! cProfile/tracemalloc 只有量測時才需要，不影響一般組譯的啟動時間
+            self._profile = cProfile.Profile()
+        self._phase_profiles: List["cProfile.Profile"] = []
+        self._start: Optional[float] = None
+        self._owns_tracemalloc = False
+
+    #! 開始/結束
+    def start(self) -> None:
+        import tracemalloc
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        if self._profile is not None:
+            self._profile.enable()
+        self._start = time.perf_counter()
+
+    def stop(self) -> None:
+        if self._start is None:
+            return
+        self.total_seconds += time.perf_counter() - self._start
+        self._start = None
+        if self._profile is not None:
+            self._profile.disable()
+        if self._owns_tracemalloc:
+            import tracemalloc
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    #! 量測
+    @contextlib.contextmanager
+    def phase(self, name: str, section: Optional[str] = None) -> Iterator[None]:
+        #! 啟用 cProfile 時，每個 phase 使用自己的 Profile 計算函式呼叫次數，結束後再合併
+        import tracemalloc
+        profile = None
+        if self._profile is not None:
+            self._profile.disable()
+            profile = type(self._profile)()
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        if profile is not None:
+            profile.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if profile is not None:
+                profile.disable()
+            record = PhaseRecord(name, section, seconds, 1)
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                record.allocated_bytes = current - memory_before
+                record.peak_bytes = max(0, peak - memory_before)
+            if profile is not None:
+                record.function_calls = sum(entry.callcount for entry in profile.getstats())
+                self._phase_profiles.append(profile)
+            self.add(record)
+            if self._profile is not None:
+                self._profile.enable()
+
+    def iterate(self, name: str, iterable: Iterable[T], section: Optional[str] = None) -> Iterator[T]:
+        """逐一產生 iterable 的元素，只把取得元素所花的時間計入 name 階段"""
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name, section):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def add(self, record: PhaseRecord) -> None:
+        """加入量測結果，相同 (phase, section) 的結果會累加（也用於合併 worker process 的結果）"""
+        key = (record.phase, record.section)
+        if key in self.records:
+            self.records[key].merge(record)
+        else:
+            self.records[key] = record
+
+    #! 輸出
+    def phase_totals(self) -> Dict[str, PhaseRecord]:
+        """每個階段在所有 section 的合計，依 PHASES 的順序"""
+        totals: Dict[str, PhaseRecord] = {}
+        for record in self.records.values():
+            total = totals.setdefault(record.phase, PhaseRecord(record.phase))
+            total.merge(record)
+        order = {name: position for position, name in enumerate(PHASES)}
+        return dict(sorted(totals.items(), key=lambda item: order.get(item[0], len(order))))
+
+    def hot_functions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """cProfile 中內部時間（不含子呼叫）最多的函式"""
+        if self._profile is None:
+            return []
+        stats = self._stats()
+        rows = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{filename}:{line}({function})",
+                "calls": calls,
+                "own_seconds": own,
+                "cumulative_seconds": cumulative,
+            })
+        rows.sort(key=lambda row: row["own_seconds"], reverse=True)
+        return rows[:limit]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """穩定的 JSON 結構（schema_version = PROFILE_SCHEMA_VERSION）"""
+        sections: Dict[str, Dict[str, Any]] = {}
+        for record in self.records.values():
+            if record.section is not None:
+                sections.setdefault(record.section, {})[record.phase] = _record_dict(record)
+        return {
+            "schema_version": PROFILE_SCHEMA_VERSION,
+            "total_seconds": self.total_seconds,
+            "trace_memory": self.trace_memory,
+            "cprofile": self._profile is not None,
+            "phases": {name: _record_dict(record) for name, record in self.phase_totals().items()},
+            "sections": [{"name": name, "phases": phases} for name, phases in sections.items()],
+            "hot_functions": self.hot_functions(),
+        }
+
+    def to_json(self) -> str:
+        import json
+        return json.dumps(self.to_dict(), indent=2)
+
+    def format_table(self, hot_functions: int = 10) -> str:
+        """人類可讀的表格：每個階段的合計，其後為每個 section 的明細"""
+        lines = [f"{'phase':<22}{'section':<12}{'calls':>7}{'time (ms)':>12}{'alloc (KB)':>12}{'peak (KB)':>12}{'func calls':>12}"]
+        rows = [(record, "(all)") for record in self.phase_totals().values()]
+        rows += [(record, record.section) for record in self.records.values() if record.section is not None]
+        for record, section in rows:
+            function_calls = "-" if record.function_calls is None else str(record.function_calls)
+            lines.append(f"{record.phase:<22}{section:<12}{record.calls:>7}{record.seconds * 1000:>12.2f}"
+                         f"{record.allocated_bytes / 1024:>12.1f}{record.peak_bytes / 1024:>12.1f}{function_calls:>12}")
+        lines.append(f"total: {self.total_seconds * 1000:.2f} ms")
+        for row in self.hot_functions(hot_functions):
+            lines.append(f"  {row['own_seconds'] * 1000:9.2f} ms {row['calls']:>9}  {row['function']}")
+        return "\n".join(lines)
+
+    def _stats(self) -> "pstats.Stats":
+        """合併 phase 以外與每個 phase 的 cProfile 結果"""
+        import pstats #! 只有輸出 cProfile 結果時才需要
+        stats = pstats.Stats(self._profile, stream=io.StringIO())
+        for profile in self._phase_profiles:
+            stats.add(profile)
+        return stats
+
+    def dump_cprofile(self, path: str) -> None:
+        """輸出 pstats 格式的檔案（可用 python -m pstats 或 snakeviz 檢視）"""
+        if self._profile is None:
+            raise ValueError("cProfile is not enabled for this profiler")
+        self._stats().dump_stats(path)
+
+
+def _record_dict(record: PhaseRecord) -> Dict[str, Any]:
+    data = asdict(record)
+    del data["phase"], data["section"]
+    return data
+
+
+def profile_phase(profiler: Optional[Profiler], name: str, section: Optional[str] = None) -> contextlib.AbstractContextManager:
+    """profiler 為 None 時不做任何量測"""
+    return profiler.phase(name, section) if profiler is not None else contextlib.nullcontext()
@@ -0,0 +1,289 @@
+import base64
+import errno
+import http.client
+import io
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from config import daemon_endpoint
+from .assembler import MyAssembler
+from .io.writer import OBJECT_FORMATS
+from .log import LOGGER_NAME, capture_logs, get_logger
+from .models.dataTypes import AssemblerOptions
+
+logger = get_logger(__name__)
+
+#! 預設只接受本機連線
+DEFAULT_ENDPOINT = daemon_endpoint
+_LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+#! 單一請求的原始碼大小上限
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+Endpoint = Tuple[str, Union[str, Tuple[str, int]]]
+
+
+def parse_endpoint(endpoint: str) -> Endpoint:
+    """
+    解析 daemon 的位址
+    - unix:PATH 或含有 `/` 的路徑：Unix domain socket
+    - HOST:PORT、:PORT 或 PORT：localhost HTTP（HOST 必須是 loopback）
+    """
+    if endpoint.startswith("unix:"):
+        return "unix", endpoint[len("unix:"):]
+    if "/" in endpoint:
+        return "unix", endpoint
+    host, _, port = endpoint.rpartition(":")
+    host = host.strip("[]") or "127.0.0.1"
+    if host not in _LOOPBACK_HOSTS:
+        raise ValueError(f"Refusing to listen on '{host}': the daemon only accepts local connections")
+    try:
+        return "tcp", (host, int(port))
+    except ValueError:
+        raise ValueError(f"Invalid daemon endpoint '{endpoint}': expected HOST:PORT, PORT or unix:PATH")
+
+
+def assemble_source(source: str, bonus: bool = False, object_format: str = "text") -> Dict[str, Any]:
+    """
+    worker process 的進入點：組譯一份原始碼，回傳 object program 與診斷訊息
+    bonus 與 object_format 只作用於這個請求
+    binary 格式的 object program 以 base64 編碼
+    """
+    start = time.perf_counter()
+    result: Dict[str, Any] = {"ok": False}
+    with capture_logs() as records:
+        try:
+            assembler = MyAssembler(io.StringIO(source), "", AssemblerOptions(bonus=bonus, object_format=object_format))
+            assembler.preprocess_and_assemble()
+            program = assembler.object_program()
+            result["ok"] = True
+            result["sections"] = len(assembler.sections)
+            result["object_program"] = base64.b64encode(program).decode("ascii") if object_format == "binary" else program
+        except Exception as e:
+            result["error"] = str(e)
+    result["diagnostics"] = [{"level": record.levelname.lower(), "message": record.getMessage()} for record in records]
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def _init_worker() -> None:
+    """worker 的訊息只回傳給請求端，不輸出到 daemon 的 console"""
+    worker_logger = logging.getLogger(LOGGER_NAME)
+    worker_logger.handlers.clear()
+    worker_logger.propagate = False
+    worker_logger.setLevel(logging.WARNING)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health    → {"status": "ok", "workers": N}
+    POST /assemble  → 組譯結果（見 assemble_source）
+      - Content-Type: application/json：{"source": "...", "bonus": false, "format": "text"}
+      - 其他：body 為原始碼，bonus/format 以 query string 指定（/assemble?bonus=1&format=binary）
+    """
+    server_version = "sicxe-assembler"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        if urlsplit(self.path).path != "/health":
+            self._send(404, {"error": f"Unknown path {self.path}"})
+            return
+        self._send(200, {"status": "ok", "workers": self.server.assembler_daemon.jobs})
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/assemble":
+            self.close_connection = True #! 不讀取 body
+            self._send(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            request = self._read_request(parse_qs(url.query))
+        except ValueError as e:
+            self._send(400, {"error": str(e)})
+            return
+        result = self.server.assembler_daemon.assemble(**request)
+        self._send(200 if result["ok"] else 422, result)
+
+    def _read_request(self, query: Dict[str, list]) -> Dict[str, Any]:
+        #! 還沒讀取 body 就回應錯誤時關閉連線，否則 keep-alive 會把未讀的 body 當成下一個請求
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self.close_connection = True
+            raise ValueError("Content-Length is required")
+        try:
+            length = int(length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            raise ValueError(f"Invalid Content-Length: {self.headers.get('Content-Length')!r}")
+        if length > MAX_REQUEST_BYTES:
+            self.close_connection = True
+            raise ValueError(f"Request body exceeds {MAX_REQUEST_BYTES} bytes")
+        body = self.rfile.read(length).decode()
+        if self.headers.get_content_type() == "application/json":
+            request = json.loads(body)
+            if not isinstance(request, dict) or not isinstance(request.get("source"), str):
+                raise ValueError("JSON body must be an object with a 'source' string")
+            options = request
+        else:
+            options = {key: values[-1] for key, values in query.items()}
+            options["source"] = body
+        bonus = options.get("bonus")
+        return {
+            "source": options["source"],
+            "bonus": None if bonus is None else str(bonus).lower() in ("1", "true", "yes", "on"),
+            "object_format": options.get("format"),
+        }
+
+    def _send(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s %s", self.address_string(), format % args)
+
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _TCP6Server(_TCPServer):
+    address_family = socket.AF_INET6
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self) -> None:
+        path = self.server_address
+        try:
+            mode = os.lstat(path).st_mode
+        except FileNotFoundError:
+            mode = None
+        if mode is not None:
+            #! 只刪除前一次沒有正常結束留下的 socket，絕不刪除一般檔案或仍有 daemon 在使用的 socket
+            if not stat.S_ISSOCK(mode):
+                raise OSError(errno.EADDRINUSE, f"Cannot listen on unix:{path}: the path exists and is not a socket")
+            if _socket_in_use(path):
+                raise OSError(errno.EADDRINUSE, f"Cannot listen on unix:{path}: address already in use")
+            os.remove(path)
+        super().server_bind()
+
+
+def _socket_in_use(path: str) -> bool:
+    """是否有 process 正在 path 上 listen"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+class AssemblerDaemon:
+    """
+    常駐的組譯 daemon：opcode/directive table 只在啟動時載入一次，
+    以 HTTP（localhost 或 Unix domain socket）接受組譯請求，交給 jobs 個 worker process 平行處理
+    每個請求有自己的 bonus 與輸出格式（未指定時使用 daemon 的預設值）
+    """
+    def __init__(self, endpoint: str = DEFAULT_ENDPOINT, jobs: int = 1, bonus: bool = False, object_format: str = "text"):
+        self.endpoint = parse_endpoint(endpoint)
+        self.jobs = jobs
+        self.bonus = bonus
+        self.object_format = object_format
+        self.executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker)
+        kind, address = self.endpoint
+        if kind == "unix":
+            self.httpd = _UnixServer(address, _RequestHandler)
+        else:
+            self.httpd = (_TCP6Server if ":" in address[0] else _TCPServer)(address, _RequestHandler)
+        self.httpd.assembler_daemon = self
+
+    @property
+    def address(self) -> str:
+        kind, _ = self.endpoint
+        if kind == "unix":
+            return f"unix:{self.httpd.server_address}"
+        host, port = self.httpd.server_address[:2]
+        return f"{host}:{port}"
+
+    def assemble(self, source: str, bonus: Optional[bool] = None, object_format: Optional[str] = None) -> Dict[str, Any]:
+        object_format = object_format or self.object_format
+        if object_format not in OBJECT_FORMATS:
+            return {"ok": False, "error": f"Unknown object format '{object_format}'", "diagnostics": []}
+        bonus = self.bonus if bonus is None else bonus
+        result = self.executor.submit(assemble_source, source, bonus, object_format).result()
+        logger.info("Assembled %d bytes in %.2f ms (%s)", len(source), result["seconds"] * 1000,
+                    "ok" if result["ok"] else result["error"])
+        return result
+
+    def serve_forever(self) -> None:
+        self.httpd.serve_forever()
+
+    def shutdown(self) -> None:
+        """從其他 thread 停止 serve_forever"""
+        self.httpd.shutdown()
+
+    def close(self) -> None:
+        self.httpd.server_close()
+        self.executor.shutdown()
+        kind, address = self.endpoint
+        if kind == "unix" and os.path.exists(address):
+            os.remove(address)
+
+    def __enter__(self) -> "AssemblerDaemon":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+def connect(endpoint: str = DEFAULT_ENDPOINT, timeout: Optional[float] = None) -> http.client.HTTPConnection:
+    """建立到 daemon 的連線（可重複使用於多個請求）"""
+    kind, address = parse_endpoint(endpoint)
+    if kind == "unix":
+        return _UnixConnection(address, timeout)
+    return http.client.HTTPConnection(*address, timeout=timeout)
+
+
+def request_assembly(connection: http.client.HTTPConnection, source: str, bonus: Optional[bool] = None,
+                     object_format: Optional[str] = None) -> Dict[str, Any]:
+    """送出一個組譯請求並回傳結果（見 assemble_source）"""
+    body = {"source": source}
+    if bonus is not None:
+        body["bonus"] = bonus
+    if object_format is not None:
+        body["format"] = object_format
+    connection.request("POST", "/assemble", json.dumps(body), {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    return json.loads(response.read())
@@ -0,0 +1,418 @@
+import math
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Dict, Iterable, Optional, Tuple
+
+from config import opcode_table
+from .corefunc.section import Section
+from .loader import LinkingLoader, LoadedImage
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+#! SIC/XE 的記憶體大小（1 MB）
+MEMORY_SIZE = 1 << 20
+
+#! L 暫存器的初始值：程式以 RSUB / J @RETADR 回到這個位址時結束執行
+HALT_ADDRESS = 0xFFFFFF
+
+#! 暫存器編號（與 config.REGISTER_TABLE 相同）
+A, X, L, B, S, T, F, PC, SW = 0, 1, 2, 3, 4, 5, 6, 8, 9
+
+#! Format 3/4 的定址方式
+IMMEDIATE, SIMPLE, INDIRECT = 0, 1, 2
+
+#! Condition code（STSW 時放在 SW 的 bit 6-7：< 00、= 01、> 10）
+LESS, EQUAL, GREATER = -1, 0, 1
+
+_WORD_MASK = 0xFFFFFF
+
+#! 預先解碼的指令：(handler, 下一個 PC, target address, 位址模式(1: +X, 2: +B), 定址方式/暫存器, 指令位址)
+#! Format 2 的第 3、5 個欄位為 r1、r2
+Decoded = Tuple[Callable[["Decoded"], None], int, int, int, int, int]
+
+
+def _signed(value: int) -> int:
+    return value - 0x1000000 if value & 0x800000 else value
+
+
+def decode_float(data: bytes) -> float:
+    """48 位元浮點數：1 位元正負號、11 位元指數（偏移 1024）、36 位元小數（0.5 <= f < 1）"""
+    value = int.from_bytes(data, "big")
+    fraction = (value & 0xFFFFFFFFF) / (1 << 36)
+    exponent = (value >> 36) & 0x7FF
+    result = math.ldexp(fraction, exponent - 1024)
+    return -result if value >> 47 else result
+
+
+def encode_float(value: float) -> bytes:
+    if value == 0:
+        return bytes(6)
+    fraction, exponent = math.frexp(abs(value))
+    bits = min(round(fraction * (1 << 36)), (1 << 36) - 1)
+    encoded = ((1 if value < 0 else 0) << 47) | (((exponent + 1024) & 0x7FF) << 36) | bits
+    return encoded.to_bytes(6, "big")
+
+
+class Device:
+    """
+    模擬的 I/O 裝置（TD/RD/WD）
+    RD 依序讀出 data 的 bytes，讀完之後回傳 0（SIC 程式以 0 作為輸入結束）
+    WD 寫入的 bytes 收集在 output（可指定已開啟的檔案，預設為記憶體中的 bytearray）
+    """
+    def __init__(self, data: bytes = b"", output: Optional[BinaryIO] = None):
+        self.data = data
+        self.position = 0
+        self.output = output
+        self.written = bytearray()
+
+    @classmethod
+    def from_file(cls, path: str) -> "Device":
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def ready(self) -> bool:
+        return True
+
+    def read(self) -> int:
+        if self.position >= len(self.data):
+            return 0
+        self.position += 1
+        return self.data[self.position - 1]
+
+    def write(self, value: int) -> None:
+        if self.output is not None:
+            self.output.write(bytes((value,)))
+        else:
+            self.written.append(value)
+
+
+@dataclass
+class RunResult:
+    """一次執行的結果
+    steps: 執行的指令數
+    seconds: 執行時間（不含載入）
+    pc: 結束時的 PC
+    reason: 結束原因（halt：回到 HALT_ADDRESS，loop：跳到自己，limit：達到 max_steps）
+    """
+    steps: int
+    seconds: float
+    pc: int
+    reason: str
+
+    @property
+    def instructions_per_second(self) -> float:
+        return self.steps / self.seconds if self.seconds > 0 else float("inf")
+
+
+class Simulator:
+    """
+    SIC/XE 指令集模擬器
+    - 載入 LinkingLoader 產生的記憶體映像（object program 檔案或組譯完成的 Section）
+    - 每個位址的指令只解碼一次，結果快取在 dict（寫入已解碼的位址時才失效，支援自我修改的程式）
+    - 以 config.opcode_table 的 opcode 建立 dispatch table（opcode -> handler），定址方式與 ObjectCodeGenerator 的編碼一致：
+      format 3 的 n/i/x/b/p（PC-relative 的位移為有號 12 位元）、n = i = 0 的 SIC 15 位元位址、format 4 的 20 位元位址
+    - TD/RD/WD 使用 Device（檔案或記憶體 buffer），沒有指定的裝置視為沒有輸入的 buffer
+    浮點數指令以 Python float 運算；SIO/HIO/TIO/LPS/SSK/STI/SVC 等特權指令不支援
+    """
+    def __init__(self, image: LoadedImage, devices: Optional[Dict[int, Device]] = None, memory_size: int = MEMORY_SIZE):
+        if image.address + len(image.memory) > memory_size:
+            raise ValueError(f"Program of {len(image.memory)} bytes at {image.address:06X} does not fit in {memory_size} bytes of memory")
+        self.image = image
+        self.memory = bytearray(memory_size)
+        self.memory[image.address:image.address + len(image.memory)] = image.memory
+        self.registers = [0] * 10
+        self.registers[L] = HALT_ADDRESS
+        self.f = 0.0 #! F 暫存器
+        self.cc = EQUAL
+        self.pc = image.entry
+        self.devices: Dict[int, Device] = dict(devices or {})
+        self._decoded: Dict[int, Decoded] = {}
+        self._code_map = bytearray(memory_size) #! 已解碼的指令所在的 bytes，寫入時用來判斷是否要讓快取失效
+        self._dispatch: Dict[int, Tuple[str, int, Callable[[Decoded], None]]] = {
+            entry.opcode: (mnemonic, entry.format, getattr(self, f"_{mnemonic.lower()}", self._unsupported))
+            for mnemonic, entry in opcode_table.items()
+        }
+
+    @classmethod
+    def from_sections(cls, sections: Iterable[Section], address: Optional[int] = None,
+                      devices: Optional[Dict[int, Device]] = None) -> "Simulator":
+        loader = LinkingLoader(address)
+        loader.add_sections(sections)
+        return cls(loader.link(), devices)
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str], address: Optional[int] = None,
+                   devices: Optional[Dict[int, Device]] = None) -> "Simulator":
+        loader = LinkingLoader(address)
+        for path in paths:
+            loader.add_file(path)
+        return cls(loader.link(), devices)
+
+    def device(self, number: int) -> Device:
+        if number not in self.devices:
+            self.devices[number] = Device()
+        return self.devices[number]
+
+    #! 執行
+    def run(self, max_steps: Optional[int] = None) -> RunResult:
+        decoded = self._decoded
+        decode = self._decode
+        limit = -1 if max_steps is None else max_steps
+        steps = 0
+        reason = "limit"
+        pc = self.pc
+        start = time.perf_counter()
+        try:
+            while steps != limit:
+                if pc == HALT_ADDRESS:
+                    reason = "halt"
+                    break
+                entry = decoded.get(pc)
+                if entry is None:
+                    entry = decode(pc)
+                self.pc = entry[1]
+                entry[0](entry)
+                steps += 1
+                if self.pc == pc: #! J * 之類跳到自己的指令視為停止
+                    reason = "loop"
+                    break
+                pc = self.pc
+        except IndexError:
+            raise ValueError(f"Memory access out of range at {pc:06X}")
+        seconds = time.perf_counter() - start
+        logger.info("Executed %d instructions in %.3f s (%s at %06X)", steps, seconds, reason, self.pc)
+        return RunResult(steps, seconds, self.pc, reason)
+
+    def step(self) -> None:
+        """執行一個指令"""
+        entry = self._decoded.get(self.pc) or self._decode(self.pc)
+        self.pc = entry[1]
+        entry[0](entry)
+
+    #! 解碼
+    def _decode(self, pc: int) -> Decoded:
+        memory = self.memory
+        first = memory[pc]
+        info = self._dispatch.get(first & 0xFC)
+        if info is None:
+            raise ValueError(f"Invalid opcode {first:02X} at {pc:06X}")
+        mnemonic, format_type, handler = info
+        if format_type == 1:
+            entry = (handler, pc + 1, 0, 0, 0, pc)
+        elif format_type == 2:
+            registers = memory[pc + 1]
+            entry = (handler, pc + 2, registers >> 4, 0, registers & 0xF, pc)
+        else:
+            second = memory[pc + 1]
+            ni = first & 0x03
+            addressing = SIMPLE if ni in (0, 3) else (IMMEDIATE if ni == 1 else INDIRECT)
+            mode = 1 if second & 0x80 else 0
+            if ni == 0: #! SIC：15 位元位址
+                entry = (handler, pc + 3, ((second & 0x7F) << 8) | memory[pc + 2], mode, addressing, pc)
+            elif second & 0x10: #! Format 4：20 位元位址
+                entry = (handler, pc + 4, ((second & 0x0F) << 16) | (memory[pc + 2] << 8) | memory[pc + 3], mode, addressing, pc)
+            else:
+                disp = ((second & 0x0F) << 8) | memory[pc + 2]
+                if second & 0x20: #! PC-relative（有號）
+                    target = (pc + 3 + (disp - 0x1000 if disp & 0x800 else disp)) & 0xFFFFF
+                elif second & 0x40: #! Base-relative
+                    target, mode = disp, mode | 2
+                else:
+                    target = disp
+                entry = (handler, pc + 3, target, mode, addressing, pc)
+        self._decoded[pc] = entry
+        self._code_map[pc:entry[1]] = b"\x01" * (entry[1] - pc)
+        return entry
+
+    def _invalidate(self, address: int, size: int) -> None:
+        if self._code_map.find(1, address, address + size) >= 0:
+            for start in range(address - 3, address + size):
+                self._decoded.pop(start, None)
+
+    #! 記憶體與運算元
+    def _word(self, address: int) -> int:
+        memory = self.memory
+        return (memory[address] << 16) | (memory[address + 1] << 8) | memory[address + 2]
+
+    def _store_word(self, address: int, value: int) -> None:
+        self._invalidate(address, 3)
+        self.memory[address:address + 3] = (value & _WORD_MASK).to_bytes(3, "big")
+
+    def _target(self, entry: Decoded) -> int:
+        """target address（indirect 時為間接取得的位址，immediate 時即為運算元的值）"""
+        target = entry[2]
+        mode = entry[3]
+        if mode:
+            if mode & 1:
+                target += self.registers[X]
+            if mode & 2:
+                target += self.registers[B]
+            target &= 0xFFFFF
+        if entry[4] == INDIRECT:
+            target = self._word(target)
+        return target
+
+    def _operand(self, entry: Decoded) -> int:
+        target = self._target(entry)
+        return target if entry[4] == IMMEDIATE else self._word(target)
+
+    def _byte_operand(self, entry: Decoded) -> int:
+        target = self._target(entry)
+        return target & 0xFF if entry[4] == IMMEDIATE else self.memory[target]
+
+    def _float_operand(self, entry: Decoded) -> float:
+        target = self._target(entry)
+        return decode_float(self.memory[target:target + 6])
+
+    def _compare(self, left: int, right: int) -> None:
+        self.cc = LESS if left < right else (GREATER if left > right else EQUAL)
+
+    def _unsupported(self, entry: Decoded) -> None:
+        mnemonic = self._dispatch[self.memory[entry[5]] & 0xFC][0]
+        raise ValueError(f"Instruction {mnemonic} at {entry[5]:06X} is not supported by the simulator")
+
+    #! Load / store
+    def _lda(self, entry: Decoded) -> None: self.registers[A] = self._operand(entry)
+    def _ldx(self, entry: Decoded) -> None: self.registers[X] = self._operand(entry)
+    def _ldl(self, entry: Decoded) -> None: self.registers[L] = self._operand(entry)
+    def _ldb(self, entry: Decoded) -> None: self.registers[B] = self._operand(entry)
+    def _lds(self, entry: Decoded) -> None: self.registers[S] = self._operand(entry)
+    def _ldt(self, entry: Decoded) -> None: self.registers[T] = self._operand(entry)
+    def _sta(self, entry: Decoded) -> None: self._store_word(self._target(entry), self.registers[A])
+    def _stx(self, entry: Decoded) -> None: self._store_word(self._target(entry), self.registers[X])
+    def _stl(self, entry: Decoded) -> None: self._store_word(self._target(entry), self.registers[L])
+    def _stb(self, entry: Decoded) -> None: self._store_word(self._target(entry), self.registers[B])
+    def _sts(self, entry: Decoded) -> None: self._store_word(self._target(entry), self.registers[S])
+    def _stt(self, entry: Decoded) -> None: self._store_word(self._target(entry), self.registers[T])
+
+    def _stsw(self, entry: Decoded) -> None:
+        code = {LESS: 0, EQUAL: 1, GREATER: 2}[self.cc]
+        self.registers[SW] = (self.registers[SW] & ~0x030000) | (code << 16)
+        self._store_word(self._target(entry), self.registers[SW])
+
+    def _ldch(self, entry: Decoded) -> None:
+        self.registers[A] = (self.registers[A] & 0xFFFF00) | self._byte_operand(entry)
+
+    def _stch(self, entry: Decoded) -> None:
+        target = self._target(entry)
+        self._invalidate(target, 1)
+        self.memory[target] = self.registers[A] & 0xFF
+
+    #! 整數運算
+    def _add(self, entry: Decoded) -> None: self.registers[A] = (self.registers[A] + self._operand(entry)) & _WORD_MASK
+    def _sub(self, entry: Decoded) -> None: self.registers[A] = (self.registers[A] - self._operand(entry)) & _WORD_MASK
+    def _and(self, entry: Decoded) -> None: self.registers[A] &= self._operand(entry)
+    def _or(self, entry: Decoded) -> None: self.registers[A] |= self._operand(entry)
+
+    def _mul(self, entry: Decoded) -> None:
+        self.registers[A] = (_signed(self.registers[A]) * _signed(self._operand(entry))) & _WORD_MASK
+
+    def _div(self, entry: Decoded) -> None:
+        self.registers[A] = self._divide(self.registers[A], self._operand(entry), entry)
+
+    @staticmethod
+    def _divide(dividend: int, divisor: int, entry: Decoded) -> int:
+        dividend, divisor = _signed(dividend), _signed(divisor)
+        if divisor == 0:
+            raise ValueError(f"Division by zero at {entry[5]:06X}")
+        quotient = abs(dividend) // abs(divisor)
+        return (-quotient if (dividend < 0) != (divisor < 0) else quotient) & _WORD_MASK
+
+    def _comp(self, entry: Decoded) -> None:
+        self._compare(_signed(self.registers[A]), _signed(self._operand(entry)))
+
+    def _tix(self, entry: Decoded) -> None:
+        self.registers[X] = (self.registers[X] + 1) & _WORD_MASK
+        self._compare(_signed(self.registers[X]), _signed(self._operand(entry)))
+
+    #! 跳躍
+    def _j(self, entry: Decoded) -> None:
+        self.pc = self._target(entry)
+
+    def _jeq(self, entry: Decoded) -> None:
+        if self.cc == EQUAL:
+            self.pc = self._target(entry)
+
+    def _jgt(self, entry: Decoded) -> None:
+        if self.cc == GREATER:
+            self.pc = self._target(entry)
+
+    def _jlt(self, entry: Decoded) -> None:
+        if self.cc == LESS:
+            self.pc = self._target(entry)
+
+    def _jsub(self, entry: Decoded) -> None:
+        self.registers[L] = self.pc
+        self.pc = self._target(entry)
+
+    def _rsub(self, entry: Decoded) -> None:
+        self.pc = self.registers[L]
+
+    #! Format 2（r1 在 entry[2]、r2 在 entry[4]）
+    def _get(self, register: int) -> int:
+        if register == PC:
+            return self.pc
+        if register == F:
+            return int(self.f) & _WORD_MASK
+        return self.registers[register]
+
+    def _set(self, register: int, value: int) -> None:
+        if register == PC:
+            self.pc = value & _WORD_MASK
+        elif register == F:
+            self.f = float(_signed(value))
+        else:
+            self.registers[register] = value & _WORD_MASK
+
+    def _addr(self, entry: Decoded) -> None: self._set(entry[4], self._get(entry[4]) + self._get(entry[2]))
+    def _subr(self, entry: Decoded) -> None: self._set(entry[4], self._get(entry[4]) - self._get(entry[2]))
+    def _mulr(self, entry: Decoded) -> None: self._set(entry[4], _signed(self._get(entry[4])) * _signed(self._get(entry[2])))
+    def _divr(self, entry: Decoded) -> None: self._set(entry[4], self._divide(self._get(entry[4]), self._get(entry[2]), entry))
+    def _compr(self, entry: Decoded) -> None: self._compare(_signed(self._get(entry[2])), _signed(self._get(entry[4])))
+    def _clear(self, entry: Decoded) -> None: self._set(entry[2], 0)
+    def _rmo(self, entry: Decoded) -> None: self._set(entry[4], self._get(entry[2]))
+
+    def _tixr(self, entry: Decoded) -> None:
+        self.registers[X] = (self.registers[X] + 1) & _WORD_MASK
+        self._compare(_signed(self.registers[X]), _signed(self._get(entry[2])))
+
+    def _shiftl(self, entry: Decoded) -> None:
+        """循環左移 n 位元（r2 欄位為 n - 1）"""
+        value, count = self._get(entry[2]), (entry[4] + 1) % 24
+        self._set(entry[2], (value << count) | (value >> (24 - count)))
+
+    def _shiftr(self, entry: Decoded) -> None:
+        """算術右移 n 位元（左邊補上正負號位元）"""
+        self._set(entry[2], _signed(self._get(entry[2])) >> (entry[4] + 1))
+
+    #! 浮點數
+    def _ldf(self, entry: Decoded) -> None: self.f = self._float_operand(entry)
+    def _addf(self, entry: Decoded) -> None: self.f += self._float_operand(entry)
+    def _subf(self, entry: Decoded) -> None: self.f -= self._float_operand(entry)
+    def _mulf(self, entry: Decoded) -> None: self.f *= self._float_operand(entry)
+    def _compf(self, entry: Decoded) -> None: self._compare(self.f, self._float_operand(entry))
+    def _fix(self, entry: Decoded) -> None: self.registers[A] = int(self.f) & _WORD_MASK
+    def _float(self, entry: Decoded) -> None: self.f = float(_signed(self.registers[A]))
+    def _norm(self, entry: Decoded) -> None: pass #! F 以 Python float 保存，本來就是正規化的
+
+    def _divf(self, entry: Decoded) -> None:
+        divisor = self._float_operand(entry)
+        if divisor == 0:
+            raise ValueError(f"Division by zero at {entry[5]:06X}")
+        self.f /= divisor
+
+    def _stf(self, entry: Decoded) -> None:
+        target = self._target(entry)
+        self._invalidate(target, 6)
+        self.memory[target:target + 6] = encode_float(self.f)
+
+    #! I/O 裝置（裝置編號為運算元的 byte）
+    def _td(self, entry: Decoded) -> None:
+        self.cc = LESS if self.device(self._byte_operand(entry)).ready() else EQUAL
+
+    def _rd(self, entry: Decoded) -> None:
+        self.registers[A] = (self.registers[A] & 0xFFFF00) | self.device(self._byte_operand(entry)).read()
+
+    def _wd(self, entry: Decoded) -> None:
+        self.device(self._byte_operand(entry)).write(self.registers[A] & 0xFF)
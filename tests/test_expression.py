@@ -0,0 +1,110 @@
+import pytest
+
+from src.corefunc.expression import (ExpressionError, SymbolReference, UnresolvedSymbolError, compile_expression,
+                                     evaluate_expression)
+from src.models.dataTypes import Symbol
+
+SYMBOLS = {
+    "FIRST": Symbol("FIRST", 0x1000),
+    "BUFEND": Symbol("BUFEND", 0x1036),
+    "BUFFER": Symbol("BUFFER", 0x0036),
+    "MAXLEN": Symbol("MAXLEN", 4096, is_relative=False),
+}
+
+
+@pytest.mark.parametrize("source, value", [
+    ("1+2*3", 7),
+    ("(1+2)*3", 9),
+    ("10-4-3", 3), #! 左結合
+    ("12/2/3", 2),
+    ("2*3+4*5", 26),
+    ("-5+2", -3),
+    ("-(2+3)*2", -10),
+    ("--4", 4),
+    ("+7", 7),
+    ("X'1F'", 31),
+    ("x'ff'+1", 256),
+    ("X'10'*2", 32),
+    ("0x10", 16),
+])
+def test_constant_expressions(source, value):
+    result = evaluate_expression(source, {})
+    assert result.value == value
+    assert result.is_absolute
+
+
+@pytest.mark.parametrize("source, value", [
+    ("7/2", 3),
+    ("-7/2", -3),
+    ("7/-2", -3),
+    ("-7/-2", 3),
+    ("1/2", 0),
+    ("-1/2", 0),
+])
+def test_division_truncates_toward_zero(source, value):
+    assert evaluate_expression(source, {}).value == value
+
+
+def test_division_by_zero():
+    with pytest.raises(ExpressionError, match="Division by zero"):
+        evaluate_expression("4/(2-2)", {})
+
+
+def test_relative_minus_relative_is_absolute():
+    result = evaluate_expression("BUFEND-BUFFER", SYMBOLS)
+    assert result.value == 0x1000
+    assert result.is_absolute
+
+
+def test_relative_plus_absolute_is_relative():
+    result = evaluate_expression("FIRST+MAXLEN/2", SYMBOLS)
+    assert result.value == 0x1000 + 2048
+    assert result.is_relative
+
+
+def test_relative_plus_relative_is_neither():
+    result = evaluate_expression("FIRST+BUFFER", SYMBOLS)
+    assert not result.is_absolute and not result.is_relative
+
+
+def test_relative_term_cannot_be_multiplied():
+    with pytest.raises(ExpressionError, match="Relative term"):
+        evaluate_expression("FIRST*2", SYMBOLS)
+
+
+def test_location_counter():
+    expression = compile_expression("*-FIRST")
+    assert expression.uses_location
+    result = expression.evaluate(SYMBOLS, 0x1010)
+    assert result.value == 0x10
+    assert result.is_absolute
+    assert compile_expression("2*3").uses_location is False
+
+
+def test_references_carry_sign():
+    expression = compile_expression("A-(B-C)+-D")
+    assert expression.references == (SymbolReference("A", "+"), SymbolReference("B", "-"),
+                                      SymbolReference("C", "+"), SymbolReference("D", "-"))
+    assert expression.symbols == ("A", "B", "C", "D")
+
+
+def test_unresolved_symbol():
+    with pytest.raises(UnresolvedSymbolError) as info:
+        evaluate_expression("FIRST+LATER", SYMBOLS)
+    assert info.value.name == "LATER"
+    #! 有名稱但還沒有位址（pass 1 的向前引用）同樣視為尚未解析
+    with pytest.raises(UnresolvedSymbolError):
+        evaluate_expression("LATER", {"LATER": Symbol("LATER")})
+
+
+def test_external_symbols_evaluate_as_absolute():
+    externals = {"RDREC": Symbol("RDREC", is_external=True)}
+    result = evaluate_expression("RDREC+3", {}, externals=externals)
+    assert result.value == 3
+    assert result.is_absolute
+
+
+@pytest.mark.parametrize("source", ["", "1+", "(1+2", "1 2", "3$4", "X'G1'", ")"])
+def test_syntax_errors(source):
+    with pytest.raises(ExpressionError):
+        compile_expression(source)
@@ -0,0 +1,106 @@
+import glob
+import io
+import os
+import random
+
+import pytest
+
+from src.assembler import MyAssembler
+from src.incremental import IncrementalAssembler
+from src.models.dataTypes import AssemblerOptions
+
+INPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "input")
+
+EQU_LOCATION = """PROG   START  0
+FIRST  LDA    #0
+HERE   EQU    *
+       LDA    BUF
+       J      HERE
+BUF    RESW   1
+       END    FIRST
+"""
+
+
+def full_assembly(source: str, options: AssemblerOptions) -> str:
+    assembler = MyAssembler(io.StringIO(source), "", options)
+    assembler.preprocess_and_assemble()
+    return assembler.object_program()
+
+
+def edit_and_compare(incremental: IncrementalAssembler, first_line: int, last_line: int, text: str):
+    """套用編輯，並確認結果與對編輯後的原始碼做完整組譯完全相同"""
+    result = incremental.edit(first_line, last_line, text)
+    assert incremental.object_program() == full_assembly(incremental.source, incremental.options)
+    return result
+
+
+def fig2_5() -> IncrementalAssembler:
+    with open(os.path.join(INPUT_DIR, "fig2_5.txt")) as file:
+        return IncrementalAssembler(file.read())
+
+
+def test_size_change_before_base_relative_instruction():
+    incremental = fig2_5()
+    #! 在 LENGTH（BASE）與 BUFFER 之間插入 7 bytes，STCH BUFFER,X 的 base relative displacement 隨之改變
+    result = edit_and_compare(incremental, 20, 19, "\tRESB\t7")
+    assert result.incremental
+    assert any(instruction.mnemonic == "STCH" for instruction in result.changed)
+    #! format 3 改為 format 4，之後所有指令平移 1 byte
+    assert edit_and_compare(incremental, 13, 13, "\t+LDA\t#3").incremental
+    assert edit_and_compare(incremental, 13, 13, "\tLDA\t#3").incremental
+
+
+def test_edit_after_equ_location_counter():
+    incremental = IncrementalAssembler(EQU_LOCATION)
+    #! HERE 的值是 EQU 所在的 location，之後的指令改變大小時 HERE 不變，J HERE 的 displacement 改變
+    assert edit_and_compare(incremental, 4, 4, "\t+LDA\tBUF").incremental
+    assert edit_and_compare(incremental, 4, 3, "\tRESB\t5").incremental
+    assert edit_and_compare(incremental, 4, 4, "").incremental
+
+
+def test_removed_label_still_referenced_falls_back():
+    incremental = fig2_5()
+    #! BASE LENGTH 與多個指令仍引用 LENGTH
+    result = edit_and_compare(incremental, 19, 19, "\tRESW\t1")
+    assert result.incremental is False
+    assert result.changed == [] and result.reencoded == 0
+    edit_and_compare(incremental, 19, 19, "LENGTH\tRESW\t1")
+
+
+def test_edit_after_end():
+    incremental = fig2_5()
+    before = incremental.object_program()
+    line_count = len(incremental.lines)
+    result = edit_and_compare(incremental, line_count + 1, line_count, "\tLDA\t#9\nEXTRA\tRESW\t1")
+    assert result.incremental and result.changed == []
+    assert incremental.object_program() == before
+
+
+def test_invalid_line_range():
+    incremental = IncrementalAssembler(EQU_LOCATION)
+    with pytest.raises(ValueError, match="Invalid line range"):
+        incremental.edit(3, 1, "")
+
+
+@pytest.mark.parametrize("path", sorted(glob.glob(os.path.join(INPUT_DIR, "*"))))
+@pytest.mark.parametrize("bonus", [False, True])
+def test_random_edits_match_full_assembly(path, bonus):
+    options = AssemblerOptions(bonus=bonus)
+    with open(path) as file:
+        source = file.read()
+    try:
+        incremental = IncrementalAssembler(source, options)
+    except ValueError:
+        pytest.skip("source does not assemble with these options")
+    texts = ["\tSTA\tBUFFER", "", "\tLDA\t#3", "\tRESB\t7", "\tTIXR\tT", "X\tWORD\t3", "\t+JSUB\tWRREC"]
+    generator = random.Random(path)
+    for _ in range(20):
+        first_line = generator.randint(1, len(incremental.lines))
+        last_line = generator.choice((first_line, first_line - 1))
+        try:
+            edit_and_compare(incremental, first_line, last_line, generator.choice(texts))
+        except ValueError:
+            #! 編輯後的原始碼無法組譯時，完整組譯也必須失敗
+            with pytest.raises(ValueError):
+                full_assembly(incremental.source, options)
+            incremental = IncrementalAssembler(source, options)
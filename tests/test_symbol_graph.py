@@ -0,0 +1,96 @@
+import io
+
+import pytest
+
+from src.assembler import MyAssembler
+from src.corefunc.symbolGraph import CircularReferenceError, SymbolGraph
+
+
+def assemble(source: str) -> MyAssembler:
+    assembler = MyAssembler(io.StringIO(source), "")
+    assembler.preprocess_and_assemble()
+    return assembler
+
+
+def test_resolves_in_dependency_order():
+    graph = SymbolGraph()
+    order = []
+    #! 加入順序與相依順序相反：A 依賴 B，B 依賴 C
+    graph.add("A", None, ["B", "UNKNOWN"], lambda: order.append("A"))
+    graph.add("B", None, ["C"], lambda: order.append("B"))
+    graph.add("C", None, [], lambda: order.append("C"))
+    graph.resolve()
+    assert order == ["C", "B", "A"]
+    assert len(graph) == 0
+
+
+def test_discarded_node_is_not_resolved():
+    graph = SymbolGraph()
+    order = []
+    graph.add("A", None, ["B"], lambda: order.append("A"))
+    graph.add("B", None, ["A"], lambda: order.append("B"))
+    graph.discard("B")
+    assert "B" not in graph
+    graph.resolve()
+    assert order == ["A"]
+
+
+@pytest.mark.parametrize("dependencies", [{"A": ["A"]}, {"A": ["B"], "B": ["C"], "C": ["A"]}])
+def test_cycle_is_reported(dependencies):
+    graph = SymbolGraph()
+    for key, depends_on in dependencies.items():
+        graph.add(key, None, depends_on, lambda: None)
+    with pytest.raises(CircularReferenceError, match="Circular symbol definition: ") as info:
+        graph.resolve()
+    assert all(key in str(info.value) for key in dependencies)
+
+
+def test_forward_equ_chain():
+    assembler = assemble("""CHAIN  START 1000
+FIRST  LDA    #A
+A      EQU    B+1
+B      EQU    C*2
+C      EQU    D-FIRST
+       RESB   N
+D      RESW   1
+N      EQU    6
+       END    FIRST
+""")
+    symbols = assembler.sections[0].symbol_table
+    assert symbols["N"].addr == 6
+    assert symbols["D"].addr == 0x1009 and symbols["D"].is_relative
+    assert symbols["C"].addr == 9 and not symbols["C"].is_relative
+    assert symbols["B"].addr == 0x12
+    assert symbols["A"].addr == 0x13 and not symbols["A"].is_relative
+    assert assembler.object_program().split() == ["HCHAIN", "00100000000C", "T00100003014013", "E001000"]
+
+
+def test_equ_cycle_reports_line_numbers():
+    with pytest.raises(CircularReferenceError) as info:
+        assemble("""LOOP   START  0
+FIRST  LDA    #0
+X1     EQU    Y1+1
+Y1     EQU    Z1
+Z1     EQU    X1-2
+       END    FIRST
+""")
+    message = str(info.value)
+    assert message.startswith("Circular symbol definition: ")
+    for name, line in (("X1", 3), ("Y1", 4), ("Z1", 5)):
+        assert f"{name} (line {line})" in message
+
+
+def test_cycle_through_location_counter_reports_directive():
+    #! RESB 的運算元依賴之後的標籤，而該標籤的位址又依賴 RESB
+    with pytest.raises(CircularReferenceError) as info:
+        assemble("""LOOP   START  0
+FIRST  LDA    #0
+       RESB   SIZE
+SIZE   EQU    LAST-FIRST
+LAST   RESW   1
+       END    FIRST
+""")
+    message = str(info.value)
+    assert "RESB SIZE (line 3)" in message
+    assert "SIZE (line 4)" in message
+    assert "LAST (line 5)" in message